@@ -45,11 +45,249 @@ VOLCANO_API_BASE = "https://ark.cn-beijing.volces.com/api/v3"
 IMAGE_API_KEY = os.getenv("IMAGE_API_KEY", "")
 IMAGE_API_BASE = os.getenv("IMAGE_API_BASE", "https://api.openai.com/v1")
 IMAGE_MODEL = os.getenv("IMAGE_MODEL", "dall-e-3")
+IMAGE_RESPONSE_FORMAT = os.getenv("IMAGE_RESPONSE_FORMAT", "url")  # url 或 b64_json
 
 # 火山引擎图像生成配置
 VOLCANO_IMAGE_MODEL = os.getenv("VOLCANO_IMAGE_MODEL", "doubao-seedream-4-5-251128")
 VOLCANO_IMAGE_SIZE = os.getenv("VOLCANO_IMAGE_SIZE", "2K")  # 2K, 1024x1024等
 VOLCANO_IMAGE_WATERMARK = os.getenv("VOLCANO_IMAGE_WATERMARK", "true")
+VOLCANO_IMAGE_GROUPED = os.getenv("VOLCANO_IMAGE_GROUPED", "true")  # 一篇帖子的多张图片合并为一次组图请求
+
+# ==================== 模型分级路由配置 ====================
+
+# 模型分级：heavy用于正文等长文案，light用于展开配图提示词、补全字段等小任务
+MODEL_TIERS = {
+    "heavy": {
+        "volcano": VOLCANO_MODEL,
+        "openai": OPENAI_MODEL
+    },
+    "light": {
+        "volcano": os.getenv("VOLCANO_LIGHT_MODEL", "doubao-lite-32k"),
+        "openai": os.getenv("OPENAI_LIGHT_MODEL", "gpt-4o-mini")
+    }
+}
+
+# 每种生成任务使用的模型等级、耗时目标（秒）、max_tokens上限、temperature和提示词token预算
+# 任务最近耗时的分位数超过slo时，在cooldown秒内降级到fallback_tier
+MODEL_ROUTES = {
+    "body_content": {
+        "tier": "heavy",
+        "fallback_tier": "light",
+        "slo": 30,
+        "max_tokens": 1500,
+        "temperature": 0.8,
+        "prompt_budget": 2000
+    },
+    "combined_content": {
+        "tier": "heavy",
+        "fallback_tier": "light",
+        "slo": 45,
+        "max_tokens": 2500,
+        "temperature": 0.8,
+        "prompt_budget": 3500
+    },
+    "body_repair": {
+        "tier": "light",
+        "slo": 15,
+        "max_tokens": 800,
+        "temperature": 0.7,
+        "prompt_budget": 1500
+    },
+    "image_prompt": {
+        "tier": "light",
+        "slo": 10,
+        "max_tokens": 400,
+        "temperature": 0.9,
+        "prompt_budget": 1000
+    },
+    "default": {
+        "tier": "heavy",
+        "slo": 30,
+        "max_tokens": 2000,
+        "temperature": 0.8,
+        "prompt_budget": 3000
+    }
+}
+
+MODEL_ROUTING_CONFIG = {
+    "auto_downgrade": os.getenv("MODEL_AUTO_DOWNGRADE", "true") == "true",
+    "path": DATA_DIR / "cache" / "model_routes.json",  # 降级状态（多个进程共享）
+    "percentile": 0.9,
+    "window": 20,  # 按最近多少次请求计算耗时分位数
+    "min_samples": 10,  # 样本少于此数时不判断（样本太少时分位数接近最大值，一次慢请求就会触发降级）
+    "cooldown": 1800  # 降级持续时间（秒），之后重新尝试原等级
+}
+
+# ==================== Token预算配置 ====================
+
+# 调用前估算提示词token数并按预期输出长度设置max_tokens
+# OpenAI安装tiktoken时精确计数，其余按字符估算（中文约每字1个token，其他字符约每4个字符1个token）
+TOKEN_BUDGET_CONFIG = {
+    "enabled": os.getenv("TOKEN_BUDGET_ENABLED", "true") == "true",
+    "cjk_tokens_per_char": 1.0,
+    "other_chars_per_token": 4,
+    "message_overhead": 4,  # 每条消息的格式开销
+    "output_margin": 1.5,  # 预期输出长度的余量（emoji等占用更多token）
+    "field_overhead": 20,  # JSON每个字段的键名和引号
+    "hashtag_tokens": 40,
+    "image_prompt_tokens": 150  # 一段英文配图提示词
+}
+
+# ==================== HTTP连接池配置 ====================
+
+HTTP_CONFIG = {
+    "http2": True,  # 安装h2时启用HTTP/2
+    "keepalive_expiry": 60,  # 空闲连接保留时间（秒）
+    "default_host_limit": 10,  # 未单独配置的主机的连接数上限
+    "per_host_limits": {
+        "ark.cn-beijing.volces.com": 8,
+        "api.openai.com": 8,
+        "api.weixin.qq.com": 4
+    },
+    # 按接口区分的超时（秒）
+    "timeouts": {
+        "default": {"connect": 10, "read": 60},
+        "llm": {"connect": 10, "read": 60},
+        "volcano_image": {"connect": 10, "read": 180},  # 图片生成可能需要更长时间
+        "volcano_image_group": {"connect": 10, "read": 300},  # 组图一次返回多张
+        "dalle_image": {"connect": 10, "read": 120},
+        "image_download": {"connect": 10, "read": 60},
+        "wechat_token": {"connect": 5, "read": 10},
+        "wechat": {"connect": 10, "read": 30}
+    }
+}
+
+# ==================== 重试与熔断配置 ====================
+
+RETRY_CONFIG = {
+    # 各类错误最多尝试的次数（含首次请求），未列出的类型（认证、其他4xx）不重试
+    "max_attempts": {
+        "rate_limit": 4,
+        "server": 3,
+        "network": 3,
+        "timeout": 1  # 超时已经等了很久，交给备用服务商而不是原地重试
+    },
+    "base_delay": 1,  # 退避起始等待（秒）
+    "max_delay": 20,  # 单次退避等待上限（秒）
+    "max_retry_after": 60,  # Retry-After超过该值时不再等待，直接失败回退
+    # 熔断：连续失败（5xx/超时/网络错误）达到阈值后，在冷却期内直接拒绝请求
+    "breaker": {
+        "failure_threshold": 3,
+        "recovery_timeout": 120
+    }
+}
+
+# ==================== 限流配置 ====================
+
+# 令牌桶状态保存在SQLite中，多个生成进程共享配额
+# limits的键为 服务名 或 服务名:模型（优先），rpm=每分钟请求数，tpm=每分钟token数
+RATE_LIMIT_CONFIG = {
+    "enabled": os.getenv("RATE_LIMIT_ENABLED", "true") == "true",
+    "path": DATA_DIR / "cache" / "rate_limits.db",
+    "burst_seconds": 5,  # 桶容量 = 5秒的配额，只允许很短的突发
+    "limits": {
+        "llm:volcano": {"rpm": 300, "tpm": 100000},
+        "llm:openai": {"rpm": 60, "tpm": 60000},
+        "image:volcano": {"rpm": 30},
+        "image:dalle": {"rpm": 5}
+    }
+}
+
+# ==================== 流式输出配置 ====================
+
+# 需要JSON结果的调用使用流式输出，边接收边解析，格式异常时提前取消
+STREAM_CONFIG = {
+    "enabled": os.getenv("LLM_STREAM_ENABLED", "true") == "true",
+    "max_prefix_chars": 200,  # JSON对象之前允许出现的说明文字长度
+    "malformed_retries": 1  # 格式异常后重新生成的次数
+}
+
+# ==================== 结构化输出配置 ====================
+
+# 需要JSON结果的调用按Schema约束输出格式
+# json_schema：按Schema严格约束；json_object：只保证输出合法JSON；none：不约束
+STRUCTURED_OUTPUT_CONFIG = {
+    "enabled": os.getenv("STRUCTURED_OUTPUT_ENABLED", "true") == "true",
+    "modes": {
+        "openai": os.getenv("OPENAI_RESPONSE_FORMAT", "json_schema"),
+        "volcano": os.getenv("VOLCANO_RESPONSE_FORMAT", "json_object")
+    },
+    "repair": True  # 校验不通过时只补全缺失的字段，而不是整篇重新生成
+}
+
+# ==================== 提示词前缀缓存配置 ====================
+
+# 系统人设和生成说明固定不变，放在消息最前面，每次只发送变化的部分
+CONTEXT_CACHE_CONFIG = {
+    # 火山方舟上下文缓存（context/create + context/chat/completions）
+    "enabled": os.getenv("VOLCANO_CONTEXT_CACHE", "true") == "true",
+    "path": DATA_DIR / "cache" / "context_cache.json",
+    "ttl": 3600,  # 句柄有效期（秒），每次使用后服务端重置
+    "refresh_margin": 300,  # 距离过期不足该时间时重新创建
+    "retry_after_failure": 600,  # 创建失败后该时间内直接走普通请求
+    # OpenAI自动缓存相同前缀，附带prompt_cache_key让相同前缀的请求路由到同一缓存
+    "openai_prompt_cache_key": True
+}
+
+# ==================== 对冲请求配置 ====================
+
+# 主服务商超过等待时间仍未返回时，同时请求备用服务商，取先返回的有效结果
+# 等待时间取主服务商历史耗时的分位数（样本不足时用default_delay），并限制在[min_delay, max_delay]内
+HEDGE_CONFIG = {
+    "llm": {
+        "enabled": os.getenv("LLM_HEDGE_ENABLED", "true") == "true",
+        "percentile": 0.95,
+        "min_samples": 10,
+        "default_delay": 20,
+        "min_delay": 3,
+        "max_delay": 45
+    },
+    # 图片生成费用较高，默认关闭
+    "image": {
+        "enabled": os.getenv("IMAGE_HEDGE_ENABLED", "false") == "true",
+        "percentile": 0.95,
+        "min_samples": 10,
+        "default_delay": 90,
+        "min_delay": 20,
+        "max_delay": 150
+    }
+}
+
+# 调用耗时统计（对冲等待时间的依据）
+LATENCY_CONFIG = {
+    "path": DATA_DIR / "cache" / "latency.json",
+    "window": 200,  # 每种调用保留最近的样本数
+    "save_interval": 30  # 样本最多每隔多少秒写入一次文件（退出时再写入剩余的样本）
+}
+
+# ==================== 缓存配置 ====================
+
+# LLM响应缓存（按 服务商+模型+提示词+温度 哈希）
+LLM_CACHE_CONFIG = {
+    "enabled": os.getenv("LLM_CACHE_ENABLED", "true") == "true",
+    "path": DATA_DIR / "cache" / "llm_cache.db",
+    "ttl": 7 * 24 * 3600,  # 7天过期
+    "max_bytes": 50 * 1024 * 1024,  # 总大小上限50MB，超出按LRU淘汰
+    # 允许直接复用缓存结果的调用点（重跑、补数据、测试时可打开）
+    "reuse": {
+        "body_content": os.getenv("LLM_CACHE_REUSE_BODY", "false") == "true"
+    }
+}
+
+# 图片缓存（按 提示词+模型+尺寸 哈希），None表示不限制
+IMAGE_CACHE_CONFIG = {
+    "enabled": os.getenv("IMAGE_CACHE_ENABLED", "true") == "true",
+    "dir": DATA_DIR / "image_cache",
+    "policies": {
+        # 主图提示词固定不变，长期复用
+        "main_poster": {"max_reuse": None, "max_age": 30 * 24 * 3600},
+        # 问题卡片来自有限的题库模板，限制复用次数避免画面重复
+        "question_card": {"max_reuse": 3, "max_age": 14 * 24 * 3600},
+        # 背景图用于扩充图库，每次都需要新图
+        "card_background": {"max_reuse": 0, "max_age": None},
+        "default": {"max_reuse": 1, "max_age": 7 * 24 * 3600}
+    }
+}
 
 # ==================== 平台配置 ====================
 
@@ -119,6 +357,36 @@ PET_TOPIC_CATEGORIES = {
     ]
 }
 
+# 宠物词库：判断热点是否与宠物相关并归入上面的问题类别（可按需扩充）
+# 只有 "通用" 中的宠物/品种词表示话题与宠物相关；其余类别的词只在话题与宠物相关时决定问题类别，
+# 宠物专用词（如猫粮、猫砂）可以同时出现在 "通用" 和具体类别中
+# 不收单字（猫、狗、喵、汪），避免 "汪小菲"、"热狗" 这类误判
+PET_LEXICON = {
+    "通用": [
+        "猫咪", "狗狗", "小猫", "小狗", "猫猫", "狗子", "养猫", "养狗", "撸猫", "遛狗",
+        "流浪猫", "流浪狗", "喵星人", "汪星人", "猫奴", "狗奴", "宠物", "萌宠", "铲屎官", "毛孩子",
+        "猫粮", "猫砂", "橘猫", "布偶猫", "英短", "美短", "暹罗猫", "狸花猫", "金毛", "柯基",
+        "柴犬", "哈士奇", "泰迪犬", "边牧", "拉布拉多", "萨摩耶", "比熊", "博美", "法斗", "仓鼠"
+    ],
+    "基础知识": [
+        "猫粮", "狗粮", "罐头", "猫砂", "驱虫", "疫苗", "绝育", "体检", "掉毛", "换毛",
+        "洗澡", "护理", "营养", "挑食", "寿命", "猫瘟", "犬瘟", "细小", "宠物医院", "喂养", "领养"
+    ],
+    "行为解读": [
+        "摇尾巴", "呼噜", "踩奶", "拆家", "炸毛", "护食", "咬人", "抓沙发", "蹭人", "舔毛",
+        "翻肚皮", "露肚皮", "分离焦虑", "乱尿", "夜跑", "跑酷", "叫声", "撒娇"
+    ],
+    "趣味挑战": [
+        "表情包", "搞笑", "名场面", "整活", "变装", "挑战", "迷惑行为", "成精", "看电视", "做梦"
+    ]
+}
+
+# 含有宠物词但与宠物无关的词，命中时其中的宠物词不计入
+PET_LEXICON_EXCLUDE = [
+    "熊猫", "热狗", "狗仔", "猫眼", "猫腻", "狗血", "单身狗", "舔狗", "夜猫子", "猫头鹰",
+    "狗狗币", "猫步", "撒狗粮", "吃狗粮"
+]
+
 # 宠物图片风格配置
 PET_IMAGE_STYLES = {
     "main_poster": {
@@ -149,6 +417,15 @@ PUBLISH_SCHEDULE = {
     }
 }
 
+# 常驻生成进程（scripts/generator_daemon.py）
+DAEMON_CONFIG = {
+    "timezone": os.getenv("SCHEDULE_TIMEZONE", "Asia/Shanghai"),  # PUBLISH_SCHEDULE 的时区
+    "lead_minutes": int(os.getenv("GENERATE_LEAD_MINUTES", "60")),  # 提前多久生成内容
+    "misfire_grace_time": 1800,  # 触发延迟在此秒数内仍执行（多次错过只执行一次）
+    "catchup_hours": 6,  # 启动时补跑错过的生成：发布时间过去不超过N小时
+    "warm_up_seconds": 30  # 生成前多久预先建立到服务商的连接
+}
+
 # 内容配置
 CONTENT_CONFIG = {
     "posts_per_day": 2,
@@ -156,8 +433,16 @@ CONTENT_CONFIG = {
     "questions_per_post": 3,
     "min_words": 150,
     "max_words": 300,
+    "hot_topic_context": 5,  # 提供给正文生成的热点数量（超出提示词预算时从末尾裁掉）
     "image_size": "1024x1024",
     "image_quality": "standard",
+    "image_concurrency": 4,  # 同时进行的图片生成任务上限
+    "llm_concurrency": 4,  # 同时进行的LLM调用上限
+    "batch_post_concurrency": 4,  # 批量生成时同时处理的帖子数
+    # 文案生成方式：combined=一次调用同时生成正文和所有配图提示词；
+    # per_item=正文和每张配图提示词分别调用；template=配图直接使用提示词模板
+    "text_generation_mode": os.getenv("TEXT_GENERATION_MODE", "combined"),
+    "image_prompt_min_length": 40,  # 展开后的配图提示词短于此长度（或是拒绝回复）时使用模板
     "question_types": ["基础知识", "行为解读", "趣味挑战"],
     "hot_topic_days": 7,  # 热点追踪最近7天
     "random_pet_type": True  # 随机选择猫咪或狗狗
@@ -198,14 +483,57 @@ Design requirements:
 Please output just the image prompt in English.
 """
 
-# 🐱 正文生成提示词模板
+# 🐱 问题卡片背景图提示词（本地合成模式下用于补充背景图库）
+CARD_BACKGROUND_PROMPT = """
+Create a cute cartoon background for a pet quiz card on Xiaohongshu.
+
+Design requirements:
+- Style: Cute cartoon illustration, funny and playful
+- Content: Cartoon cats and dogs around the edges, paws, hearts, question-mark bubbles, playful stickers
+- Leave the center area clean and empty for text overlay
+- Color scheme: Light and playful (light pink, lavender, light cyan)
+- No text, no letters, no watermarks
+- Portrait orientation, 3:4
+"""
+
+# 🐱 正文生成说明（固定不变，放在系统消息中，便于服务商缓存提示词前缀）
+BODY_CONTENT_INSTRUCTIONS = """
+你的任务是为宠物测试类小红书笔记创作正文。
+
+正文要求：
+1. 开头：吸引眼球的引入（可以用emoji）
+2. 互动引导：邀请粉丝参与测试
+3. 结果分级：答对3个=优秀铲屎官，答对2个=合格铲屎官，答对1个=差劲铲屎官
+4. 行动号召：请在评论区留下你的答案
+5. 时效性：次日会揭晓答案
+6. 福利诱饵：随机抽取1-3名优秀铲屎官送出宠物试用装
+7. 号召：欢迎大家积极参与
+8. 字数：{min_words}-{max_words}字
+9. 风格：小红书风格，轻松活泼，适当使用emoji
+10. 语言：简体中文，使用中文标点
+
+请输出JSON格式：
+{{
+    "intro": "开头引入段落（2-3句话）",
+    "body": "正文主体，包含互动引导和分级说明",
+    "cta": "行动号召和福利说明",
+    "hashtags": ["标签1", "标签2", "标签3", "标签4", "标签5"]
+}}
+"""
+
+# 🐱 正文生成提示词模板（每篇变化的部分）
 BODY_CONTENT_PROMPT = """
-你是一位小红书爆款宠物内容专家。请为一篇宠物测试类笔记创作正文。
+请为一篇宠物测试类笔记创作正文。
 
 内容信息：
 - 宠物类型：{pet_type}
 - 问题数量：{question_count}个
 - 测试类型：{test_type}
+{hot_topic_context}"""
+
+# 🐱 合并生成说明（一次调用同时生成正文和配图提示词，固定不变的部分）
+COMBINED_CONTENT_INSTRUCTIONS = """
+你的任务是为宠物测试类小红书笔记同时创作正文和配图的图像生成提示词。
 
 正文要求：
 1. 开头：吸引眼球的引入（可以用emoji）
@@ -219,24 +547,109 @@ BODY_CONTENT_PROMPT = """
 9. 风格：小红书风格，轻松活泼，适当使用emoji
 10. 语言：简体中文，使用中文标点
 
+配图要求：根据每张图的设计说明，各写一段可直接用于图像生成模型的英文提示词（只写提示词本身）。
+
+【主图】
+{main_poster_brief}
+
+问题卡片的设计说明在每篇笔记的内容信息中给出，没有给出时question_card_prompts输出空数组。
+
 请输出JSON格式：
 {{
     "intro": "开头引入段落（2-3句话）",
     "body": "正文主体，包含互动引导和分级说明",
     "cta": "行动号召和福利说明",
-    "hashtags": ["标签1", "标签2", "标签3", "标签4", "标签5"]
+    "hashtags": ["标签1", "标签2", "标签3", "标签4", "标签5"],
+    "main_poster_prompt": "主图的英文提示词",
+    "question_card_prompts": ["按顺序排列的每张问题卡片的英文提示词"]
 }}
 """
 
+# 🐱 合并生成提示词模板（每篇变化的部分）
+COMBINED_CONTENT_PROMPT = """
+请为一篇宠物测试类笔记创作正文和配图提示词。
+
+内容信息：
+- 宠物类型：{pet_type}
+- 问题数量：{question_count}个
+- 测试类型：{test_type}
+- 问题卡片提示词数量：{question_card_count}个
+{hot_topic_context}{question_card_briefs}"""
+
+# 🐱 可选的热点上下文（提示词超出token预算时优先裁掉）
+HOT_TOPIC_CONTEXT = """
+可以自然结合的近期热点（不合适可以不用）：
+{topics}
+"""
+
+# 🐱 正文字段修复提示词（只补全缺失或不合格的字段）
+BODY_REPAIR_PROMPT = """
+下面是一篇{pet_type}测试类小红书笔记正文的JSON，其中部分字段缺失或不合格：
+{partial}
+
+请只补全以下字段，风格与已有内容保持一致（小红书风格，轻松活泼，适当使用emoji，简体中文）：
+{fields}
+
+只输出包含以上字段的JSON对象。
+"""
+
+# 问题卡片渲染配置
+CARD_RENDER_CONFIG = {
+    # local: 用Pillow把文字合成到缓存背景上；remote: 用AI生成整张卡片
+    "mode": os.getenv("CARD_RENDER_MODE", "local"),
+    "size": (1242, 1660),  # 小红书3:4竖图
+    "font_path": os.getenv("CARD_FONT_PATH", ""),  # 中文字体路径，留空则自动查找系统字体
+    "accent_color": "#FF6B6B",
+    "backgrounds_dir": DATA_DIR / "card_backgrounds",
+    "min_backgrounds": 5  # 背景图库少于该数量时，远程生成新背景补充
+}
+
 # ==================== 热点追踪配置 ====================
 
 HOT_TOPIC_CONFIG = {
     "enabled": True,
     "search_platforms": ["weibo", "douyin", "xiaohongshu"],
+    "fetch_enabled": os.getenv("HOT_TOPIC_FETCH_ENABLED", "true") == "true",  # 关闭时只使用模拟热点
+    # 各平台热榜地址和超时（秒），平台之间并发抓取，单个平台失败或超时不影响其他平台
+    "sources": {
+        "weibo": {
+            "url": "https://s.weibo.com/top/summary",
+            "timeout": 5,
+            "cookie": os.getenv("WEIBO_COOKIE", "")
+        },
+        "douyin": {
+            "url": "https://www.iesdouyin.com/web/api/v2/hotsearch/billboard/word/",
+            "timeout": 5
+        },
+        "xiaohongshu": {
+            "url": "https://edith.xiaohongshu.com/api/sns/v1/search/hot_list",
+            "timeout": 5,
+            "cookie": os.getenv("XIAOHONGSHU_COOKIE", "")
+        }
+    },
+    "max_topics_per_source": 30,
     "refresh_interval": 3600,  # 每小时刷新
+    # 热榜缓存（多个进程共享）：未过期直接使用；过期后先返回旧数据，由一个进程在后台刷新
+    "store_path": DATA_DIR / "cache" / "hot_topics.db",
+    "max_stale": 86400,  # 超过此秒数的旧数据不再使用，需要等待抓取
+    "refresh_lease": 30,  # 刷新租约（秒），期间其他进程不重复刷新
+    "retry_after_failure": 300,  # 刷新失败后多久再试
     "relevance_check": True,
     "pet_related_weight": 2.0,  # 宠物相关话题权重
-    "general_hot_weight": 1.0   # 一般热点权重
+    "general_hot_weight": 1.0,  # 一般热点权重
+    # 话题得分 = 热度 × 来源权重 × 宠物相关权重 × 时效衰减（每经过半衰期得分减半）
+    "source_weights": {
+        "weibo": 1.0,
+        "douyin": 1.0,
+        "xiaohongshu": 1.2,  # 与发布平台相同的热点更容易引起共鸣
+        "calendar": 0.9,
+        # 模拟热点（平台热榜不可用时的兜底）
+        "general": 0.8,
+        "pet": 0.8
+    },
+    "recency_half_life": 6 * 3600,  # 秒
+    "snapshot_size": 50,  # 快照中保留得分最高的话题数
+    "trend_ranking_size": 20  # 趋势统计中"上升最快话题"榜单的长度（统计窗口为 CONTENT_CONFIG["hot_topic_days"]）
 }
 
 # ==================== 发布配置 ====================
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📌 批量生成进度检查点
+记录批量生成中每篇帖子的状态，进程崩溃后重新运行同一批次时跳过已完成的帖子
+"""
+
+import sys
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DATA_DIR
+from storage import write_json_atomic
+
+
+class BatchCheckpoint:
+    """批量生成检查点（JSON文件，原子写入）"""
+
+    def __init__(self, batch_id: str, checkpoint_dir: Path = None):
+        self.checkpoint_dir = Path(checkpoint_dir or DATA_DIR / "checkpoints")
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.checkpoint_dir / f"batch_{batch_id}.json"
+
+        self.state: Dict = {"batch_id": batch_id, "created_at": datetime.now().isoformat(), "posts": {}}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    @staticmethod
+    def post_key(date_str: str, post_type: str) -> str:
+        """帖子在检查点中的键"""
+        return f"{date_str}_{post_type}"
+
+    def plan(self, date_str: str, post_type: str) -> Optional[Dict]:
+        """获取未完成帖子已保存的规划（宠物类型、热点、问题），没有则返回None"""
+        entry = self.state["posts"].get(self.post_key(date_str, post_type))
+        return entry.get("plan") if entry else None
+
+    def is_done(self, date_str: str, post_type: str) -> bool:
+        """帖子是否已完成且内容文件仍然存在"""
+        entry = self.state["posts"].get(self.post_key(date_str, post_type))
+        return bool(entry and entry["status"] == "done" and Path(entry.get("file", "")).exists())
+
+    def mark(self, date_str: str, post_type: str, status: str, **extra) -> None:
+        """更新帖子状态并立即落盘"""
+        self.state["posts"][self.post_key(date_str, post_type)] = {
+            "status": status,
+            "updated_at": datetime.now().isoformat(),
+            **extra
+        }
+        self.save()
+
+    def save(self) -> None:
+        """写入临时文件后原子替换，崩溃时不会留下损坏的检查点"""
+        write_json_atomic(self.path, self.state, ensure_ascii=False, indent=2)
+
+    def summary(self) -> Dict[str, int]:
+        """按状态统计帖子数量"""
+        counts: Dict[str, int] = {}
+        for entry in self.state["posts"].values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
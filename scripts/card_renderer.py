@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🃏 问题卡片本地渲染器
+用Pillow把问题文字和A/B选项合成到缓存的卡通背景图上
+纯CPU渲染，毫秒级完成，文字始终清晰可读
+"""
+
+import os
+import sys
+import random
+import uuid
+from pathlib import Path
+from typing import Optional, List, Dict
+
+from PIL import Image, ImageDraw, ImageFont
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CARD_RENDER_CONFIG, PET_IMAGE_STYLES
+from image_io import temp_path_for
+
+
+# 常见系统中文字体（按优先级）
+CJK_FONT_CANDIDATES = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "C:/Windows/Fonts/msyhbd.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf"
+]
+
+BACKGROUND_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+TEXT_COLOR = "#333333"
+
+
+class QuestionCardRenderer:
+    """问题卡片渲染器"""
+
+    def __init__(self):
+        self.config = CARD_RENDER_CONFIG
+        self.width, self.height = self.config["size"]
+        self.palette = PET_IMAGE_STYLES["question_card"]["colors"]
+        self.accent = self.config["accent_color"]
+
+        self.backgrounds_dir = Path(self.config["backgrounds_dir"])
+        self.backgrounds_dir.mkdir(parents=True, exist_ok=True)
+
+        # 没有中文字体时文字会渲染成方框，这样的卡片不能发布
+        self.font_path = self._find_font()
+        if not self.font_path:
+            raise FileNotFoundError("未找到中文字体（可通过CARD_FONT_PATH指定）")
+        self._fonts: Dict[int, ImageFont.FreeTypeFont] = {}
+
+    def _find_font(self) -> Optional[str]:
+        """查找可用的中文字体"""
+        candidates = [self.config["font_path"]] if self.config["font_path"] else []
+        candidates += CJK_FONT_CANDIDATES
+        for candidate in candidates:
+            if Path(candidate).exists():
+                return candidate
+        return None
+
+    def _font(self, size: int) -> ImageFont.FreeTypeFont:
+        """按字号获取字体（带缓存）"""
+        if size not in self._fonts:
+            self._fonts[size] = ImageFont.truetype(self.font_path, size)
+        return self._fonts[size]
+
+    def list_backgrounds(self) -> List[Path]:
+        """背景图库中的所有图片"""
+        return sorted(
+            p for p in self.backgrounds_dir.iterdir()
+            if p.suffix.lower() in BACKGROUND_SUFFIXES
+        )
+
+    def needs_background_refresh(self) -> bool:
+        """背景图库数量不足时需要远程生成新背景"""
+        return len(self.list_backgrounds()) < self.config["min_backgrounds"]
+
+    def new_background_path(self) -> Path:
+        """新背景图的保存路径"""
+        return self.backgrounds_dir / f"background_{uuid.uuid4().hex[:12]}.png"
+
+    def _background(self) -> Image.Image:
+        """随机选一张缓存背景并裁剪到卡片尺寸，图库为空时使用配色渐变"""
+        backgrounds = self.list_backgrounds()
+        if backgrounds:
+            background = random.choice(backgrounds)
+            try:
+                with Image.open(background) as source:
+                    return self._cover(source.convert("RGB"))
+            except OSError as e:
+                print(f"⚠️ 背景图无法读取，改用渐变背景: {background} ({e})")
+        return self._gradient(*random.sample(self.palette, 2))
+
+    def _cover(self, image: Image.Image) -> Image.Image:
+        """等比缩放并居中裁剪，铺满卡片"""
+        scale = max(self.width / image.width, self.height / image.height)
+        resized = image.resize(
+            (max(self.width, round(image.width * scale)), max(self.height, round(image.height * scale))),
+            Image.LANCZOS
+        )
+        left = (resized.width - self.width) // 2
+        top = (resized.height - self.height) // 2
+        return resized.crop((left, top, left + self.width, top + self.height))
+
+    def _gradient(self, top_color: str, bottom_color: str) -> Image.Image:
+        """生成竖向渐变背景"""
+        top = Image.new("RGB", (self.width, self.height), top_color)
+        bottom = Image.new("RGB", (self.width, self.height), bottom_color)
+        mask = Image.linear_gradient("L").resize((self.width, self.height))
+        return Image.composite(bottom, top, mask)
+
+    def _wrap(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+        """按像素宽度逐字换行（适用于中文）"""
+        lines, line = [], ""
+        for char in text:
+            if font.getlength(line + char) > max_width and line:
+                lines.append(line)
+                line = char.lstrip()
+            else:
+                line += char
+        if line:
+            lines.append(line)
+        return lines
+
+    def _draw_lines(self, draw: ImageDraw.ImageDraw, lines: List[str], font: ImageFont.FreeTypeFont,
+                    center_x: int, top: int, line_gap: int) -> int:
+        """居中绘制多行文字，返回结束时的y坐标"""
+        y = top
+        for line in lines:
+            left, upper, right, lower = draw.textbbox((0, 0), line, font=font)
+            draw.text((center_x - (right - left) / 2 - left, y - upper), line, font=font, fill=TEXT_COLOR)
+            y += (lower - upper) + line_gap
+        return y - line_gap
+
+    def _text_block_height(self, draw: ImageDraw.ImageDraw, lines: List[str],
+                           font: ImageFont.FreeTypeFont, line_gap: int) -> int:
+        """多行文字的总高度"""
+        heights = []
+        for line in lines:
+            _, upper, _, lower = draw.textbbox((0, 0), line, font=font)
+            heights.append(lower - upper)
+        return sum(heights) + line_gap * max(0, len(lines) - 1)
+
+    def render(self, question: Dict, question_num: int, output_path: Path) -> Path:
+        """渲染一张问题卡片并保存为PNG"""
+        card = self._background().convert("RGBA")
+        overlay = Image.new("RGBA", card.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+
+        margin = round(self.width * 0.07)
+        padding = round(self.width * 0.06)
+        panel = (margin, round(self.height * 0.14), self.width - margin, round(self.height * 0.88))
+        content_width = panel[2] - panel[0] - padding * 2
+        center_x = self.width // 2
+
+        # 半透明内容面板
+        draw.rounded_rectangle(panel, radius=48, fill=(255, 255, 255, 225), outline=self.accent, width=6)
+
+        # 题号标签
+        badge_font = self._font(round(self.width * 0.045))
+        badge_text = f"第{question_num}题 · {question.get('type', '宠物测试')}"
+        _, upper, right, lower = draw.textbbox((0, 0), badge_text, font=badge_font)
+        badge_w, badge_h = right + padding, (lower - upper) + padding // 2
+        badge = (center_x - badge_w // 2, panel[1] - badge_h // 2, center_x + badge_w // 2, panel[1] + badge_h // 2)
+        draw.rounded_rectangle(badge, radius=badge_h // 2, fill=self.accent)
+        draw.text((center_x, (badge[1] + badge[3]) / 2), badge_text, font=badge_font, fill="white", anchor="mm")
+
+        # 问题文字
+        question_font = self._font(round(self.width * 0.068))
+        question_lines = self._wrap(question["question"], question_font, content_width)
+        y = self._draw_lines(draw, question_lines, question_font, center_x, panel[1] + badge_h + padding, 24)
+
+        # A/B选项按钮
+        option_font = self._font(round(self.width * 0.05))
+        option_top = y + padding
+        for i, key in enumerate(["A", "B"]):
+            text = f"{key}. {question['options'][key]}"
+            lines = self._wrap(text, option_font, content_width - padding)
+            block_h = self._text_block_height(draw, lines, option_font, 16)
+            box = (panel[0] + padding, option_top, panel[2] - padding, option_top + block_h + padding)
+            draw.rounded_rectangle(box, radius=36, fill=self.palette[(i + 1) % len(self.palette)],
+                                   outline=self.accent, width=4)
+            self._draw_lines(draw, lines, option_font, center_x, option_top + padding // 2, 16)
+            option_top = box[3] + padding // 2
+
+        # 底部互动引导
+        footer_font = self._font(round(self.width * 0.04))
+        draw.text((center_x, panel[3] - padding), "评论区留下你的答案！", font=footer_font,
+                  fill=self.accent, anchor="ms")
+
+        card = Image.alpha_composite(card, overlay).convert("RGB")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先写临时文件再重命名，避免发布器读到未写完的图片
+        tmp_path = temp_path_for(output_path)
+        try:
+            card.save(tmp_path, "PNG")
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return output_path
+
+
+def main():
+    """主函数 - 渲染示例卡片"""
+    renderer = QuestionCardRenderer()
+    question = {
+        "type": "行为解读",
+        "question": "如果猫咪对你露出肚皮，说明什么？",
+        "options": {"A": "想让你摸", "B": "完全信任你"}
+    }
+    output = Path(CARD_RENDER_CONFIG["backgrounds_dir"]).parent / "card_preview.png"
+    renderer.render(question, 1, output)
+    print(f"✅ 示例卡片已保存到: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,6 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional
 from flask import Flask, request, jsonify
-import requests
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -23,6 +22,8 @@ from config import (
     VOLCANO_API_KEY, VOLCANO_API_SECRET, VOLCANO_MODEL, VOLCANO_API_BASE,
     WECHAT_APPID, WECHAT_APPSECRET, get_today_date
 )
+from publisher import find_content_images
+from http_client import get_client, timeout_for
 
 app = Flask(__name__)
 
@@ -48,8 +49,6 @@ class CloudPublisher:
         if not self.wechat_appid or not self.wechat_appsecret:
             return None
 
-        import requests
-        
         url = "https://api.weixin.qq.com/cgi-bin/token"
         params = {
             "grant_type": "client_credential",
@@ -58,7 +57,7 @@ class CloudPublisher:
         }
 
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = get_client(url).get(url, params=params, timeout=timeout_for("wechat_token"))
             data = response.json()
 
             if "access_token" in data:
@@ -117,8 +116,6 @@ class CloudPublisher:
         if not token:
             return {"status": "failed", "platform": "wechat", "error": "No access token"}
 
-        import requests
-
         # 上传封面图
         thumb_media_id = None
         if image_paths and len(image_paths) > 0:
@@ -128,7 +125,7 @@ class CloudPublisher:
                 
                 with open(image_paths[0], 'rb') as f:
                     files = {'media': f}
-                    response = requests.post(url, params=params, files=files, timeout=30)
+                    response = get_client(url).post(url, params=params, files=files, timeout=timeout_for("wechat"))
                     data = response.json()
                     
                 if "media_id" in data:
@@ -152,7 +149,7 @@ class CloudPublisher:
             params = {"access_token": token}
             payload = {"articles": [article]}
             
-            response = requests.post(url, params=params, json=payload, timeout=30)
+            response = get_client(url).post(url, params=params, json=payload, timeout=timeout_for("wechat"))
             data = response.json()
             
             if data.get("errcode") == 0:
@@ -182,14 +179,7 @@ class CloudPublisher:
         full_content = f"{intro}\n\n{main_body}\n\n{cta}"
         
         # 获取图片
-        image_paths = []
-        meta = content.get("meta", {})
-        date_str = meta.get("date", get_today_date())
-        images_dir = Path(__file__).parent / "content" / "xiaohongshu" / date_str
-        
-        if images_dir.exists():
-            for img in sorted(images_dir.glob("*.png")):
-                image_paths.append(str(img))
+        image_paths = find_content_images(content)
         
         # 并行发布到两个平台
         def publish_xhs():
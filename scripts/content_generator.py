@@ -6,27 +6,87 @@
 支持OpenAI和火山引擎API
 """
 
+import os
 import sys
 import json
 import random
-import requests
-from datetime import datetime
+import asyncio
+import hashlib
+import hmac
+import base64
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Awaitable, Callable, Iterator, Type
+
+import httpx
+from pydantic import BaseModel
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config import (
     AI_PROVIDER,
-    OPENAI_API_KEY, OPENAI_MODEL, OPENAI_API_BASE,
-    VOLCANO_API_KEY, VOLCANO_API_SECRET, VOLCANO_MODEL, VOLCANO_API_BASE,
-    IMAGE_API_KEY, IMAGE_API_BASE, IMAGE_MODEL,
-    CONTENT_CONFIG, PET_TOPIC_CATEGORIES, PET_IMAGE_STYLES,
-    MAIN_POSTER_PROMPT, QUESTION_CARD_PROMPT, BODY_CONTENT_PROMPT,
+    OPENAI_API_KEY, OPENAI_API_BASE,
+    VOLCANO_API_KEY, VOLCANO_API_SECRET, VOLCANO_API_BASE,
+    IMAGE_API_KEY, IMAGE_API_BASE, IMAGE_MODEL, IMAGE_RESPONSE_FORMAT,
+    VOLCANO_IMAGE_MODEL, VOLCANO_IMAGE_SIZE, VOLCANO_IMAGE_WATERMARK, VOLCANO_IMAGE_GROUPED,
+    CARD_RENDER_CONFIG,
+    PROJECT_ROOT, CONTENT_CONFIG, LLM_CACHE_CONFIG, IMAGE_CACHE_CONFIG, HEDGE_CONFIG, RATE_LIMIT_CONFIG,
+    STREAM_CONFIG, STRUCTURED_OUTPUT_CONFIG, CONTEXT_CACHE_CONFIG, BODY_REPAIR_PROMPT, PET_TOPIC_CATEGORIES, PET_IMAGE_STYLES,
+    MAIN_POSTER_PROMPT, QUESTION_CARD_PROMPT, BODY_CONTENT_PROMPT, CARD_BACKGROUND_PROMPT, COMBINED_CONTENT_PROMPT,
+    BODY_CONTENT_INSTRUCTIONS, COMBINED_CONTENT_INSTRUCTIONS, HOT_TOPIC_CONTEXT, TOKEN_BUDGET_CONFIG,
     get_today_date, save_json_file, get_content_path
 )
 from hot_topics import HotTopicTracker
+from http_client import get_async_client, aclose_clients, timeout_for
+from llm_cache import LLMCache
+from image_cache import ImageCache
+from card_renderer import QuestionCardRenderer
+from image_io import stream_download, stream_b64_images, write_b64_image, file_sha256
+from batch_checkpoint import BatchCheckpoint
+from latency_tracker import LatencyTracker
+from hedging import hedged, hedge_delay
+from resilience import retry_async, CircuitOpenError
+from rate_limiter import RateLimiter
+from stream_json import IncrementalJSONParser, MalformedOutputError, parse_partial
+from context_cache import ContextCache
+from model_router import ModelRouter
+from token_budget import count_messages, completion_tokens, fit_context, cap_max_tokens
+from schemas import BodyContent, PostContent, validate_partial, partial_model, field_descriptions, response_format_for
+
+# 大模型系统提示词
+SYSTEM_PROMPT = "你是一位小红书爆款内容专家，擅长创作高互动、高评论的宠物测试类内容。"
+
+# 正文JSON的字段
+BODY_FIELDS = tuple(BodyContent.model_fields)
+POST_FIELDS = tuple(PostContent.model_fields)
+
+# 配图提示词模板末尾的输出说明（展开提示词时保留，合并生成时去掉）
+PROMPT_OUTPUT_HINT = "Please output just the image prompt in English."
+
+# 展开提示词时模型拒绝或答非所问的开头（出现在回复开头时不作为提示词使用）
+PROMPT_REFUSAL_MARKERS = (
+    "sorry", "i'm sorry", "i am sorry", "i can't", "i cannot", "i can not", "i'm unable", "i am unable",
+    "unfortunately", "as an ai", "抱歉", "对不起", "很遗憾", "无法", "我不能"
+)
+
+
+@contextmanager
+def _timed(on_timing: Optional[Callable[[float], None]]) -> Iterator[None]:
+    """统计一次服务商请求的耗时（包括失败和超时），被取消的请求（如对冲落败）不计入"""
+    start = time.monotonic()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except BaseException:
+        if on_timing:
+            on_timing(time.monotonic() - start)
+        raise
+    if on_timing:
+        on_timing(time.monotonic() - start)
 
 
 class PetContentGenerator:
@@ -37,37 +97,343 @@ class PetContentGenerator:
         
         # OpenAI 配置
         self.openai_api_key = OPENAI_API_KEY
-        self.openai_model = OPENAI_MODEL
         self.openai_api_base = OPENAI_API_BASE
         
         # 火山引擎配置
         self.volcano_api_key = VOLCANO_API_KEY
         self.volcano_api_secret = VOLCANO_API_SECRET
-        self.volcano_model = VOLCANO_MODEL
         self.volcano_api_base = VOLCANO_API_BASE
         
         # 图片配置
         self.image_api_key = IMAGE_API_KEY
         self.image_api_base = IMAGE_API_BASE
         self.image_model = IMAGE_MODEL
+        self.image_cache = ImageCache() if IMAGE_CACHE_CONFIG["enabled"] else None
+        self.image_checksums: Dict[Path, str] = {}
+
+        # 全局并发上限（同一事件循环内的所有帖子共享）
+        self._slots_loop = None
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        # 正在远程生成的图片：(类型, 缓存提示词) -> (Future, 所属帖子)，同一事件循环内的帖子共享
+        self._image_inflight: Dict[tuple, tuple] = {}
+        self.card_renderer = None
+        if CARD_RENDER_CONFIG["mode"] == "local":
+            try:
+                self.card_renderer = QuestionCardRenderer()
+            except FileNotFoundError as e:
+                print(f"⚠️ {e}，问题卡片改为远程生成")
         
+        self.llm_cache = LLMCache() if LLM_CACHE_CONFIG["enabled"] else None
+
         self.hot_tracker = HotTopicTracker()
 
-    def _call_llm_api(self, prompt: str) -> Optional[str]:
-        """调用大语言模型API（自动选择OpenAI或火山引擎）"""
+        # 各服务商的调用耗时，决定对冲请求的等待时间
+        self.latency = LatencyTracker()
+
+        # 按生成任务选择模型等级，超出耗时目标时自动降级
+        self.router = ModelRouter(self.latency)
+
+        # 服务商配额（多个进程共享）
+        self.rate_limiter = RateLimiter() if RATE_LIMIT_CONFIG["enabled"] else None
+
+        # 火山方舟上下文缓存句柄（固定的系统提示词前缀只上传一次）
+        self.context_cache = ContextCache() if CONTEXT_CACHE_CONFIG["enabled"] else None
+
+    def _concurrency_slots(self, name: str) -> asyncio.Semaphore:
+        """获取当前事件循环的全局并发信号量（llm / image）"""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots_loop = loop
+            self._slots = {
+                "llm": asyncio.Semaphore(max(1, CONTENT_CONFIG["llm_concurrency"])),
+                "image": asyncio.Semaphore(max(1, CONTENT_CONFIG["image_concurrency"]))
+            }
+            self._image_inflight = {}
+        return self._slots[name]
+
+    def _volcano_headers(self) -> Dict:
+        """生成火山引擎认证请求头"""
+        timestamp = str(int(time.time()))
+        signature_payload = f"{timestamp}.{self.volcano_api_key}"
+        signature = base64.b64encode(
+            hmac.new(
+                self.volcano_api_secret.encode('utf-8'),
+                signature_payload.encode('utf-8'),
+                hashlib.sha256
+            ).digest()
+        ).decode('utf-8')
+
+        auth_token = f"HMAC-SHA256 Credential={self.volcano_api_key}, Signature={signature}, Timestamp={timestamp}"
+
+        return {
+            "Authorization": auth_token,
+            "Content-Type": "application/json"
+        }
+
+    async def _post_json(self, name: str, url: str, headers: Callable[[], Dict], payload: Dict,
+                         endpoint: str, on_timing: Callable[[float], None] = None,
+                         image_paths: List[Path] = None, breaker: str = None) -> Dict:
+        """
+        带限流、重试和熔断发送POST请求并返回JSON，name为服务名称（如 llm:volcano）
+        headers在每次尝试时重新生成（火山引擎签名带时间戳）
+        on_timing 接收每次请求本身的耗时（不含限流等待和重试间隔）
+        image_paths 用于b64_json格式的图片接口：响应边接收边解码写入这些路径（见 stream_b64_images）
+        breaker 为熔断器名称，默认与name相同（限流配额始终按name共享）
+        """
+        model = payload["model"]
+        estimated = self._estimate_tokens(name, payload)
+
+        async def send() -> Dict:
+            # 每次尝试（包括重试）都要占用配额
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(name, model, tokens=estimated)
+            with _timed(on_timing):
+                if image_paths:
+                    async with get_async_client(url).stream(
+                        "POST",
+                        url,
+                        headers=headers(),
+                        json=payload,
+                        timeout=timeout_for(endpoint)
+                    ) as response:
+                        response.raise_for_status()
+                        return await stream_b64_images(response, image_paths)
+
+                response = await get_async_client(url).post(
+                    url,
+                    headers=headers(),
+                    json=payload,
+                    timeout=timeout_for(endpoint)
+                )
+                response.raise_for_status()
+                return response.json()
+
+        result = await retry_async(send, breaker or name)
+
+        usage = result.get("usage") or {}
+        if self.rate_limiter and estimated and usage.get("total_tokens"):
+            self.rate_limiter.settle(name, model, estimated, usage["total_tokens"])
+        return result
+
+    @staticmethod
+    def _estimate_tokens(name: str, payload: Dict) -> int:
+        """预估对话请求的token数（提示词加上最大输出长度），非对话请求返回0"""
+        messages = payload.get("messages")
+        if not messages:
+            return 0
+        provider = name.split(":")[-1]
+        return count_messages(messages, provider, payload["model"]) + payload.get("max_tokens", 0)
+
+    async def _stream_chat(self, name: str, url: str, headers: Callable[[], Dict], payload: Dict,
+                           parser_factory: Callable[[], IncrementalJSONParser],
+                           on_timing: Callable[[float], None] = None) -> str:
+        """
+        流式调用对话接口（SSE），每段增量立即喂给解析器
+        解析器判定格式异常（包括输出结束时没有可解析的JSON、流式数据本身无法解析）时抛出MalformedOutputError并断开连接，
+        JSON对象闭合后不再等待剩余输出
+        """
+        model = payload["model"]
+        estimated = self._estimate_tokens(name, payload)
+        payload = dict(payload, stream=True, stream_options={"include_usage": True})
+        usage: Dict = {}
+
+        async def send() -> str:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(name, model, tokens=estimated)
+
+            parser = parser_factory()
+            with _timed(on_timing):
+                async with get_async_client(url).stream(
+                    "POST",
+                    url,
+                    headers=headers(),
+                    json=payload,
+                    timeout=timeout_for("llm")
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            raise MalformedOutputError(f"流式数据无法解析: {data[:50]}")
+                        if not isinstance(chunk, dict):
+                            raise MalformedOutputError(f"流式数据不是对象: {data[:50]}")
+                        usage.update(chunk.get("usage") or {})
+                        for choice in chunk.get("choices") or []:
+                            parser.feed((choice.get("delta") or {}).get("content") or "")
+                        if parser.complete:
+                            break
+            return parser.finish()
+
+        text = await retry_async(send, name)
+
+        if self.rate_limiter and usage.get("total_tokens"):
+            self.rate_limiter.settle(name, model, estimated, usage["total_tokens"])
+        return text
+
+    async def _chat(self, name: str, url: str, headers: Callable[[], Dict], payload: Dict,
+                    parser_factory: Callable[[], IncrementalJSONParser] = None,
+                    on_timing: Callable[[float], None] = None) -> str:
+        """
+        调用对话接口并返回模型输出的文本
+        提供parser_factory且开启流式输出时边接收边解析，格式异常时提前取消并重新生成
+        on_timing 接收每次请求本身的耗时（用于模型路由的耗时统计）
+        """
+        if not (parser_factory and STREAM_CONFIG["enabled"]):
+            result = await self._post_json(name, url, headers, payload, "llm", on_timing)
+            return result["choices"][0]["message"]["content"]
+
+        retries = STREAM_CONFIG["malformed_retries"]
+        for attempt in range(retries + 1):
+            try:
+                return await self._stream_chat(name, url, headers, payload, parser_factory, on_timing)
+            except MalformedOutputError as e:
+                print(f"⚠️ {name} 输出格式异常，已提前取消: {e}")
+                if attempt == retries:
+                    raise
+                print("🔄 重新生成...")
+
+    def _build_messages(self, prompt: str, instructions: str = None) -> List[Dict]:
+        """
+        构建对话消息
+        系统人设和固定的生成说明放在最前面的系统消息中，每次请求完全相同，
+        服务商可以缓存这段前缀；变化的部分只出现在最后的用户消息中
+        """
+        system = SYSTEM_PROMPT if not instructions else f"{SYSTEM_PROMPT}\n\n{instructions.strip()}"
+        return [
+            {
+                "role": "system",
+                "content": system
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _llm_providers(self, route: Dict) -> List[tuple]:
+        """按优先级返回可用的大模型服务：(名称, 路由等级对应的模型, 调用函数)"""
+        providers = []
+
         # 优先使用火山引擎
         if self.ai_provider == "volcano" and self.volcano_api_key:
-            return self._call_volcano_api(prompt)
-        
+            providers.append(("volcano", ModelRouter.model(route, "volcano"), self._call_volcano_api))
+
         # 备选OpenAI
         if self.openai_api_key:
-            return self._call_openai_api(prompt)
-        
-        print("❌ 错误: 未配置任何API密钥")
-        return None
+            providers.append(("openai", ModelRouter.model(route, "openai"), self._call_openai_api))
+
+        # 主服务商为OpenAI时，火山引擎作为对冲/回退的备用服务商
+        if self.ai_provider != "volcano" and self.volcano_api_key:
+            providers.append(("volcano", ModelRouter.model(route, "volcano"), self._call_volcano_api))
+
+        return providers
+
+    def _fit_prompt(self, task: str, render: Callable[[List], str], context: List,
+                    instructions: str = None) -> str:
+        """按任务的提示词token预算（用主服务商的计数方式）渲染提示词，超出时裁掉可选上下文"""
+        route = self.router.route(task)
+        providers = self._llm_providers(route)
+        if not providers or not TOKEN_BUDGET_CONFIG["enabled"]:
+            return render(context)
+
+        name, model, _ = providers[0]
+        prompt, _ = fit_context(
+            render, context, route["prompt_budget"],
+            lambda text: count_messages(self._build_messages(text, instructions), name, model)
+        )
+        return prompt
+
+    @staticmethod
+    def _hot_topic_context(topics: List[str]) -> str:
+        """可选的热点上下文，没有热点时为空"""
+        if not topics:
+            return ""
+        return HOT_TOPIC_CONTEXT.format(topics="\n".join(f"- {topic}" for topic in topics))
+
+    def _response_format(self, provider: str, schema: Optional[Type[BaseModel]]) -> Optional[Dict]:
+        """按服务商支持的结构化输出方式生成response_format，未启用时返回None"""
+        if not schema or not STRUCTURED_OUTPUT_CONFIG["enabled"]:
+            return None
+        return response_format_for(schema, STRUCTURED_OUTPUT_CONFIG["modes"].get(provider))
+
+    def _hedge_delay(self, kind: str, provider: str) -> Optional[float]:
+        """对冲等待时间，未开启对冲时返回None（只在失败后回退）"""
+        config = HEDGE_CONFIG[kind]
+        if not config["enabled"]:
+            return None
+        return hedge_delay(self.latency, f"{kind}:{provider}", config)
+
+    def _route_timing(self, route: Dict) -> Callable[[float], None]:
+        """把服务商请求本身的耗时记入模型路由（限流等待、重试间隔和排队时间不算服务商慢）"""
+        return lambda seconds: self.router.record(route, seconds)
+
+    async def _call_llm_api(self, prompt: str, task: str = "default", reuse: bool = False, max_tokens: int = None,
+                            is_valid: Callable[[Optional[str]], bool] = None,
+                            parser_factory: Callable[[], IncrementalJSONParser] = None,
+                            schema: Type[BaseModel] = None, instructions: str = None) -> Optional[str]:
+        """
+        调用大语言模型API（自动选择OpenAI或火山引擎）
+        task决定模型等级、max_tokens上限和temperature（见MODEL_ROUTES），max_tokens为预期输出长度
+        reuse=True 时允许直接返回缓存中相同请求的结果，否则总是请求服务商
+        主服务商超过对冲等待时间未返回时同时请求备用服务商，取先通过is_valid校验的结果
+        需要JSON结果时传入parser_factory（流式输出并增量解析）和schema（约束输出格式）
+        instructions为固定不变的生成说明，放入可缓存的系统消息前缀
+        """
+        route = self.router.route(task)
+        route["max_tokens"] = cap_max_tokens(route["max_tokens"], max_tokens)
+        providers = self._llm_providers(route)
+        if not providers:
+            print("❌ 错误: 未配置任何API密钥")
+            return None
 
-    def _call_openai_api(self, prompt: str) -> Optional[str]:
-        """调用OpenAI API生成内容"""
+        is_valid = is_valid or bool
+        messages = self._build_messages(prompt, instructions)
+        cache_keys = {
+            name: LLMCache.make_key(name, model, messages, route["temperature"])
+            for name, model, _ in providers
+        }
+        if reuse and self.llm_cache:
+            for name, model, _ in providers:
+                cached = self.llm_cache.get(cache_keys[name])
+                if cached is not None and is_valid(cached):
+                    print(f"⚡ 命中LLM缓存 ({model})")
+                    return cached
+
+        def attempt(name: str, model: str, call: Callable) -> Callable:
+            async def run() -> Optional[str]:
+                start = time.monotonic()
+                content = await call(prompt, model, route, parser_factory, schema, instructions)
+                if content:
+                    self.latency.record(f"llm:{name}", time.monotonic() - start)
+                return content
+            return run
+
+        # 一次逻辑调用占用一个并发名额，对冲出的备用请求不额外排队
+        async with self._concurrency_slots("llm"):
+            provider, content = await hedged(
+                [(name, attempt(name, model, call)) for name, model, call in providers],
+                self._hedge_delay("llm", providers[0][0]),
+                is_valid
+            )
+
+        if provider and self.llm_cache:
+            model = next(model for name, model, _ in providers if name == provider)
+            self.llm_cache.put(cache_keys[provider], provider, model, content)
+        return content
+
+    async def _call_openai_api(self, prompt: str, model: str, route: Dict,
+                               parser_factory: Callable[[], IncrementalJSONParser] = None,
+                               schema: Type[BaseModel] = None, instructions: str = None) -> Optional[str]:
+        """
+        调用OpenAI API生成内容（提供parser_factory时流式输出并增量解析）
+        OpenAI自动缓存相同的提示词前缀，固定说明放在消息最前面并附带prompt_cache_key
+        """
         if not self.openai_api_key:
             print("❌ 错误: 未配置OPENAI_API_KEY")
             return None
@@ -78,187 +444,314 @@ class PetContentGenerator:
         }
 
         payload = {
-            "model": self.openai_model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "你是一位小红书爆款内容专家，擅长创作高互动、高评论的宠物测试类内容。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.8,
-            "max_tokens": 2000
+            "model": model,
+            "messages": self._build_messages(prompt, instructions),
+            "temperature": route["temperature"],
+            "max_tokens": route["max_tokens"]
         }
+        if instructions and CONTEXT_CACHE_CONFIG["openai_prompt_cache_key"]:
+            payload["prompt_cache_key"] = ContextCache.make_key(model, payload["messages"][:1])[:32]
+        response_format = self._response_format("openai", schema)
+        if response_format:
+            payload["response_format"] = response_format
 
         try:
-            print(f"📡 调用OpenAI API ({self.openai_model})...")
-            response = requests.post(
-                f"{self.openai_api_base}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
+            print(f"📡 调用OpenAI API ({model})...")
+            url = f"{self.openai_api_base}/chat/completions"
+            content = await self._chat(
+                "llm:openai", url, lambda: headers, payload, parser_factory, self._route_timing(route)
             )
-            response.raise_for_status()
-
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
             print("✅ OpenAI API调用成功")
             return content
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, CircuitOpenError, MalformedOutputError) as e:
             print(f"❌ OpenAI API调用失败: {e}")
             return None
 
-    def _call_volcano_api(self, prompt: str) -> Optional[str]:
-        """调用火山引擎API（豆包大模型）"""
-        import hashlib
-        import hmac
-        import base64
-        import time
-        
+    async def _call_volcano_api(self, prompt: str, model: str, route: Dict,
+                                parser_factory: Callable[[], IncrementalJSONParser] = None,
+                                schema: Type[BaseModel] = None, instructions: str = None) -> Optional[str]:
+        """
+        调用火山引擎API（豆包大模型，提供parser_factory时流式输出并增量解析）
+        有固定说明且开启上下文缓存时，系统消息前缀只上传一次，之后只发送用户消息
+        """
         if not self.volcano_api_key or not self.volcano_api_secret:
             print("❌ 错误: 未配置火山引擎API密钥")
             return None
 
         try:
-            # 生成认证Token
-            timestamp = str(int(time.time()))
-            signature_payload = f"{timestamp}.{self.volcano_api_key}"
-            signature = base64.b64encode(
-                hmac.new(
-                    self.volcano_api_secret.encode('utf-8'),
-                    signature_payload.encode('utf-8'),
-                    hashlib.sha256
-                ).digest()
-            ).decode('utf-8')
-            
-            auth_token = f"HMAC-SHA256 Credential={self.volcano_api_key}, Signature={signature}, Timestamp={timestamp}"
-
-            headers = {
-                "Authorization": auth_token,
-                "Content-Type": "application/json"
-            }
-
             payload = {
-                "model": self.volcano_model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "你是一位小红书爆款内容专家，擅长创作高互动、高评论的宠物测试类内容。"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.8,
-                "max_tokens": 2000
+                "model": model,
+                "messages": self._build_messages(prompt, instructions),
+                "temperature": route["temperature"],
+                "max_tokens": route["max_tokens"]
             }
-
-            print(f"📡 调用火山引擎API (豆包 {self.volcano_model})...")
-            response = requests.post(
-                f"{self.volcano_api_base}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
+            response_format = self._response_format("volcano", schema)
+            if response_format:
+                payload["response_format"] = response_format
+
+            print(f"📡 调用火山引擎API (豆包 {model})...")
+            content = None
+            on_timing = self._route_timing(route)
+            if instructions and self.context_cache:
+                content = await self._chat_with_volcano_context(payload, parser_factory, on_timing)
+            if content is None:
+                url = f"{self.volcano_api_base}/chat/completions"
+                content = await self._chat(
+                    "llm:volcano", url, self._volcano_headers, payload, parser_factory, on_timing
+                )
             print("✅ 火山引擎API调用成功")
             return content
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, CircuitOpenError, MalformedOutputError) as e:
             print(f"❌ 火山引擎API调用失败: {e}")
             return None
 
-    def _call_image_api(self, prompt: str, output_path: Path) -> bool:
-        """调用图像生成API生成配图（支持OpenAI DALL-E和火山Seedream）"""
-        
+    async def _create_volcano_context(self, model: str, messages: List[Dict], ttl: int) -> Optional[str]:
+        """创建火山方舟上下文缓存（公共前缀模式），返回context_id，失败时返回None"""
+        payload = {"model": model, "messages": messages, "mode": "common_prefix", "ttl": ttl}
+        try:
+            url = f"{self.volcano_api_base}/context/create"
+            result = await self._post_json("llm:volcano", url, self._volcano_headers, payload, "llm")
+            return result.get("id")
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            print(f"⚠️ 创建上下文缓存失败，改用普通请求: {e}")
+            return None
+
+    async def _chat_with_volcano_context(self, payload: Dict,
+                                         parser_factory: Callable[[], IncrementalJSONParser] = None,
+                                         on_timing: Callable[[float], None] = None) -> Optional[str]:
+        """
+        通过上下文缓存调用火山引擎：系统消息前缀由context_id引用，只发送用户消息
+        没有可用的缓存句柄或句柄已失效时返回None，由调用方走普通请求
+        """
+        prefix, suffix = payload["messages"][:1], payload["messages"][1:]
+        context_id = await self.context_cache.get_or_create(
+            payload["model"], prefix, self._create_volcano_context
+        )
+        if not context_id:
+            return None
+
+        # 上下文缓存接口不支持response_format，输出格式由流式解析和字段修复保证
+        context_payload = {k: v for k, v in payload.items() if k not in ("messages", "response_format")}
+        context_payload.update(context_id=context_id, messages=suffix)
+
+        key = ContextCache.make_key(payload["model"], prefix)
+        try:
+            url = f"{self.volcano_api_base}/context/chat/completions"
+            content = await self._chat(
+                "llm:volcano", url, self._volcano_headers, context_payload, parser_factory, on_timing
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (400, 404):
+                raise
+            # 句柄已过期或被删除，下次重新创建
+            print(f"⚠️ 上下文缓存已失效，改用普通请求: {context_id}")
+            self.context_cache.invalidate(key)
+            return None
+
+        self.context_cache.touch(key, context_id)
+        return content
+
+    def _image_providers(self) -> List[tuple]:
+        """按优先级返回可用的图像服务：(名称, 模型, 尺寸, 调用函数)"""
+        providers = []
+
         # 优先使用火山引擎图像生成
         if self.ai_provider == "volcano" and self.volcano_api_key:
-            return self._call_volcano_image_api(prompt, output_path)
-        
+            providers.append(("volcano", VOLCANO_IMAGE_MODEL, VOLCANO_IMAGE_SIZE, self._call_volcano_image_api))
+
         # 备选OpenAI DALL-E
         if self.image_api_key:
-            return self._call_dalle_api(prompt, output_path)
-        
-        print("⚠️ 未配置图像生成API，跳过图片生成")
+            providers.append(("dalle", self.image_model, CONTENT_CONFIG["image_size"], self._call_dalle_api))
+
+        return providers
+
+    async def _restore_cached_image(self, prompt: str, output_path: Path, kind: str) -> bool:
+        """按 提示词+模型+尺寸 查询图片缓存，命中时复制到output_path"""
+        if not self.image_cache:
+            return False
+
+        policy = ImageCache.policy_for(kind)
+        for _, model, size, _ in self._image_providers():
+            key = ImageCache.make_key(prompt, model, size)
+            if await asyncio.to_thread(self.image_cache.restore, key, output_path, policy):
+                print(f"⚡ 命中图片缓存 ({model}): {output_path}")
+                return True
         return False
 
-    def _call_volcano_image_api(self, prompt: str, output_path: Path) -> bool:
-        """调用火山引擎Seedream API生成图片"""
-        import hashlib
-        import hmac
-        import base64
-        import time
-        
+    async def _store_cached_image(self, prompt: str, model: str, size: str, output_path: Path) -> None:
+        """把新生成的图片写入图片缓存"""
+        if self.image_cache:
+            key = ImageCache.make_key(prompt, model, size)
+            await asyncio.to_thread(self.image_cache.store, key, model, size, output_path)
+
+    async def _call_image_api(self, prompt: str, output_path: Path, kind: str = "default",
+                              cache_prompt: str = None) -> bool:
+        """
+        调用图像生成API生成配图（支持OpenAI DALL-E和火山Seedream）
+        调用前先按 提示词+模型+尺寸 查询图片缓存，kind决定缓存的复用策略
+        cache_prompt为缓存使用的提示词（默认与prompt相同）
+        """
+        cache_prompt = cache_prompt or prompt
+        providers = self._image_providers()
+        if not providers:
+            print("⚠️ 未配置图像生成API，跳过图片生成")
+            return False
+
+        if await self._restore_cached_image(cache_prompt, output_path, kind):
+            return True
+
+        # 每个服务商写入各自的临时文件，胜出者再原子重命名为output_path，
+        # 避免两个请求同时完成时互相覆盖
+        attempt_paths = {
+            name: output_path.with_name(f".{output_path.name}.{name}.hedge") for name, _, _, _ in providers
+        }
+
+        def attempt(name: str, call: Callable) -> Callable:
+            async def run() -> bool:
+                start = time.monotonic()
+                ok = await call(prompt, attempt_paths[name])
+                if ok:
+                    self.latency.record(f"image:{name}", time.monotonic() - start)
+                return ok
+            return run
+
         try:
-            # 生成认证Token
-            timestamp = str(int(time.time()))
-            signature_payload = f"{timestamp}.{self.volcano_api_key}"
-            signature = base64.b64encode(
-                hmac.new(
-                    self.volcano_api_secret.encode('utf-8'),
-                    signature_payload.encode('utf-8'),
-                    hashlib.sha256
-                ).digest()
-            ).decode('utf-8')
-            
-            auth_token = f"HMAC-SHA256 Credential={self.volcano_api_key}, Signature={signature}, Timestamp={timestamp}"
-
-            headers = {
-                "Authorization": auth_token,
-                "Content-Type": "application/json"
-            }
+            winner, _ = await hedged(
+                [(name, attempt(name, call)) for name, _, _, call in providers],
+                self._hedge_delay("image", providers[0][0])
+            )
+            if not winner:
+                return False
+
+            os.replace(attempt_paths[winner], output_path)
+            checksum = self.image_checksums.pop(attempt_paths[winner], None)
+            if checksum:
+                self.image_checksums[output_path] = checksum
+        finally:
+            for path in attempt_paths.values():
+                self.image_checksums.pop(path, None)
+                if path.exists():
+                    path.unlink()
+
+        _, model, size, _ = next(p for p in providers if p[0] == winner)
+        await self._store_cached_image(cache_prompt, model, size, output_path)
+        return True
+
+    @staticmethod
+    def _b64_image_paths(output_paths: List[Path]) -> Optional[List[Path]]:
+        """b64_json格式时图片在接收响应时直接写入这些路径，url格式时返回None（之后再流式下载）"""
+        return output_paths if IMAGE_RESPONSE_FORMAT == "b64_json" else None
+
+    async def _save_image(self, item: Dict, output_path: Path) -> None:
+        """
+        保存接口返回的单张图片（url流式下载或b64_json分块解码）
+        写入临时文件后原子重命名，并记录写入过程中计算的SHA-256
+        接收响应时已写入output_path的图片（带sha256）只记录校验和
+        """
+        if item.get("sha256"):
+            checksum = item["sha256"]
+        elif item.get("b64_json"):
+            checksum = await write_b64_image(item["b64_json"], output_path)
+        else:
+            print("📥 下载生成的图片...")
+            image_url = item["url"]
+            checksum = await retry_async(
+                lambda: stream_download(
+                    get_async_client(image_url), image_url, output_path, timeout_for("image_download")
+                ),
+                "image_download"
+            )
+        self.image_checksums[output_path] = checksum
 
+    async def _call_volcano_image_api(self, prompt: str, output_path: Path) -> bool:
+        """调用火山引擎Seedream API生成图片"""
+        try:
             # 火山引擎图像生成参数（根据你提供的API示例）
             payload = {
-                "model": "doubao-seedream-4-5-251128",
+                "model": VOLCANO_IMAGE_MODEL,
                 "prompt": prompt,
                 "sequential_image_generation": "disabled",
-                "response_format": "url",
-                "size": "2K",
+                "response_format": IMAGE_RESPONSE_FORMAT,
+                "size": VOLCANO_IMAGE_SIZE,
                 "stream": False,
-                "watermark": True
+                "watermark": VOLCANO_IMAGE_WATERMARK == "true"
             }
 
             print(f"🎨 调用火山引擎Seedream API生成图片...")
-            response = requests.post(
-                f"{self.volcano_api_base}/images/generations",
-                headers=headers,
-                json=payload,
-                timeout=180  # 图片生成可能需要更长时间
+            url = f"{self.volcano_api_base}/images/generations"
+            result = await self._post_json(
+                "image:volcano", url, self._volcano_headers, payload, "volcano_image",
+                image_paths=self._b64_image_paths([output_path])
             )
-            response.raise_for_status()
-
-            result = response.json()
-            image_url = result["data"][0]["url"]
-
-            # 下载图片
-            print("📥 下载生成的图片...")
-            image_response = requests.get(image_url, timeout=60)
-            image_response.raise_for_status()
-
-            with open(output_path, 'wb') as f:
-                f.write(image_response.content)
+            await self._save_image(result["data"][0], output_path)
 
             print(f"✅ 火山引擎图片已保存到: {output_path}")
             return True
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, CircuitOpenError) as e:
             print(f"❌ 火山引擎图片生成失败: {e}")
-            # 尝试回退到OpenAI
-            print("🔄 回退尝试OpenAI DALL-E...")
-            if self.image_api_key:
-                return self._call_dalle_api(prompt, output_path)
             return False
 
-    def _call_dalle_api(self, prompt: str, output_path: Path) -> bool:
+    @staticmethod
+    def _group_prompt(prompts: List[str]) -> str:
+        """把多张图片的提示词合并为一次组图请求"""
+        sections = [
+            f"Generate a set of {len(prompts)} images in this exact order. "
+            "All images must share one consistent visual style, color palette and character design."
+        ]
+        for i, prompt in enumerate(prompts, 1):
+            sections.append(f"Image {i}:\n{prompt.strip()}")
+        return "\n\n".join(sections)
+
+    async def _call_volcano_image_group(self, prompts: List[str], output_paths: List[Path]) -> List[bool]:
+        """
+        调用火山引擎Seedream组图生成（sequential_image_generation）
+        一次请求返回整组风格统一的图片，返回每张图片是否保存成功
+        """
+        try:
+            payload = {
+                "model": VOLCANO_IMAGE_MODEL,
+                "prompt": self._group_prompt(prompts),
+                "sequential_image_generation": "auto",
+                "sequential_image_generation_options": {"max_images": len(prompts)},
+                "response_format": IMAGE_RESPONSE_FORMAT,
+                "size": VOLCANO_IMAGE_SIZE,
+                "stream": False,
+                "watermark": VOLCANO_IMAGE_WATERMARK == "true"
+            }
+
+            print(f"🎨 调用火山引擎Seedream组图生成 ({len(prompts)}张)...")
+            url = f"{self.volcano_api_base}/images/generations"
+            result = await self._post_json(
+                "image:volcano", url, self._volcano_headers, payload, "volcano_image_group",
+                image_paths=self._b64_image_paths(output_paths),
+                # 组图失败后还要逐张回退，不能因组图请求的失败熔断单张生成
+                breaker="image:volcano_group"
+            )
+            data = result.get("data", [])
+
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            print(f"❌ 火山引擎组图生成失败: {e}")
+            return [False] * len(prompts)
+
+        async def save(index: int, output_path: Path) -> bool:
+            item = data[index] if index < len(data) else None
+            if not item or not (item.get("url") or item.get("b64_json") or item.get("sha256")):
+                return False
+            try:
+                await self._save_image(item, output_path)
+                return True
+            except (httpx.HTTPError, CircuitOpenError) as e:
+                print(f"❌ 组图第{index + 1}张下载失败: {e}")
+                return False
+
+        results = await asyncio.gather(*(save(i, path) for i, path in enumerate(output_paths)))
+        print(f"✅ 火山引擎组图返回 {sum(results)}/{len(prompts)} 张")
+        return list(results)
+
+    async def _call_dalle_api(self, prompt: str, output_path: Path) -> bool:
         """调用OpenAI DALL-E API生成图片"""
         if not self.image_api_key:
             print("⚠️ 未配置DALL-E API密钥")
@@ -274,41 +767,30 @@ class PetContentGenerator:
             "prompt": prompt,
             "n": 1,
             "size": CONTENT_CONFIG["image_size"],
-            "quality": CONTENT_CONFIG["image_quality"]
+            "quality": CONTENT_CONFIG["image_quality"],
+            "response_format": IMAGE_RESPONSE_FORMAT
         }
 
         try:
             print(f"🎨 调用OpenAI DALL-E API ({self.image_model})...")
-            response = requests.post(
-                f"{self.image_api_base}/images/generations",
-                headers=headers,
-                json=payload,
-                timeout=120
+            url = f"{self.image_api_base}/images/generations"
+            result = await self._post_json(
+                "image:dalle", url, lambda: headers, payload, "dalle_image",
+                image_paths=self._b64_image_paths([output_path])
             )
-            response.raise_for_status()
-
-            result = response.json()
-            image_url = result["data"][0]["url"]
-
-            # 下载图片
-            print("📥 下载生成的图片...")
-            image_response = requests.get(image_url, timeout=60)
-            image_response.raise_for_status()
-
-            with open(output_path, 'wb') as f:
-                f.write(image_response.content)
+            await self._save_image(result["data"][0], output_path)
 
             print(f"✅ DALL-E图片已保存到: {output_path}")
             return True
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, CircuitOpenError) as e:
             print(f"❌ DALL-E图片生成失败: {e}")
             return False
 
-    def generate_questions(self, pet_type: str = "猫咪") -> List[Dict]:
+    def generate_questions(self, pet_type: str = "猫咪", post_type: str = "morning", date_str: str = None) -> List[Dict]:
         """生成3个宠物问题"""
         # 从热点追踪器获取问题
-        topic_data = self.hot_tracker.get_today_topics("morning")
+        topic_data = self.hot_tracker.get_today_topics(post_type, date_str)
         questions = topic_data.get("questions", [])
 
         # 如果问题不足，从预设库补充
@@ -369,35 +851,240 @@ class PetContentGenerator:
 
         return questions[:3]
 
-    def generate_body_content(self, pet_type: str, questions: List[Dict]) -> Dict:
-        """生成正文内容"""
-        prompt = BODY_CONTENT_PROMPT.format(
+    async def generate_body_content(self, pet_type: str, questions: List[Dict], reuse: bool = False,
+                                    hot_topics: List[str] = None) -> Dict:
+        """生成正文内容（reuse=True 时允许复用LLM缓存，hot_topics为可选的热点上下文）"""
+        instructions = BODY_CONTENT_INSTRUCTIONS.format(
+            min_words=CONTENT_CONFIG["min_words"],
+            max_words=CONTENT_CONFIG["max_words"]
+        )
+        prompt = self._fit_prompt("body_content", lambda topics: BODY_CONTENT_PROMPT.format(
             pet_type=pet_type,
             question_count=len(questions),
             test_type="宠物知识测试",
-            min_words=CONTENT_CONFIG["min_words"],
-            max_words=CONTENT_CONFIG["max_words"]
+            hot_topic_context=self._hot_topic_context(topics)
+        ), hot_topics or [], instructions)
+
+        response = await self._call_llm_api(
+            prompt,
+            task="body_content",
+            reuse=reuse or LLM_CACHE_CONFIG["reuse"]["body_content"],
+            max_tokens=completion_tokens(
+                words=CONTENT_CONFIG["max_words"], fields=len(BODY_FIELDS), hashtags=True
+            ),
+            is_valid=lambda text: bool(self._parse_json_fields(text)),
+            parser_factory=lambda: IncrementalJSONParser(BODY_FIELDS),
+            schema=BodyContent,
+            instructions=instructions
         )
 
-        response = self._call_llm_api(prompt)
+        return await self._finalize_body(pet_type, questions, self._parse_json_fields(response))
 
-        if not response:
+    async def _finalize_body(self, pet_type: str, questions: List[Dict], data: Dict) -> Dict:
+        """校验模型输出的正文字段，补全缺失或不合格的字段，仍不合格的使用默认模板"""
+        data = {k: v for k, v in data.items() if k in BODY_FIELDS}
+        if not data:
             # 使用默认模板
             return self._default_body_content(pet_type, questions)
 
+        content, valid, invalid = validate_partial(BodyContent, data)
+        if content:
+            return content.model_dump()
+
+        # 只补全缺失或不合格的字段，合格的字段保留
+        print(f"⚠️ 正文字段缺失或不合格: {', '.join(invalid)}")
+        if valid and STRUCTURED_OUTPUT_CONFIG["repair"]:
+            valid.update(await self._repair_body_fields(pet_type, valid, invalid))
+            content, valid, invalid = validate_partial(BodyContent, valid)
+            if content:
+                print("✅ 正文字段已补全")
+                return content.model_dump()
+
+        # 仍然不合格的字段使用默认模板
+        default = self._default_body_content(pet_type, questions)
+        return BodyContent.model_validate({**default, **valid}).model_dump()
+
+    async def _repair_body_fields(self, pet_type: str, valid: Dict, invalid: List[str]) -> Dict:
+        """请求模型只生成缺失或不合格的正文字段"""
+        print(f"🔧 补全正文字段: {', '.join(invalid)}")
+        prompt = BODY_REPAIR_PROMPT.format(
+            pet_type=pet_type,
+            partial=json.dumps(valid, ensure_ascii=False, indent=2),
+            fields=field_descriptions(BodyContent, invalid)
+        )
+        response = await self._call_llm_api(
+            prompt,
+            task="body_repair",
+            max_tokens=completion_tokens(
+                words=CONTENT_CONFIG["max_words"] if set(invalid) & {"intro", "body", "cta"} else 0,
+                fields=len(invalid),
+                hashtags="hashtags" in invalid
+            ),
+            is_valid=lambda text: bool(self._parse_json_fields(text)),
+            parser_factory=lambda: IncrementalJSONParser(invalid),
+            schema=partial_model(BodyContent, invalid)
+        )
+        repaired = self._parse_json_fields(response)
+        return {k: v for k, v in repaired.items() if k in invalid}
+
+    @staticmethod
+    def _parse_json_response(response: Optional[str]) -> Optional[Dict]:
+        """解析模型返回的JSON（兼容前后带说明文字的情况），无法解析时返回None"""
+        if not response:
+            return None
+
         try:
             # 尝试解析JSON
-            content_data = json.loads(response)
-            return content_data
+            data = json.loads(response)
         except json.JSONDecodeError:
             # 尝试提取JSON
             start = response.find('{')
             end = response.rfind('}') + 1
-            if start != -1 and end != 0:
-                content_data = json.loads(response[start:end])
-                return content_data
-
-            return self._default_body_content(pet_type, questions)
+            if start == -1 or end == 0:
+                return None
+            try:
+                data = json.loads(response[start:end])
+            except json.JSONDecodeError:
+                return None
+
+        return data if isinstance(data, dict) else None
+
+    @classmethod
+    def _parse_json_fields(cls, response: Optional[str]) -> Dict:
+        """解析模型输出的JSON对象，输出被截断或部分格式有误时取出已完整的字段"""
+        if not response:
+            return {}
+        data = cls._parse_json_response(response)
+        return data if data is not None else parse_partial(response)
+
+    async def generate_text_content(self, pet_type: str, questions: List[Dict], image_prompts: Dict,
+                                    reuse: bool = False, hot_topics: List[str] = None,
+                                    on_prompts: Callable[[Dict], None] = None) -> tuple:
+        """
+        生成正文和配图提示词，返回 (正文, 展开后的配图提示词)，hot_topics为可选的热点上下文
+        按 CONTENT_CONFIG["text_generation_mode"]：
+        - combined：一次结构化调用同时返回正文、主图提示词和每张问题卡片提示词，缺失的部分再逐项补齐
+        - per_item：正文和每张配图提示词分别调用（并发）
+        本地渲染的问题卡片不需要提示词，不参与展开
+        on_prompts 在配图提示词全部就绪时立即调用，不等待正文校验和补全，远程图片可以提前开始生成
+        """
+        cards = [] if self.card_renderer else image_prompts["question_cards"]
+
+        async def expand(main_prompt: Awaitable[str], card_prompts: List[Awaitable[str]]) -> Dict:
+            main_prompt, card_prompts = await asyncio.gather(main_prompt, asyncio.gather(*card_prompts))
+            expanded = self._with_expanded_prompts(image_prompts, main_prompt, list(card_prompts))
+            if on_prompts:
+                on_prompts(expanded)
+            return expanded
+
+        if CONTENT_CONFIG["text_generation_mode"] != "combined":
+            return tuple(await asyncio.gather(
+                self.generate_body_content(pet_type, questions, reuse=reuse, hot_topics=hot_topics),
+                expand(
+                    self.expand_image_prompt(image_prompts["main_poster"]),
+                    [self.expand_image_prompt(card["prompt"]) for card in cards]
+                )
+            ))
+
+        # 主图设计说明固定不变，和正文要求一起放入可缓存的前缀
+        instructions = COMBINED_CONTENT_INSTRUCTIONS.format(
+            min_words=CONTENT_CONFIG["min_words"],
+            max_words=CONTENT_CONFIG["max_words"],
+            main_poster_brief=self._image_brief(image_prompts["main_poster"])
+        )
+        prompt = self._fit_prompt("combined_content", lambda topics: COMBINED_CONTENT_PROMPT.format(
+            pet_type=pet_type,
+            question_count=len(questions),
+            test_type="宠物知识测试",
+            question_card_count=len(cards),
+            hot_topic_context=self._hot_topic_context(topics),
+            question_card_briefs="".join(
+                f"\n【问题卡片{card['question_num']}】\n{self._image_brief(card['prompt'])}\n" for card in cards
+            )
+        ), hot_topics or [], instructions)
+
+        print("📝 合并生成正文和配图提示词...")
+        response = await self._call_llm_api(
+            prompt,
+            task="combined_content",
+            reuse=reuse or LLM_CACHE_CONFIG["reuse"]["body_content"],
+            max_tokens=completion_tokens(
+                words=CONTENT_CONFIG["max_words"], fields=len(POST_FIELDS), hashtags=True,
+                image_prompts=1 + len(cards)
+            ),
+            is_valid=lambda text: bool(self._parse_json_fields(text)),
+            parser_factory=lambda: IncrementalJSONParser(POST_FIELDS),
+            schema=PostContent,
+            instructions=instructions
+        )
+        data = self._parse_json_fields(response)
+
+        # 合并结果中缺失或不合格的部分逐项补齐
+        main_prompt = self._usable_image_prompt(data.get("main_poster_prompt"))
+        card_prompts = data.get("question_card_prompts")
+        card_prompts = card_prompts if isinstance(card_prompts, list) else []
+        card_prompts = [self._usable_image_prompt(p) for p in card_prompts[:len(cards)]]
+        card_prompts += [""] * (len(cards) - len(card_prompts))
+
+        missing = (0 if main_prompt else 1) + card_prompts.count("")
+        if missing:
+            print(f"🔄 合并生成缺少 {missing} 个配图提示词，逐项补齐...")
+
+        async def fill_main() -> str:
+            return main_prompt or await self.expand_image_prompt(image_prompts["main_poster"])
+
+        async def fill_card(card: Dict, current: str) -> str:
+            return current or await self.expand_image_prompt(card["prompt"])
+
+        return tuple(await asyncio.gather(
+            self._finalize_body(pet_type, questions, data),
+            expand(fill_main(), [fill_card(card, current) for card, current in zip(cards, card_prompts)])
+        ))
+
+    @staticmethod
+    def _image_brief(template: str) -> str:
+        """配图提示词模板去掉末尾的输出说明，作为合并生成时的设计说明"""
+        return template.replace(PROMPT_OUTPUT_HINT, "").strip()
+
+    async def expand_image_prompt(self, template: str) -> str:
+        """单独调用大模型把配图提示词模板展开为英文图像提示词，失败时直接使用模板"""
+        response = await self._call_llm_api(
+            template, task="image_prompt", max_tokens=completion_tokens(image_prompts=1)
+        )
+        prompt = self._usable_image_prompt(response)
+        if response and not prompt:
+            print(f"⚠️ 展开的配图提示词不可用，使用模板: {response.strip()[:40]}")
+        return prompt or template
+
+    @staticmethod
+    def _usable_image_prompt(text) -> str:
+        """模型给出的图像提示词，过短或是拒绝回复时返回空字符串"""
+        text = text.strip() if isinstance(text, str) else ""
+        if len(text) < CONTENT_CONFIG["image_prompt_min_length"]:
+            return ""
+        if text.lower().startswith(PROMPT_REFUSAL_MARKERS):
+            return ""
+        return text
+
+    @staticmethod
+    def _with_expanded_prompts(image_prompts: Dict, main_prompt: str, card_prompts: List[str]) -> Dict:
+        """
+        用展开后的提示词替换模板，模板保留在 *_template 中
+        图片缓存按模板（逻辑提示词）命中，同一模板不同展开结果可以复用同一张图
+        """
+        expanded = {
+            "main_poster": main_prompt,
+            "main_poster_template": image_prompts["main_poster"],
+            "question_cards": []
+        }
+        card_prompts = iter(card_prompts)
+        for card in image_prompts["question_cards"]:
+            entry = dict(card)
+            prompt = next(card_prompts, None)
+            if prompt:
+                entry.update(prompt=prompt, template=card["prompt"])
+            expanded["question_cards"].append(entry)
+        return expanded
 
     def _default_body_content(self, pet_type: str, questions: List[Dict]) -> Dict:
         """默认正文内容"""
@@ -460,46 +1147,334 @@ class PetContentGenerator:
 
         return prompts
 
-    def generate_complete_post(self, post_type: str = "morning") -> Dict:
+    @staticmethod
+    def image_filename(post_type: str, date_str: str, index: int) -> str:
+        """图片文件名：按发布顺序编号，1为主图，之后依次为问题卡片"""
+        return f"post_{post_type}_{date_str}_{index:02d}.png"
+
+    async def generate_images(self, image_prompts: Dict, questions: List[Dict],
+                              content_dir: Path, post_type: str, date_str: str,
+                              expand: Callable[[], Awaitable[Dict]] = None) -> Dict[Path, str]:
+        """
+        并发生成主图和所有问题卡片，返回成功保存的 图片路径→SHA-256（按发布顺序）
+        本地渲染模式下问题卡片由Pillow合成，远程生成只用于主图和补充背景图库
+        同时进行的远程任务数受 CONTENT_CONFIG["image_concurrency"] 限制（同一事件循环内全局共享）
+        expand 返回展开后的配图提示词：此时 image_prompts 为模板，本地渲染和缓存恢复立即开始，
+        只有需要远程生成的图片才等待提示词展开完成
+        """
+        # cache_prompt为提示词模板：展开后的提示词每次不同，图片缓存按模板命中
+        jobs = [{
+            "kind": "main_poster",
+            "prompt": image_prompts["main_poster"],
+            "cache_prompt": image_prompts.get("main_poster_template", image_prompts["main_poster"])
+        }]
+        for card in image_prompts["question_cards"]:
+            jobs.append({
+                "kind": "question_card",
+                "prompt": card["prompt"],
+                "cache_prompt": card.get("template", card["prompt"]),
+                "question_num": card["question_num"]
+            })
+        jobs = jobs[:CONTENT_CONFIG["images_per_post"]]
+
+        for i, job in enumerate(jobs, 1):
+            job["path"] = content_dir / self.image_filename(post_type, date_str, i)
+
+        is_local = lambda job: job["kind"] == "question_card" and self.card_renderer is not None
+        local_jobs = [job for job in jobs if is_local(job)]
+        remote_jobs = [job for job in jobs if not is_local(job)]
+
+        slots = self._concurrency_slots("image")
+
+        # 并发的帖子（批量生成）需要同一张图片时只生成一次，其余帖子等待后从图片缓存恢复
+        inflight = self._image_inflight
+        owner = object()
+        claimed: List[tuple] = []
+
+        def claim(job: Dict) -> None:
+            key = (job["kind"], job["cache_prompt"])
+            inflight[key] = (asyncio.get_running_loop().create_future(), owner)
+            claimed.append(key)
+
+        # 背景图库不足时顺带远程生成一张新背景，供之后的卡片使用（其他帖子正在补充时不重复生成）
+        background_key = ("card_background", CARD_BACKGROUND_PROMPT)
+        if self.card_renderer and self.card_renderer.needs_background_refresh() and background_key not in inflight:
+            print("🖼️ 卡片背景图库不足，远程补充背景...")
+            remote_jobs.append({
+                "kind": "card_background",
+                "prompt": CARD_BACKGROUND_PROMPT,
+                "cache_prompt": CARD_BACKGROUND_PROMPT,
+                "path": self.card_renderer.new_background_path()
+            })
+            claim(remote_jobs[-1])
+
+        async def render_remote(job: Dict) -> None:
+            async with slots:
+                job["ok"] = await self._call_image_api(job["prompt"], job["path"], job["kind"], job["cache_prompt"])
+
+        async def render_local(job: Dict) -> None:
+            question = questions[job["question_num"] - 1]
+            await asyncio.to_thread(self.card_renderer.render, question, job["question_num"], job["path"])
+            print(f"✅ 问题卡片已本地渲染: {job['path']}")
+            job["ok"] = True
+
+        async def restore(job: Dict) -> bool:
+            """从图片缓存恢复，其他帖子正在生成同一张图片时等它完成后再查缓存；返回是否需要远程生成"""
+            key = (job["kind"], job["cache_prompt"])
+            while True:
+                job["ok"] = await self._restore_cached_image(job["cache_prompt"], job["path"], job["kind"])
+                if job["ok"]:
+                    return False
+                current = inflight.get(key)
+                if current is None:
+                    claim(job)
+                    return True
+                if current[1] is owner:
+                    return True
+                print(f"⏳ 其他帖子正在生成相同的图片，等待后复用: {job['path'].name}")
+                await asyncio.shield(current[0])
+
+        async def render_remote_jobs() -> None:
+            needs_remote = await asyncio.gather(*(restore(job) for job in remote_jobs))
+            pending = [job for job, needed in zip(remote_jobs, needs_remote) if needed]
+
+            if pending and expand is not None:
+                expanded = await expand()
+                cards = {card["question_num"]: card["prompt"] for card in expanded["question_cards"]}
+                for job in pending:
+                    if job["kind"] == "main_poster":
+                        job["prompt"] = expanded["main_poster"]
+                    elif job["kind"] == "question_card":
+                        job["prompt"] = cards.get(job["question_num"], job["prompt"])
+
+            # 组图模式：未命中缓存的图片合并为一次Seedream请求，未返回的再逐张补齐
+            if self._use_image_group(pending):
+                async with slots:
+                    results = await self._call_volcano_image_group(
+                        [job["prompt"] for job in pending], [job["path"] for job in pending]
+                    )
+                for job, ok in zip(pending, results):
+                    if ok:
+                        job["ok"] = True
+                        await self._store_cached_image(
+                            job["cache_prompt"], VOLCANO_IMAGE_MODEL, VOLCANO_IMAGE_SIZE, job["path"]
+                        )
+                pending = [job for job in pending if not job["ok"]]
+                if pending:
+                    print(f"🔄 组图未完整返回，逐张补齐 {len(pending)} 张...")
+
+            await asyncio.gather(*(render_remote(job) for job in pending))
+
+        try:
+            await asyncio.gather(render_remote_jobs(), *(render_local(job) for job in local_jobs))
+        finally:
+            # 无论成功与否都唤醒等待的帖子（失败时它们会自己生成）
+            for key in claimed:
+                future, _ = inflight.pop(key)
+                future.set_result(None)
+
+        # 下载的图片在写入时已算好校验和，缓存命中和本地渲染的图片在这里补算
+        images = {}
+        for job in jobs:
+            checksum = self.image_checksums.pop(job["path"], None)
+            if job.get("ok"):
+                images[job["path"]] = checksum or await asyncio.to_thread(file_sha256, job["path"])
+
+        # 背景图不属于帖子，丢弃其校验和记录
+        for job in remote_jobs:
+            self.image_checksums.pop(job["path"], None)
+
+        return images
+
+    def _use_image_group(self, jobs: List[Dict]) -> bool:
+        """是否使用Seedream组图模式（需要火山引擎且至少两张图片）"""
+        providers = self._image_providers()
+        return (
+            VOLCANO_IMAGE_GROUPED == "true"
+            and len(jobs) > 1
+            and bool(providers)
+            and providers[0][0] == "volcano"
+        )
+
+    def generate_complete_post(self, post_type: str = "morning", date_str: str = None) -> Dict:
         """生成完整的帖子内容"""
+        return self.generate_posts([post_type], date_str)[0]
+
+    def generate_posts(self, post_types: List[str], date_str: str = None) -> List[Dict]:
+        """在同一个事件循环中依次生成多篇帖子，共享HTTP连接池"""
+        async def run() -> List[Dict]:
+            return [await self.generate_complete_post_async(t, date_str) for t in post_types]
+
+        return asyncio.run(self._run_and_close(run()))
+
+    def generate_batch(self, dates: List[str], post_types: List[str], resume: bool = True) -> Dict[str, int]:
+        """批量生成多天的帖子（同步入口）"""
+        return asyncio.run(self._run_and_close(self.generate_batch_async(dates, post_types, resume)))
+
+    async def _run_and_close(self, coro):
+        """
+        运行协程，结束后等待热榜的后台刷新完成，再关闭当前事件循环中的HTTP连接池
+        （否则命中缓存、很快结束的运行会取消后台刷新，过期的热榜一直得不到更新），最后写入耗时样本
+        """
+        try:
+            return await coro
+        finally:
+            await self.hot_tracker.store.drain()
+            await aclose_clients()
+            self.latency.flush()
+
+    async def generate_batch_async(self, dates: List[str], post_types: List[str], resume: bool = True) -> Dict[str, int]:
+        """
+        批量生成多天的内容日历
+        所有帖子共享LLM/图片的全局并发上限和缓存，每篇帖子的进度写入检查点，
+        崩溃后重新运行同一批次会跳过已完成的帖子，未完成的帖子沿用原规划续跑
+        """
+        batch_id = f"{dates[0]}_{dates[-1]}_{'-'.join(post_types)}"
+        checkpoint = BatchCheckpoint(batch_id)
+        if not resume:
+            checkpoint.state["posts"] = {}
+
         print("=" * 60)
-        print("🐱 小红书宠物内容生成器")
+        print(f"📆 批量生成: {dates[0]} ~ {dates[-1]}，共 {len(dates) * len(post_types)} 篇")
+        print(f"📌 检查点: {checkpoint.path}")
         print("=" * 60)
-        print(f"📅 生成日期: {get_today_date()}")
-        print(f"⏰ 发布时段: {post_type} ({'早间' if post_type == 'morning' else '晚间'})")
-        print(f"🤖 AI提供商: {'火山引擎(豆包)' if self.ai_provider == 'volcano' else 'OpenAI'}")
+
+        post_slots = asyncio.Semaphore(max(1, CONTENT_CONFIG["batch_post_concurrency"]))
+
+        async def run(date_str: str, post_type: str) -> None:
+            if resume and checkpoint.is_done(date_str, post_type):
+                print(f"⏭️ 已完成，跳过: {date_str} {post_type}")
+                return
+
+            async with post_slots:
+                # 上次中断在这篇帖子上时沿用同一份规划，正文和图片的提示词不变，
+                # 已经拿到的正文和图片可以直接从缓存恢复
+                plan = checkpoint.plan(date_str, post_type) if resume else None
+                reuse_body = plan is not None
+
+                try:
+                    if plan is None:
+                        plan = await self.plan_post(post_type, date_str)
+                    checkpoint.mark(date_str, post_type, "running", plan=plan)
+                    await self.generate_complete_post_async(post_type, date_str, plan=plan, reuse_body=reuse_body)
+                except Exception as e:
+                    print(f"❌ 生成失败: {date_str} {post_type}: {e}")
+                    checkpoint.mark(date_str, post_type, "failed", plan=plan, error=str(e))
+                    return
+
+                filepath = get_content_path("xiaohongshu", date_str) / f"post_{post_type}_{date_str}.json"
+                checkpoint.mark(date_str, post_type, "done", file=str(filepath))
+
+        await asyncio.gather(*(run(d, t) for d in dates for t in post_types))
+
+        summary = checkpoint.summary()
+        print("=" * 60)
+        print(f"📊 批量生成结束: {summary}")
         print("=" * 60)
+        return summary
 
+    async def plan_post(self, post_type: str, date_str: str = None) -> Dict:
+        """规划帖子：选择宠物类型、获取热点（快照过期时抓取平台热榜）、生成问题"""
         # 1. 选择宠物类型
         pet_type = random.choice(["猫咪", "狗狗", "猫咪和狗狗"])
         print(f"🐾 宠物类型: {pet_type}")
 
         # 2. 获取热点话题
         print("\n🔥 获取今日热点...")
-        hot_topics = self.hot_tracker.get_mock_hot_topics()
+        hot_topics = (await self.hot_tracker.get_snapshot_async(post_type, date_str))["topics"]
         top_hot = hot_topics[0] if hot_topics else {"topic": "日常"}
-        print(f"   热点: {top_hot['topic']} (热度: {top_hot['heat']})")
+        print(f"   热点: {top_hot['topic']} (热度: {top_hot.get('heat', '-')})")
 
         # 3. 生成问题
         print("\n❓ 生成测试问题...")
-        questions = self.generate_questions(pet_type)
+        questions = self.generate_questions(pet_type, post_type, date_str)
 
         for i, q in enumerate(questions, 1):
             print(f"   {i}. {q['question'][:30]}...")
             print(f"      A. {q['options']['A']} | B. {q['options']['B']}")
 
-        # 4. 生成正文
-        print("\n📝 生成正文内容...")
-        body_content = self.generate_body_content(pet_type, questions)
+        return {
+            "pet_type": pet_type,
+            "hot_topic": top_hot,
+            "hot_topics": [t["topic"] for t in hot_topics[:CONTENT_CONFIG["hot_topic_context"]]],
+            "questions": questions
+        }
+
+    async def generate_complete_post_async(self, post_type: str = "morning", date_str: str = None,
+                                           plan: Dict = None, reuse_body: bool = False) -> Dict:
+        """
+        异步生成完整的帖子内容
+        正文LLM调用与所有图片任务同时启动，总耗时取决于最慢的一次调用
+        date_str 默认为今天，批量生成时可指定未来日期；plan 为 plan_post 的结果，用于断点续跑
+        """
+        date_str = date_str or get_today_date()
 
-        # 5. 生成图片提示词
+        print("=" * 60)
+        print("🐱 小红书宠物内容生成器")
+        print("=" * 60)
+        print(f"📅 生成日期: {date_str}")
+        print(f"⏰ 发布时段: {post_type} ({'早间' if post_type == 'morning' else '晚间'})")
+        print(f"🤖 AI提供商: {'火山引擎(豆包)' if self.ai_provider == 'volcano' else 'OpenAI'}")
+        print("=" * 60)
+
+        # 1-3. 选择宠物类型、获取热点、生成问题（续跑时沿用检查点中的规划）
+        plan = plan or await self.plan_post(post_type, date_str)
+        pet_type = plan["pet_type"]
+        top_hot = plan["hot_topic"]
+        hot_topics = plan.get("hot_topics", [top_hot["topic"]])  # 旧检查点中没有热点列表
+        questions = plan["questions"]
+
+        # 4. 生成图片提示词模板（纯模板，无网络请求）
         print("\n🎨 生成图片提示词...")
         image_prompts = self.generate_image_prompts(questions)
 
+        content_dir = get_content_path("xiaohongshu", date_str)
+        content_dir.mkdir(parents=True, exist_ok=True)
+
+        start = time.monotonic()
+        if CONTENT_CONFIG["text_generation_mode"] == "template":
+            # 5. 配图直接使用模板，正文和图片并发生成
+            print("\n📝 并发生成正文内容和图片...")
+            body_content, images = await asyncio.gather(
+                self.generate_body_content(pet_type, questions, reuse=reuse_body, hot_topics=hot_topics),
+                self.generate_images(image_prompts, questions, content_dir, post_type, date_str)
+            )
+        else:
+            # 5. 正文和展开后的配图提示词与图片同时开始：本地卡片和缓存恢复不等待文案，
+            #    需要远程生成的图片等提示词展开后再请求
+            print("\n📝 生成正文内容和配图提示词，同时生成图片...")
+
+            prompts_ready = asyncio.get_running_loop().create_future()
+
+            async def generate_text() -> tuple:
+                result = await self.generate_text_content(
+                    pet_type, questions, image_prompts, reuse=reuse_body, hot_topics=hot_topics,
+                    on_prompts=prompts_ready.set_result
+                )
+                print(f"⏱️ 文案生成耗时: {time.monotonic() - start:.1f}s")
+                return result
+
+            text_task = asyncio.create_task(generate_text())
+
+            async def expanded_prompts() -> Dict:
+                # 提示词就绪即可开始，不等待正文校验和补全；文案生成失败时抛出同样的异常
+                await asyncio.wait({prompts_ready, text_task}, return_when=asyncio.FIRST_COMPLETED)
+                return prompts_ready.result() if prompts_ready.done() else (await text_task)[1]
+
+            try:
+                images = await self.generate_images(
+                    image_prompts, questions, content_dir, post_type, date_str, expanded_prompts
+                )
+                body_content, image_prompts = await text_task
+            finally:
+                text_task.cancel()
+        print(f"⏱️ 正文与图片生成耗时: {time.monotonic() - start:.1f}s")
+        print(f"📷 成功生成 {len(images)} 张图片")
+
         # 6. 构建完整帖子
         post = {
             "meta": {
-                "date": get_today_date(),
+                "date": date_str,
                 "post_type": post_type,
                 "pet_type": pet_type,
                 "hot_topic": top_hot['topic'],
@@ -509,6 +1484,10 @@ class PetContentGenerator:
             "questions": questions,
             "body": body_content,
             "image_prompts": image_prompts,
+            "images": [path.relative_to(PROJECT_ROOT).as_posix() for path in images],
+            "image_checksums": {
+                path.relative_to(PROJECT_ROOT).as_posix(): checksum for path, checksum in images.items()
+            },
             "call_to_action": {
                 "scoring": {
                     "excellent": "答对3个 = 优秀铲屎官 🌟",
@@ -524,10 +1503,6 @@ class PetContentGenerator:
 
         # 7. 保存帖子
         print("\n💾 保存内容...")
-        date_str = get_today_date()
-        content_dir = get_content_path("xiaohongshu", date_str)
-        content_dir.mkdir(parents=True, exist_ok=True)
-
         filepath = content_dir / f"post_{post_type}_{date_str}.json"
         save_json_file(filepath, post)
 
@@ -557,6 +1532,18 @@ class PetContentGenerator:
         return post
 
 
+def date_range(start: str, end: str) -> List[str]:
+    """生成闭区间内的日期列表（YYYY-MM-DD）"""
+    start_date = datetime.strptime(start, "%Y-%m-%d")
+    end_date = datetime.strptime(end, "%Y-%m-%d")
+    if end_date < start_date:
+        raise ValueError(f"结束日期 {end} 早于开始日期 {start}")
+    return [
+        (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
+        for i in range((end_date - start_date).days + 1)
+    ]
+
+
 def main():
     """主函数"""
     import argparse
@@ -569,16 +1556,49 @@ def main():
         choices=["morning", "evening", "both"],
         help="发布类型: morning(早间), evening(晚间), both(都生成)"
     )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="批量生成: 从开始日期(默认今天)起连续生成N天的内容"
+    )
+    parser.add_argument(
+        "--from",
+        dest="date_from",
+        type=str,
+        default=None,
+        help="批量生成: 开始日期 YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--to",
+        dest="date_to",
+        type=str,
+        default=None,
+        help="批量生成: 结束日期 YYYY-MM-DD（含）"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="批量生成: 忽略已有检查点，全部重新生成"
+    )
 
     args = parser.parse_args()
 
     generator = PetContentGenerator()
-
-    if args.type == "both":
-        # 生成早晚两篇
-        morning_post = generator.generate_complete_post("morning")
-        print("\n" + "=" * 60)
-        evening_post = generator.generate_complete_post("evening")
+    post_types = ["morning", "evening"] if args.type == "both" else [args.type]
+
+    if args.days or args.date_from or args.date_to:
+        # 批量生成内容日历
+        start = args.date_from or get_today_date()
+        if args.date_to:
+            end = args.date_to
+        else:
+            days = args.days or 1
+            end = (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        generator.generate_batch(date_range(start, end), post_types, resume=not args.no_resume)
+    elif args.type == "both":
+        # 生成早晚两篇（共享连接池）
+        generator.generate_posts(post_types)
     else:
         # 生成单篇
         generator.generate_complete_post(args.type)
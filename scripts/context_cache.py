@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧠 服务商上下文缓存句柄
+火山方舟上下文缓存：固定不变的系统提示词只上传一次（context/create），
+之后的请求带上context_id，只发送变化的用户消息
+句柄按 模型+前缀消息 的哈希保存在 data/cache/ 下，多个进程共享，临近过期时重新创建
+"""
+
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import weakref
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CONTEXT_CACHE_CONFIG
+from storage import write_json_atomic
+
+
+class ContextCache:
+    """上下文缓存句柄管理"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or CONTEXT_CACHE_CONFIG["path"])
+        self.ttl = CONTEXT_CACHE_CONFIG["ttl"]
+        self.refresh_margin = CONTEXT_CACHE_CONFIG["refresh_margin"]
+        self._lock = threading.Lock()
+        # 同一事件循环内同一前缀只创建一次
+        self._creating: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict]) -> str:
+        """计算前缀的缓存键"""
+        material = json.dumps({"model": model, "messages": messages}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _load(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, handles: Dict) -> None:
+        """写入临时文件后原子替换"""
+        write_json_atomic(self.path, handles, indent=2)
+
+    def _update(self, key: str, entry: Optional[Dict]) -> None:
+        """更新（entry为None时删除）一个句柄并落盘，同时清理已过期的句柄"""
+        now = time.time()
+        with self._lock:
+            handles = {k: v for k, v in self._load().items() if v["expires_at"] > now}
+            if entry is None:
+                handles.pop(key, None)
+            else:
+                handles[key] = entry
+            self._save(handles)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取未临近过期的句柄记录（失败记录的id为None）"""
+        entry = self._load().get(key)
+        if entry and entry["expires_at"] - self.refresh_margin > time.time():
+            return entry
+        return None
+
+    def touch(self, key: str, context_id: str) -> None:
+        """句柄被使用后服务端会重置有效期，本地同步延长"""
+        self._update(key, {"id": context_id, "expires_at": time.time() + self.ttl})
+
+    def invalidate(self, key: str) -> None:
+        """句柄失效（服务端已过期或被删除）"""
+        self._update(key, None)
+
+    async def get_or_create(self, model: str, messages: List[Dict],
+                            create: Callable[[str, List[Dict], int], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        获取前缀对应的context_id，没有或临近过期时调用create(model, messages, ttl)重新创建
+        创建失败时在一段时间内不再重试，返回None表示走普通请求
+        """
+        key = self.make_key(model, messages)
+        locks = self._creating.setdefault(asyncio.get_running_loop(), {})
+        async with locks.setdefault(key, asyncio.Lock()):
+            entry = self.get(key)
+            if entry:
+                return entry["id"]
+
+            context_id = await create(model, messages, self.ttl)
+            if context_id:
+                print(f"🧠 已创建上下文缓存: {context_id}")
+                self._update(key, {"id": context_id, "expires_at": time.time() + self.ttl})
+            else:
+                retry_in = CONTEXT_CACHE_CONFIG["retry_after_failure"]
+                self._update(key, {"id": None, "expires_at": time.time() + retry_in + self.refresh_margin})
+            return context_id
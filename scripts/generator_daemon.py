@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏰ 常驻内容生成进程
+按 PUBLISH_SCHEDULE 在每个发布时段前自动生成内容，进程常驻：
+- 生成器、LLM/图片缓存、耗时统计和HTTP连接池在多次运行之间保持
+- 生成前预先建立到服务商的连接
+- 启动时补跑错过的生成，进度与批量生成共用检查点，同一篇帖子不会重复生成
+"""
+
+import sys
+import signal
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import httpx
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import PUBLISH_SCHEDULE, DAEMON_CONFIG, AI_PROVIDER, OPENAI_API_BASE, VOLCANO_API_BASE, IMAGE_API_BASE
+from content_generator import PetContentGenerator
+from http_client import get_async_client, aclose_clients
+
+
+class GeneratorDaemon:
+    """常驻内容生成进程"""
+
+    def __init__(self, post_types: List[str] = None):
+        self.tz = ZoneInfo(DAEMON_CONFIG["timezone"])
+        self.lead = timedelta(minutes=DAEMON_CONFIG["lead_minutes"])
+        self.post_types = post_types or list(PUBLISH_SCHEDULE)
+        self.generator = PetContentGenerator()
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def _publish_time(self, post_type: str) -> Tuple[int, int]:
+        """发布时段的 (时, 分)"""
+        hour, minute = PUBLISH_SCHEDULE[post_type]["time"].split(":")
+        return int(hour), int(minute)
+
+    def _trigger(self, post_type: str, before: timedelta) -> CronTrigger:
+        """发布时间前 before 每天触发一次"""
+        hour, minute = self._publish_time(post_type)
+        fire = datetime(2000, 1, 2, hour, minute) - before
+        return CronTrigger(hour=fire.hour, minute=fire.minute, second=fire.second, timezone=self.tz)
+
+    def _last_publish(self, post_type: str, now: datetime) -> datetime:
+        """最近一次已经到了生成时间的发布时刻"""
+        hour, minute = self._publish_time(post_type)
+        publish = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if publish - self.lead > now:
+            publish -= timedelta(days=1)
+        return publish
+
+    async def generate(self, post_type: str, date_str: str = None) -> None:
+        """生成一篇帖子（已完成时跳过，中断后续跑）"""
+        date_str = date_str or (datetime.now(self.tz) + self.lead).strftime("%Y-%m-%d")
+        print(f"⏰ 开始生成: {date_str} {post_type}")
+        await self.generator.generate_batch_async([date_str], [post_type])
+
+    async def warm_up(self) -> None:
+        """预先建立到服务商的连接（TCP/TLS握手），失败时忽略"""
+        bases = {IMAGE_API_BASE, VOLCANO_API_BASE if AI_PROVIDER == "volcano" else OPENAI_API_BASE}
+
+        async def connect(base: str) -> None:
+            try:
+                await get_async_client(base).head(base)
+            except httpx.HTTPError:
+                pass
+
+        await asyncio.gather(*(connect(base) for base in bases))
+        print(f"🔥 已预热连接: {', '.join(sorted(bases))}")
+
+    async def catch_up(self) -> None:
+        """补跑进程未运行期间错过的生成"""
+        now = datetime.now(self.tz)
+        window = timedelta(hours=DAEMON_CONFIG["catchup_hours"])
+        for post_type in self.post_types:
+            publish = self._last_publish(post_type, now)
+            if now - publish <= window:
+                await self.generate(post_type, publish.strftime("%Y-%m-%d"))
+
+    def schedule(self) -> None:
+        """注册每个发布时段的预热和生成任务"""
+        warm_up = timedelta(seconds=DAEMON_CONFIG["warm_up_seconds"])
+        job_options: Dict = {
+            "misfire_grace_time": DAEMON_CONFIG["misfire_grace_time"],
+            "coalesce": True,
+            "max_instances": 1
+        }
+        for post_type in self.post_types:
+            self.scheduler.add_job(
+                self.generate, self._trigger(post_type, self.lead),
+                args=[post_type], id=f"generate_{post_type}", **job_options
+            )
+            self.scheduler.add_job(
+                self.warm_up, self._trigger(post_type, self.lead + warm_up),
+                id=f"warm_up_{post_type}", **job_options
+            )
+
+    async def run(self, catch_up: bool = True) -> None:
+        """启动调度器并常驻，收到 SIGINT/SIGTERM 后退出"""
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+
+        self.scheduler = AsyncIOScheduler(timezone=self.tz)
+        self.schedule()
+        self.scheduler.start()
+
+        print("=" * 60)
+        print("⏰ 常驻生成进程已启动")
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith("generate_"):
+                print(f"   {job.id}: 下次运行 {job.next_run_time:%Y-%m-%d %H:%M}")
+        print("=" * 60)
+
+        try:
+            if catch_up:
+                await self.catch_up()
+            await self._stop.wait()
+        finally:
+            self.scheduler.shutdown(wait=False)
+            await self.generator.hot_tracker.store.drain()
+            await aclose_clients()
+            self.generator.latency.flush()
+            print("👋 常驻生成进程已退出")
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="常驻内容生成进程（按发布时段自动生成）")
+    parser.add_argument(
+        "--type",
+        type=str,
+        default="both",
+        choices=["morning", "evening", "both"],
+        help="生成的发布时段: morning(早间), evening(晚间), both(都生成)"
+    )
+    parser.add_argument(
+        "--no-catchup",
+        action="store_true",
+        help="启动时不补跑错过的生成"
+    )
+
+    args = parser.parse_args()
+
+    post_types = ["morning", "evening"] if args.type == "both" else [args.type]
+    asyncio.run(GeneratorDaemon(post_types).run(catch_up=not args.no_catchup))
+
+
+if __name__ == "__main__":
+    main()
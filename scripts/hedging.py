@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏁 对冲请求
+先请求主服务商，超过等待时间仍未返回有效结果时同时请求备用服务商，
+取先返回的有效结果并取消另一个请求，用于压低单一服务商的长尾延迟
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from latency_tracker import LatencyTracker
+
+
+def hedge_delay(tracker: LatencyTracker, key: str, config: Dict) -> float:
+    """按主服务商的历史耗时分位数计算对冲等待时间（秒）"""
+    delay = None
+    if tracker.count(key) >= config["min_samples"]:
+        delay = tracker.percentile(key, config["percentile"])
+    if delay is None:
+        delay = config["default_delay"]
+    return min(config["max_delay"], max(config["min_delay"], delay))
+
+
+async def hedged(attempts: List[Tuple[str, Callable[[], Awaitable[Any]]]], delay: Optional[float],
+                 is_valid: Callable[[Any], bool] = bool) -> Tuple[Optional[str], Any]:
+    """
+    对冲执行多个服务商的请求，attempts为按优先级排列的 (名称, 无参协程函数)
+    前一个请求超过delay秒未返回、或返回了无效结果时启动下一个（delay为None时只在失败后回退），
+    返回 (服务商名称, 结果)；全部失败时返回 (None, None)
+    """
+    loop = asyncio.get_running_loop()
+    running: Dict[asyncio.Task, str] = {}
+    queue = list(attempts)
+    deadline = None
+
+    def launch() -> None:
+        nonlocal deadline
+        name, factory = queue.pop(0)
+        running[asyncio.create_task(factory())] = name
+        deadline = loop.time() + delay if delay is not None else None
+
+    launch()
+    try:
+        while running:
+            timeout = max(0.0, deadline - loop.time()) if queue and deadline is not None else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # 超过等待时间仍未返回，启动备用服务商
+                print(f"⏱️ {', '.join(running.values())} 超过 {delay:.1f}s 未返回，同时请求 {queue[0][0]}...")
+                launch()
+                continue
+
+            for task in done:
+                name = running.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"❌ {name} 请求异常: {e}")
+                    result = None
+                if is_valid(result):
+                    return name, result
+
+            # 已返回的结果都无效，不再等待，立即启动下一个服务商
+            if queue:
+                print(f"🔄 回退尝试 {queue[0][0]}...")
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return None, None
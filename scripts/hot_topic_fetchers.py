@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📡 平台热榜抓取
+按 HOT_TOPIC_CONFIG["search_platforms"] 并发抓取微博、抖音、小红书热榜：
+- 每个平台一个抓取器（注册到FETCHERS，新增平台只需实现parse）
+- 每个平台独立超时，失败或超时的平台跳过，返回其余平台的结果
+- 统一转换为 {topic, category, heat, source} 格式，热度按平台内最高值折算到0~100
+- 用宠物关键词匹配器标记宠物相关话题及对应的问题类别（pet_category）
+可以用录制的HTML/JSON文件离线调试：python scripts/hot_topic_fetchers.py --fixtures 目录
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+import httpx
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HOT_TOPIC_CONFIG
+from http_client import get_async_client, aclose_clients
+from pet_matcher import PET_CATEGORY, get_matcher
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# 平台名 -> 抓取器类
+FETCHERS: Dict[str, Type["HotTopicFetcher"]] = {}
+
+
+def register(cls: Type["HotTopicFetcher"]) -> Type["HotTopicFetcher"]:
+    """注册平台抓取器"""
+    FETCHERS[cls.name] = cls
+    return cls
+
+
+def parse_heat(value) -> Optional[float]:
+    """解析热度值，支持数字和 "1.2万"、"3.5w"、"2亿" 这类写法，无法解析时返回None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(万|w|W|亿)?", value.replace(",", ""))
+    if not match:
+        return None
+    number = float(match.group(1))
+    unit = match.group(2)
+    if unit == "亿":
+        number *= 1e8
+    elif unit:
+        number *= 1e4
+    return number
+
+
+def json_items(text: str, *path: str) -> List[Dict]:
+    """
+    解析JSON接口返回的话题列表（按 path 逐层取字段）
+    格式不符合预期（不是对象、字段缺失或为null、不是列表）时抛出ValueError，与页面结构变化一样按抓取失败处理
+    """
+    data = json.loads(text)
+    for key in path:
+        if not isinstance(data, dict):
+            raise ValueError(f"热榜格式变化: {key} 的上一层不是对象")
+        data = data.get(key)
+    if not isinstance(data, list):
+        raise ValueError(f"热榜格式变化: {'.'.join(path)} 不是列表")
+    return [item for item in data if isinstance(item, dict)]
+
+
+class HotTopicFetcher:
+    """平台热榜抓取器基类"""
+
+    name = ""
+    label = ""
+
+    def __init__(self, config: Dict = None):
+        config = config or HOT_TOPIC_CONFIG["sources"][self.name]
+        self.url = config["url"]
+        self.timeout = config["timeout"]
+        self.cookie = config.get("cookie", "")
+
+    def headers(self) -> Dict:
+        """请求头"""
+        headers = {"User-Agent": USER_AGENT}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        return headers
+
+    def parse(self, text: str) -> List[Tuple[str, float]]:
+        """解析热榜页面，返回 [(话题, 原始热度)]，页面格式变化时抛出ValueError"""
+        raise NotImplementedError
+
+    def normalize(self, items: List[Tuple[str, float]]) -> List[Dict]:
+        """转换为统一格式，热度按对数折算（本平台最高为100）"""
+        items = [
+            (title.strip().strip("#").strip(), heat)
+            for title, heat in items if isinstance(title, str) and heat and heat > 0
+        ]
+        items = [(title, heat) for title, heat in items if title]
+        items = items[:HOT_TOPIC_CONFIG["max_topics_per_source"]]
+        if not items:
+            return []
+
+        top = math.log1p(max(heat for _, heat in items))
+        matcher = get_matcher()
+        topics = []
+        for title, heat in items:
+            match = matcher.classify(title)
+            topics.append({
+                "topic": title,
+                "category": PET_CATEGORY if match["is_pet"] else "社会生活",
+                "heat": max(1, round(100 * math.log1p(heat) / top)),
+                "source": self.name,
+                "pet_category": match["pet_category"],
+                "pet_keywords": match["keywords"]
+            })
+        return topics
+
+    async def fetch(self, client: httpx.AsyncClient = None) -> List[Dict]:
+        """抓取并解析热榜"""
+        client = client or get_async_client(self.url)
+        response = await client.get(
+            self.url,
+            headers=self.headers(),
+            timeout=httpx.Timeout(self.timeout)
+        )
+        response.raise_for_status()
+        try:
+            items = self.parse(response.text)
+        except (TypeError, AttributeError, KeyError) as e:
+            # 解析器没有覆盖到的格式变化，同样只算这个平台抓取失败
+            raise ValueError(f"热榜格式变化: {type(e).__name__} {e}") from e
+        return self.normalize(items)
+
+
+@register
+class WeiboFetcher(HotTopicFetcher):
+    """微博热搜榜（HTML页面）"""
+
+    name = "weibo"
+    label = "微博热搜"
+
+    _ROW = re.compile(r'<td class="td-02">\s*<a[^>]*>([^<]+)</a>\s*(?:<span>([^<]*)</span>)?')
+
+    def parse(self, text: str) -> List[Tuple[str, float]]:
+        # 置顶话题没有热度值，跳过
+        return [(title, parse_heat(heat)) for title, heat in self._ROW.findall(text) if heat]
+
+
+@register
+class DouyinFetcher(HotTopicFetcher):
+    """抖音热点榜（JSON接口）"""
+
+    name = "douyin"
+    label = "抖音热点"
+
+    def parse(self, text: str) -> List[Tuple[str, float]]:
+        return [(item.get("word"), parse_heat(item.get("hot_value"))) for item in json_items(text, "word_list")]
+
+
+@register
+class XiaohongshuFetcher(HotTopicFetcher):
+    """小红书热搜榜（JSON接口）"""
+
+    name = "xiaohongshu"
+    label = "小红书热搜"
+
+    def parse(self, text: str) -> List[Tuple[str, float]]:
+        return [(item.get("title"), parse_heat(item.get("score"))) for item in json_items(text, "data", "items")]
+
+
+def merge_topics(topics: List[Dict]) -> List[Dict]:
+    """合并多个平台的话题，同名话题保留热度最高的一条，按热度排序"""
+    merged: Dict[str, Dict] = {}
+    for topic in topics:
+        existing = merged.get(topic["topic"])
+        if existing is None or topic["heat"] > existing["heat"]:
+            merged[topic["topic"]] = topic
+    return sorted(merged.values(), key=lambda t: t["heat"], reverse=True)
+
+
+# 抓取单个平台时可能出现的错误（请求失败、超时、页面格式变化）
+FETCH_ERRORS = (httpx.HTTPError, asyncio.TimeoutError, ValueError)
+
+
+def known_platforms(platforms: List[str] = None) -> List[str]:
+    """过滤掉没有抓取器或未配置的平台"""
+    known = []
+    for name in platforms or HOT_TOPIC_CONFIG["search_platforms"]:
+        if name not in FETCHERS or name not in HOT_TOPIC_CONFIG["sources"]:
+            print(f"⚠️ 未知的热点平台: {name}")
+            continue
+        known.append(name)
+    return known
+
+
+async def fetch_source(name: str, client: httpx.AsyncClient = None) -> List[Dict]:
+    """抓取单个平台的热榜，失败时抛出FETCH_ERRORS中的异常"""
+    fetcher = FETCHERS[name]()
+    # 连接、排队等整体耗时也受单个平台的超时限制
+    topics = await asyncio.wait_for(fetcher.fetch(client), timeout=fetcher.timeout)
+    if not topics:
+        # 通常是页面结构变化或需要登录，不能当作"没有热点"
+        raise ValueError("热榜为空或无法解析")
+    return topics
+
+
+async def fetch_all(platforms: List[str] = None, client: httpx.AsyncClient = None) -> List[Dict]:
+    """
+    并发抓取各平台热榜，单个平台失败或超时时跳过，全部失败时返回空列表
+    client 用于注入测试客户端（如加载录制文件的MockTransport），默认使用共享连接池
+    """
+    names = known_platforms(platforms)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(fetch_source(name, client) for name in names), return_exceptions=True)
+
+    topics: List[Dict] = []
+    summary = []
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, FETCH_ERRORS):
+                raise result
+            print(f"⚠️ {FETCHERS[name].label}获取失败: {type(result).__name__} {result}")
+            summary.append(f"{name} 失败")
+            continue
+        topics.extend(result)
+        summary.append(f"{name} {len(result)}")
+
+    print(f"📡 热榜抓取完成 ({', '.join(summary)})，耗时 {time.monotonic() - start:.1f}s")
+    return merge_topics(topics)
+
+
+def fixture_client(directory: Path) -> httpx.AsyncClient:
+    """
+    用录制的热榜文件模拟请求的客户端：目录下的 weibo.html、douyin.json 等按平台名匹配
+    没有录制文件的平台返回404
+    """
+    directory = Path(directory)
+    by_host = {
+        httpx.URL(source["url"]).host: name for name, source in HOT_TOPIC_CONFIG["sources"].items()
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        name = by_host.get(request.url.host)
+        files = sorted(directory.glob(f"{name}.*")) if name else []
+        if not files:
+            return httpx.Response(404)
+        return httpx.Response(200, content=files[0].read_bytes())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def main():
+    """主函数 - 抓取并打印各平台热榜"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="抓取平台热榜")
+    parser.add_argument("--fixtures", type=str, default=None, help="使用录制的热榜文件目录（离线调试）")
+    parser.add_argument("--platforms", nargs="*", default=None, help="只抓取指定平台")
+    args = parser.parse_args()
+
+    async def run() -> List[Dict]:
+        if args.fixtures:
+            async with fixture_client(Path(args.fixtures)) as client:
+                return await fetch_all(args.platforms, client)
+        try:
+            return await fetch_all(args.platforms)
+        finally:
+            await aclose_clients()
+
+    topics = asyncio.run(run())
+    print(f"找到 {len(topics)} 个热点话题：")
+    for i, topic in enumerate(topics[:20], 1):
+        print(f"  {i}. {topic['topic']} ({topic['category']}, {topic['source']}) - 热度: {topic['heat']}")
+
+
+if __name__ == "__main__":
+    main()
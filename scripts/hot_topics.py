@@ -10,9 +10,13 @@ import sys
 import json
 import random
 import re
+import zlib
+import asyncio
+import threading
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from collections import defaultdict
 
 # 添加项目根目录到路径
@@ -21,6 +25,30 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import (
     HOT_TOPIC_CONFIG, PET_TOPIC_CATEGORIES, get_today_date, save_json_file
 )
+from hot_topic_fetchers import fetch_source, known_platforms, merge_topics
+from http_client import aclose_clients
+from topic_store import TopicStore
+from topic_scoring import rank_topics
+from pet_matcher import PET_CATEGORY, get_matcher
+from trend_aggregator import TrendAggregator
+
+
+# 进程内热点快照：(日期, 时段) -> 快照，所有HotTopicTracker实例共享
+_SNAPSHOTS: Dict[Tuple[str, str], Dict] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+# 正在刷新的快照：事件循环 -> {(日期, 时段): Task}，并发的调用方共用同一次抓取
+_REFRESHING: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], asyncio.Task]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# 热点类别 -> 融合方式（{hot} 热点话题，{base} 宠物主题）
+FUSION_STYLES = {
+    "节日节气": ["{hot}限定：{base}", "当{hot}遇上宠物：{base}"],
+    "时间节点": ["{hot}期间，宠物{base}", "当{hot}遇上宠物：{base}"],
+    "宠物相关": ["铲屎官必知：{hot}与{base}", "{hot}：{base}"],
+    "社会生活": ["宠物视角看{hot}：{base}", "当{hot}遇上宠物：{base}"]
+}
 
 
 class HotTopicTracker:
@@ -30,11 +58,46 @@ class HotTopicTracker:
         self.config = HOT_TOPIC_CONFIG
         self.topics_dir = Path(__file__).parent.parent / "data" / "hot_topics"
         self.topics_dir.mkdir(parents=True, exist_ok=True)
+        self.store = TopicStore()
+        self.trends = TrendAggregator()
+
+    async def fetch_hot_topics(self) -> List[Dict]:
+        """
+        获取热点话题：各平台热榜加上节日/星期话题，各来源通过共享缓存获取（过期时后台刷新）
+        未开启抓取或所有平台都没有数据时使用模拟热点，按得分排序并保留前 snapshot_size 个
+        """
+        size = self.config["snapshot_size"]
+
+        def rank(topics: List[Dict]) -> List[Dict]:
+            # 模拟热点、节日话题和旧缓存中的话题没有宠物类别，排序前补充标记
+            return rank_topics(get_matcher().tag(topics), size)
+
+        async def local(compute) -> List[Dict]:
+            return compute()
+
+        # 模拟热点和节日话题带有随机热度，也放入缓存，同一时间段内各进程看到的结果一致
+        if not self.config["fetch_enabled"]:
+            return rank(await self.store.get("mock", lambda: local(self.get_mock_hot_topics)))
+
+        platforms = known_platforms(self.config["search_platforms"])
+        results = await asyncio.gather(
+            *(self.store.get(name, lambda name=name: fetch_source(name)) for name in platforms)
+        )
+        topics = [topic for result in results for topic in result]
+        if not topics:
+            print("⚠️ 未获取到平台热榜，使用模拟热点")
+            return rank(await self.store.get("mock", lambda: local(self.get_mock_hot_topics)))
+
+        calendar = await self.store.get("calendar", lambda: local(self.get_calendar_topics))
+        return rank(merge_topics(calendar + topics))
+
+    def get_calendar_topics(self) -> List[Dict]:
+        """节日节气和星期相关的话题"""
+        return [t for t in self.get_mock_hot_topics() if t["source"] == "calendar"]
 
     def get_mock_hot_topics(self) -> List[Dict]:
         """
-        获取模拟热点话题
-        实际使用时，可以接入微博热搜API、抖音热点API等
+        获取模拟热点话题（平台热榜不可用时的兜底）
         """
         # 当前时间相关热点
         current_month = datetime.now().month
@@ -152,7 +215,7 @@ class HotTopicTracker:
 
             # 随机选择问题类型
             question_types = random.sample(
-                PET_TOPIC_CATEGORIES.keys(),
+                list(PET_TOPIC_CATEGORIES.keys()),
                 min(count, len(PET_TOPIC_CATEGORIES.keys()))
             )
 
@@ -253,38 +316,106 @@ class HotTopicTracker:
     def integrate_hot_topic(self, base_topic: str, hot_topics: List[Dict]) -> str:
         """
         将热点话题与宠物内容结合
-        生成一个融合后的主题
+        生成一个融合后的主题：优先选择与主题同一问题类别的热点，其次是宠物相关热点，
+        融合方式按热点类别选择
         """
         if not hot_topics:
             return base_topic
 
-        # 选择一个合适的热点话题
-        # 优先选择宠物相关或生活类热点
-        relevant_topics = [
-            t for t in hot_topics
-            if t["category"] in ["宠物相关", "社会生活", "时间节点", "节日节气"]
-            and t["heat"] > 60
-        ]
-
-        if not relevant_topics:
+        # 从得分最高（热度、来源、宠物相关度、时效综合）的3个话题中选择
+        if self.config["relevance_check"]:
+            relevant_topics = rank_topics(hot_topics, k=3)
+        else:
             relevant_topics = hot_topics[:3]
 
-        hot_topic = random.choice(relevant_topics)
-
-        # 融合方式
-        fusion_styles = [
-            f"当{hot_topic['topic']}遇上宠物：{base_topic}",
-            f"{hot_topic['topic']}期间，宠物{base_topic}",
-            f"宠物视角看{hot_topic['topic']}：{base_topic}",
-            f"{hot_topic['topic']}限定：{base_topic}",
-            f"铲屎官必知：{hot_topic['topic']}与{base_topic}"
-        ]
+        matcher = get_matcher()
+        relevant_topics = matcher.tag(relevant_topics)
+        base_category = matcher.classify(base_topic, assume_pet=True)["pet_category"]
+
+        hot_topic = next(
+            (t for t in relevant_topics if base_category and t["pet_category"] == base_category),
+            next((t for t in relevant_topics if t["category"] == PET_CATEGORY), relevant_topics[0])
+        )
+
+        # 同一组话题总是得到同样的融合方式
+        styles = FUSION_STYLES.get(hot_topic["category"], FUSION_STYLES["社会生活"])
+        style = styles[zlib.crc32(f"{hot_topic['topic']}|{base_topic}".encode("utf-8")) % len(styles)]
+        return style.format(hot=hot_topic["topic"], base=base_topic)
+
+    def _fresh_snapshot(self, key: Tuple[str, str]) -> Optional[Dict]:
+        """未过期的快照，没有时返回None"""
+        with _SNAPSHOTS_LOCK:
+            snapshot = _SNAPSHOTS.get(key)
+            if snapshot and (datetime.now() - snapshot["fetched_at"]).total_seconds() < self.config["refresh_interval"]:
+                return snapshot
+            return None
+
+    def _store_snapshot(self, key: Tuple[str, str], topics: List[Dict]) -> Dict:
+        """保存快照（进程内和热点记录文件，热点未变化时不重写文件）"""
+        date, post_type = key
+        snapshot = {
+            "date": date,
+            "post_type": post_type,
+            "fetched_at": datetime.now(),
+            "topics": topics
+        }
+        if self.load_saved_topics(date, post_type) != topics:
+            self.save_hot_topics(topics, post_type, date)
+        with _SNAPSHOTS_LOCK:
+            _SNAPSHOTS[key] = snapshot
+        return snapshot
 
-        return random.choice(fusion_styles)
+    async def _refresh_snapshot(self, key: Tuple[str, str]) -> Dict:
+        """抓取热点并保存快照"""
+        return self._store_snapshot(key, await self.fetch_hot_topics())
 
-    def save_hot_topics(self, topics: List[Dict], post_type: str = "morning"):
+    async def get_snapshot_async(self, post_type: str = "morning", date: str = None) -> Dict:
+        """
+        获取某天某时段的热点快照
+        同一进程内只抓取并保存一次，所有调用方拿到同一个对象，同时发起的调用共用同一次抓取；
+        超过 HOT_TOPIC_CONFIG["refresh_interval"] 秒后失效并重新获取
+        """
+        key = (date or get_today_date(), post_type)
+        snapshot = self._fresh_snapshot(key)
+        if snapshot:
+            return snapshot
+
+        refreshing = _REFRESHING.setdefault(asyncio.get_running_loop(), {})
+        task = refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh_snapshot(key))
+            refreshing[key] = task
+            task.add_done_callback(lambda _: refreshing.pop(key, None))
+        # 某个调用方被取消时不影响其他等待同一次抓取的调用方
+        return await asyncio.shield(task)
+
+    def get_snapshot(self, post_type: str = "morning", date: str = None) -> Dict:
+        """
+        获取热点快照（同步版本，供命令行和同步代码使用）
+        在事件循环中请使用 get_snapshot_async；事件循环中快照已过期时只能使用模拟热点
+        """
+        key = (date or get_today_date(), post_type)
+        snapshot = self._fresh_snapshot(key)
+        if snapshot:
+            return snapshot
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            async def refresh() -> Dict:
+                try:
+                    return await self._refresh_snapshot(key)
+                finally:
+                    await self.store.drain()
+                    await aclose_clients()
+            return asyncio.run(refresh())
+
+        print("⚠️ 事件循环中无法同步抓取热榜，使用模拟热点")
+        return self._store_snapshot(key, self.get_mock_hot_topics())
+
+    def save_hot_topics(self, topics: List[Dict], post_type: str = "morning", date: str = None):
         """保存热点话题记录"""
-        date_str = get_today_date()
+        date_str = date or get_today_date()
         filepath = self.topics_dir / f"{date_str}_{post_type}_hot_topics.json"
 
         record = {
@@ -296,6 +427,8 @@ class HotTopicTracker:
 
         save_json_file(filepath, record)
         print(f"💾 热点话题已保存到: {filepath}")
+        # 增量更新最近几天的话题趋势
+        self.trends.ingest(topics)
 
         return filepath
 
@@ -319,22 +452,23 @@ class HotTopicTracker:
 
         return []
 
-    def get_today_topics(self, post_type: str = "morning") -> Dict:
+    def get_rising_topics(self, pet_only: bool = True, k: int = 5) -> List[Dict]:
+        """最近几天上升最快的话题（默认只看宠物相关），读取保存快照时算好的榜单"""
+        return self.trends.rising(pet_only, k)
+
+    def get_today_topics(self, post_type: str = "morning", date: str = None) -> Dict:
         """
         获取今日热点话题（用于内容生成）
-        返回包含原始热点和宠物问题的字典
+        返回包含原始热点和宠物问题的字典，热点来自该时段的共享快照
         """
-        # 获取热点话题
-        hot_topics = self.get_mock_hot_topics()
-
-        # 保存热点
-        self.save_hot_topics(hot_topics, post_type)
+        snapshot = self.get_snapshot(post_type, date)
+        hot_topics = snapshot["topics"]
 
         # 生成宠物问题
         questions = self.generate_pet_questions(count=3)
 
         return {
-            "date": get_today_date(),
+            "date": snapshot["date"],
             "post_type": post_type,
             "hot_topics": hot_topics,
             "questions": questions,
@@ -352,7 +486,7 @@ def main():
 
     # 测试获取热点
     print("\n📊 获取今日热点话题...")
-    hot_topics = tracker.get_mock_hot_topics()
+    hot_topics = tracker.get_snapshot("morning")["topics"]
 
     print(f"找到 {len(hot_topics)} 个热点话题：")
     for i, topic in enumerate(hot_topics[:5], 1):
@@ -369,15 +503,19 @@ def main():
         print(f"  B: {q['options']['B']}")
         print(f"  正确答案: {q['correct_answer']}")
 
+    # 查看话题趋势
+    print("\n📈 本周上升的宠物话题...")
+    for stats in tracker.get_rising_topics():
+        print(f"  {stats['topic']} - 上升 {stats['velocity']:+g}/天, 出现 {stats['days_seen']} 天")
+
     # 测试热点融合
     print("\n🔗 测试热点融合...")
     if hot_topics:
         fused = tracker.integrate_hot_topic("日常护理知识", hot_topics)
         print(f"融合主题: {fused}")
 
-    # 保存热点
-    print("\n💾 保存热点话题...")
-    tracker.save_hot_topics(hot_topics, "morning")
+    # 保存热点（获取快照时已保存）
+    print("\n💾 热点话题已保存到: " + str(tracker.topics_dir))
 
     print("\n✅ 测试完成!")
     print("=" * 60)
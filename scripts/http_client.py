@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 共享HTTP客户端
+为AI服务商和平台API提供统一的连接池：
+- HTTP keep-alive 复用TCP/TLS连接（安装h2时启用HTTP/2）
+- 每个主机独立的连接池及连接数上限
+- 按接口类型区分的超时配置
+同步客户端供发布器使用，异步客户端供内容生成器使用
+"""
+
+import sys
+import asyncio
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HTTP_CONFIG
+
+try:
+    import h2  # noqa: F401  仅用于检测HTTP/2支持
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# 同步客户端：按主机缓存，进程内共享
+_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+# 异步客户端绑定到创建它的事件循环，按事件循环分别缓存
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _host_of(url: str) -> str:
+    """提取URL中的主机名"""
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _pool_key(url: str) -> str:
+    """连接池的缓存键（协议+主机+端口）"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _limits_for(host: str) -> httpx.Limits:
+    """获取主机的连接池上限"""
+    max_connections = HTTP_CONFIG["per_host_limits"].get(host, HTTP_CONFIG["default_host_limit"])
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_CONFIG["keepalive_expiry"]
+    )
+
+
+def timeout_for(endpoint: str) -> httpx.Timeout:
+    """获取接口的超时配置（未配置的接口使用default）"""
+    timeouts = HTTP_CONFIG["timeouts"]
+    cfg = timeouts.get(endpoint, timeouts["default"])
+    return httpx.Timeout(cfg["read"], connect=cfg["connect"])
+
+
+def _client_options(url: str) -> Dict:
+    """构建客户端参数"""
+    return {
+        "http2": HTTP_CONFIG["http2"] and HTTP2_AVAILABLE,
+        "limits": _limits_for(_host_of(url)),
+        "timeout": timeout_for("default"),
+        "follow_redirects": True
+    }
+
+
+def get_client(url: str) -> httpx.Client:
+    """获取目标主机的共享同步客户端"""
+    key = _pool_key(url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_options(url))
+            _clients[key] = client
+        return client
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """获取目标主机的共享异步客户端（必须在事件循环中调用）"""
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+
+    key = _pool_key(url)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options(url))
+        clients[key] = client
+    return client
+
+
+def close_clients() -> None:
+    """关闭所有同步客户端"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def aclose_clients() -> None:
+    """关闭当前事件循环中的所有异步客户端"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
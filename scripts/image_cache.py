@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🖼️ 图片缓存
+按 提示词+模型+尺寸 的哈希在 data/ 下保存已生成的图片
+调用Seedream或DALL-E之前先查缓存，每个提示词可限制复用次数或新鲜度
+"""
+
+import sys
+import time
+import hashlib
+from pathlib import Path
+from typing import Dict
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import IMAGE_CACHE_CONFIG
+from image_io import atomic_copy
+from storage import sqlite_transaction
+
+
+class ImageCache:
+    """图片缓存（内容寻址）"""
+
+    def __init__(self, cache_dir: Path = None):
+        self.cache_dir = Path(cache_dir or IMAGE_CACHE_CONFIG["dir"])
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.db"
+
+        with sqlite_transaction(self.index_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS images (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    size TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    reuse_count INTEGER NOT NULL DEFAULT 0,
+                    last_used_at REAL
+                )
+                """
+            )
+
+    @staticmethod
+    def make_key(prompt: str, model: str, size: str) -> str:
+        """计算缓存键"""
+        material = f"{model}\n{size}\n{prompt.strip()}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def policy_for(kind: str) -> Dict:
+        """获取图片类型的复用策略"""
+        return IMAGE_CACHE_CONFIG["policies"].get(kind, IMAGE_CACHE_CONFIG["policies"]["default"])
+
+    def restore(self, key: str, output_path: Path, policy: Dict) -> bool:
+        """
+        命中缓存时把图片复制到output_path并记一次复用
+        超过复用次数上限（max_reuse）或超过新鲜期（max_age秒）视为未命中
+        """
+        now = time.time()
+        with sqlite_transaction(self.index_path) as conn:
+            row = conn.execute(
+                "SELECT filename, created_at, reuse_count FROM images WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False
+
+            filename, created_at, reuse_count = row
+            cached_path = self.cache_dir / filename
+            max_reuse = policy.get("max_reuse")
+            max_age = policy.get("max_age")
+
+            if not cached_path.exists():
+                conn.execute("DELETE FROM images WHERE key = ?", (key,))
+                return False
+            if max_reuse is not None and reuse_count >= max_reuse:
+                return False
+            if max_age is not None and now - created_at > max_age:
+                return False
+
+            atomic_copy(cached_path, output_path)
+            conn.execute(
+                "UPDATE images SET reuse_count = reuse_count + 1, last_used_at = ? WHERE key = ?",
+                (now, key)
+            )
+            return True
+
+    def store(self, key: str, model: str, size: str, source_path: Path) -> None:
+        """把新生成的图片放入缓存（同一键会被新图片替换，复用次数清零）"""
+        filename = f"{key}{source_path.suffix or '.png'}"
+        atomic_copy(source_path, self.cache_dir / filename)
+
+        with sqlite_transaction(self.index_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO images
+                    (key, model, size, filename, created_at, reuse_count, last_used_at)
+                VALUES (?, ?, ?, ?, ?, 0, NULL)
+                """,
+                (key, model, size, filename, time.time())
+            )
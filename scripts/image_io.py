@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 图片写盘工具
+- 流式下载：按块写入临时文件，边下载边计算SHA-256，完成后原子重命名
+- b64_json：边接收接口响应边解码写入（stream_b64_images），不在内存中保留完整的响应或图片
+发布器只会看到完整的PNG，不会读到写了一半的文件
+"""
+
+import os
+import re
+import json
+import base64
+import shutil
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import aiofiles
+import aiofiles.os
+
+# 每次写盘的块大小
+CHUNK_SIZE = 64 * 1024
+# base64按4字符一组解码，块大小取4的倍数
+B64_CHUNK_SIZE = CHUNK_SIZE // 3 * 4
+
+
+def temp_path_for(output_path: Path) -> Path:
+    """同目录下的临时文件路径（不以.png结尾，避免被发布器扫描到）"""
+    return output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex[:8]}.part")
+
+
+async def stream_download(client: httpx.AsyncClient, url: str, output_path: Path,
+                          timeout: httpx.Timeout) -> str:
+    """流式下载图片到output_path，返回SHA-256"""
+    digest = hashlib.sha256()
+    tmp_path = temp_path_for(output_path)
+
+    try:
+        async with client.stream("GET", url, timeout=timeout) as response:
+            response.raise_for_status()
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    digest.update(chunk)
+                    await f.write(chunk)
+        await aiofiles.os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return digest.hexdigest()
+
+
+async def write_b64_image(data: str, output_path: Path) -> str:
+    """
+    分块解码base64图片数据写入output_path，返回SHA-256
+    data已经完整在内存中（响应已整体解析），只省去解码后的完整图片；需要平稳的内存占用时用 stream_b64_images
+    """
+    digest = hashlib.sha256()
+    tmp_path = temp_path_for(output_path)
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            for start in range(0, len(data), B64_CHUNK_SIZE):
+                chunk = base64.b64decode(data[start:start + B64_CHUNK_SIZE])
+                digest.update(chunk)
+                await f.write(chunk)
+        await aiofiles.os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return digest.hexdigest()
+
+
+class _B64Sink:
+    """一张图片的base64数据：按4字符一组解码写入临时文件，同时计算SHA-256"""
+
+    def __init__(self, tmp_path: Path):
+        self.tmp_path = tmp_path
+        self.digest = hashlib.sha256()
+        self._rest = b""
+        self._file = None
+
+    async def write(self, data: bytes) -> None:
+        # JSON字符串中的 "/" 可能被转义为 "\/"，base64还可能按行折断
+        data = self._rest + re.sub(rb"\\[nr]|\s", b"", data.replace(b"\\/", b"/"))
+        usable = len(data) // 4 * 4
+        self._rest = data[usable:]
+        await self._emit(base64.b64decode(data[:usable]))
+
+    async def close(self, flush: bool = True) -> None:
+        if self._rest and flush:
+            await self._emit(base64.b64decode(self._rest + b"=" * (-len(self._rest) % 4)))
+            self._rest = b""
+        if self._file:
+            await self._file.close()
+            self._file = None
+
+    async def _emit(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self._file is None:
+            self._file = await aiofiles.open(self.tmp_path, "wb")
+        self.digest.update(chunk)
+        await self._file.write(chunk)
+
+
+# data[i].b64_json 字段值的开头
+_B64_FIELD = re.compile(rb'"b64_json"\s*:\s*"')
+# 字段名可能被拆在两个数据块之间，未找到时保留末尾这么多字节等待下一块
+_B64_FIELD_TAIL = 32
+
+
+async def stream_b64_images(response: httpx.Response, output_paths: List[Path]) -> Dict:
+    """
+    增量解析图片接口的JSON响应：每个 b64_json 字段边接收边解码写入临时文件，
+    其余内容（url、usage、错误信息等）在接收完后解析返回；data[i] 的图片原子重命名为 output_paths[i]
+    （多出的图片丢弃），对应条目中的 b64_json 替换为 sha256 校验和；失败时清理临时文件
+    """
+    skeleton = bytearray()
+    pending = b""
+    sinks: List[_B64Sink] = []
+    sink: Optional[_B64Sink] = None
+
+    try:
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            pending += chunk
+            while pending:
+                if sink is None:
+                    match = _B64_FIELD.search(pending)
+                    if not match:
+                        keep = min(len(pending), _B64_FIELD_TAIL)
+                        skeleton += pending[:len(pending) - keep]
+                        pending = pending[len(pending) - keep:]
+                        break
+                    skeleton += pending[:match.end()]
+                    pending = pending[match.end():]
+                    sink = _B64Sink(temp_path_for(output_paths[0]))
+                    sinks.append(sink)
+                    continue
+
+                end = pending.find(b'"')
+                if end == -1:
+                    # 转义符可能被拆开，留到下一块
+                    cut = len(pending) - 1 if pending.endswith(b"\\") else len(pending)
+                    await sink.write(pending[:cut])
+                    pending = pending[cut:]
+                    break
+                await sink.write(pending[:end])
+                await sink.close()
+                sink = None
+                skeleton += b'"'
+                pending = pending[end + 1:]
+
+        if sink is not None:
+            raise httpx.RemoteProtocolError("图片数据不完整", request=response.request)
+        skeleton += pending
+        result = json.loads(bytes(skeleton))
+
+        # 边接收边写入的字段在skeleton中只剩空字符串，按出现顺序与写入的图片对应
+        streamed = [
+            (index, item) for index, item in enumerate(result.get("data") or [])
+            if isinstance(item, dict) and item.get("b64_json") == ""
+        ]
+        for (index, item), written in zip(streamed, sinks):
+            del item["b64_json"]
+            if index < len(output_paths) and written.tmp_path.exists():
+                await aiofiles.os.replace(written.tmp_path, output_paths[index])
+                item["sha256"] = written.digest.hexdigest()
+        return result
+    finally:
+        for written in sinks:
+            await written.close(flush=False)
+            if written.tmp_path.exists():
+                written.tmp_path.unlink()
+
+
+def atomic_copy(source_path: Path, output_path: Path) -> None:
+    """复制文件到output_path（先写临时文件再重命名）"""
+    tmp_path = temp_path_for(output_path)
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def file_sha256(path: Path) -> str:
+    """按块计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ 调用耗时统计
+按调用类型（如 llm:volcano、image:dalle）记录最近的耗时样本并计算分位数
+样本保存在 data/cache/ 下，冷启动时也能用上历史耗时
+写入按 LATENCY_CONFIG["save_interval"] 合并，不在每次调用后同步写文件，进程退出时写入剩余样本
+"""
+
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Deque, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import LATENCY_CONFIG
+from storage import write_json_atomic
+
+
+class LatencyTracker:
+    """调用耗时统计（滑动窗口）"""
+
+    def __init__(self, path: Path = None, window: int = None):
+        self.path = Path(path or LATENCY_CONFIG["path"])
+        self.window = window or LATENCY_CONFIG["window"]
+        self.save_interval = LATENCY_CONFIG["save_interval"]
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> None:
+        """加载历史样本，文件损坏时忽略"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, samples in data.items():
+            self._samples[key] = deque(samples[-self.window:], maxlen=self.window)
+
+    def _save(self) -> None:
+        """写入临时文件后原子替换（调用方需持有锁）"""
+        write_json_atomic(self.path, {key: list(samples) for key, samples in self._samples.items()})
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self) -> None:
+        """写入尚未保存的样本"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def record(self, key: str, seconds: float) -> None:
+        """记录一次调用的耗时，距离上次写入超过 save_interval 时才写文件"""
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(round(seconds, 3))
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def count(self, key: str) -> int:
+        """样本数量"""
+        return len(self._samples.get(key, ()))
+
+    def reset(self, key: str) -> None:
+        """清空一种调用的样本"""
+        with self._lock:
+            if self._samples.pop(key, None) is not None:
+                self._save()
+
+    def percentile(self, key: str, q: float, last: int = None) -> Optional[float]:
+        """计算分位数（q取0~1，last指定时只统计最近的last个样本），没有样本时返回None"""
+        samples = list(self._samples.get(key, ()))
+        if last:
+            samples = samples[-last:]
+        samples = sorted(samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(q * (len(samples) - 1))))
+        return samples[index]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💾 LLM响应缓存
+按 服务商+模型+提示词+温度 的哈希持久化大模型的返回结果
+支持过期时间（TTL）和按总大小的LRU淘汰，数据保存在SQLite中，多进程可共享
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Optional, List, Dict
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import LLM_CACHE_CONFIG
+from storage import sqlite_transaction
+
+
+class LLMCache:
+    """LLM响应缓存（内容寻址）"""
+
+    def __init__(self, path: Path = None, ttl: int = None, max_bytes: int = None):
+        self.path = Path(path or LLM_CACHE_CONFIG["path"])
+        self.ttl = ttl if ttl is not None else LLM_CACHE_CONFIG["ttl"]
+        self.max_bytes = max_bytes if max_bytes is not None else LLM_CACHE_CONFIG["max_bytes"]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite_transaction(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: List[Dict], temperature: float) -> str:
+        """计算缓存键"""
+        material = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "messages": messages,
+                "temperature": temperature
+            },
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，过期条目视为未命中并删除"""
+        now = time.time()
+        with sqlite_transaction(self.path) as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return response
+
+    def put(self, key: str, provider: str, model: str, response: str) -> None:
+        """写入缓存并执行淘汰"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with sqlite_transaction(self.path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (key, provider, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, provider, model, response, size, now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """删除过期条目，总大小超限时按最近访问时间淘汰"""
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with sqlite_transaction(self.path) as conn:
+            conn.execute("DELETE FROM llm_cache")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧭 模型分级路由
+按生成任务（正文、合并生成、字段补全、配图提示词展开等）选择模型等级、max_tokens和temperature
+每个任务记录最近的耗时，超出耗时目标（SLO）时在一段时间内自动降级到更快的模型等级
+降级状态保存在 data/cache/ 下，多个进程共享
+"""
+
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import MODEL_TIERS, MODEL_ROUTES, MODEL_ROUTING_CONFIG
+from latency_tracker import LatencyTracker
+from storage import write_json_atomic
+
+
+class ModelRouter:
+    """按任务选择模型等级"""
+
+    def __init__(self, latency: LatencyTracker = None, path: Path = None):
+        self.latency = latency or LatencyTracker()
+        self.path = Path(path or MODEL_ROUTING_CONFIG["path"])
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, float]:
+        """读取各任务的降级截止时间，文件损坏时忽略"""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, downgrades: Dict[str, float]) -> None:
+        """写入临时文件后原子替换"""
+        write_json_atomic(self.path, downgrades, indent=2)
+
+    def downgraded_until(self, task: str) -> Optional[float]:
+        """任务降级的截止时间，未降级时返回None"""
+        until = self._load().get(task)
+        return until if until and until > time.time() else None
+
+    def route(self, task: str) -> Dict:
+        """
+        获取任务的路由：{"task", "tier", "slo", "max_tokens", "temperature", ...}
+        未配置的任务使用default路由
+        """
+        config = MODEL_ROUTES.get(task, MODEL_ROUTES["default"])
+        tier = config["tier"]
+        if config.get("fallback_tier") and self.downgraded_until(task):
+            tier = config["fallback_tier"]
+        return {**config, "task": task, "tier": tier}
+
+    @staticmethod
+    def model(route: Dict, provider: str) -> str:
+        """路由等级在某个服务商下对应的模型"""
+        return MODEL_TIERS[route["tier"]][provider]
+
+    def record(self, route: Dict, seconds: float) -> None:
+        """
+        记录一次服务商请求的耗时（包括失败和超时的请求，不含限流等待和重试间隔）
+        原等级最近 window 次请求的耗时分位数超过SLO时降级（至少 min_samples 个样本，
+        偶尔一次慢请求不会触发），降级后清空原等级的样本，到期后重新统计
+        """
+        key = f"route:{route['task']}:{route['tier']}"
+        self.latency.record(key, seconds)
+
+        fallback = route.get("fallback_tier")
+        if not MODEL_ROUTING_CONFIG["auto_downgrade"] or not fallback or route["tier"] == fallback:
+            return
+
+        min_samples = MODEL_ROUTING_CONFIG["min_samples"]
+        if self.latency.count(key) < min_samples:
+            return
+        observed = self.latency.percentile(key, MODEL_ROUTING_CONFIG["percentile"],
+                                           last=MODEL_ROUTING_CONFIG["window"])
+        if observed is None or observed <= route["slo"]:
+            return
+
+        cooldown = MODEL_ROUTING_CONFIG["cooldown"]
+        with self._lock:
+            downgrades = {k: v for k, v in self._load().items() if v > time.time()}
+            downgrades[route["task"]] = time.time() + cooldown
+            self._save(downgrades)
+        self.latency.reset(key)
+        print(f"📉 {route['task']} 耗时 {observed:.1f}s 超过目标 {route['slo']}s，"
+              f"{cooldown // 60}分钟内改用 {fallback} 模型")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🐾 宠物关键词匹配
+用 PET_LEXICON 和 PET_TOPIC_CATEGORIES 构建一次Aho-Corasick自动机，
+每个话题只扫描一遍（与长度成线性）即可找出全部命中的关键词：
+- 是否与宠物相关（命中 "通用" 中的宠物/品种词或完整的问题话题，排除词中的宠物词不计入）
+- 对应的问题类别（基础知识/行为解读/趣味挑战/热点结合），只对宠物相关的话题判断
+"""
+
+import re
+import sys
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import PET_LEXICON, PET_LEXICON_EXCLUDE, PET_TOPIC_CATEGORIES
+
+PET_CATEGORY = "宠物相关"
+GENERAL = "通用"
+EXCLUDED = "排除"
+
+# 问题话题的前后缀，去掉后剩下的核心词只用于判断类别（如"猫咪摇尾巴代表什么" -> "摇尾巴"）
+_PHRASE_PREFIX = re.compile(r"^(猫咪|狗狗|宠物)")
+_PHRASE_SUFFIX = re.compile(r"(代表什么|是什么意思|的意思|的含义|的原因|原因|的作用|作用|功能|的声音|频率|时间|吗)$")
+
+
+class PetMatcher:
+    """宠物关键词多模式匹配（Aho-Corasick）"""
+
+    def __init__(self, lexicon: Dict[str, List[str]] = None, categories: Dict[str, List[str]] = None,
+                 exclude: List[str] = None):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # 模式ID -> (关键词, 类别, 是否表示宠物相关)
+        self.patterns: List[Tuple[str, str, bool]] = []
+
+        for category, words in (PET_LEXICON if lexicon is None else lexicon).items():
+            for word in words:
+                self._add(word, category, category == GENERAL)
+
+        for word in PET_LEXICON_EXCLUDE if exclude is None else exclude:
+            self._add(word, EXCLUDED, False)
+
+        for category, phrases in (PET_TOPIC_CATEGORIES if categories is None else categories).items():
+            for phrase in phrases:
+                self._add(phrase, category, True)
+                core = _PHRASE_SUFFIX.sub("", _PHRASE_PREFIX.sub("", phrase))
+                # "宠物版春节" 这类话题的核心词不是宠物词，不参与类别判断
+                if len(core) >= 2 and core != phrase and category != "热点结合":
+                    self._add(core, category, False)
+
+        self._build()
+
+    def _add(self, word: str, category: str, implies_pet: bool) -> None:
+        """把一个关键词加入字典树"""
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self.patterns))
+        self.patterns.append((word, category, implies_pet))
+
+    def _build(self) -> None:
+        """按层（BFS）计算失败指针，并合并失败链上的输出"""
+        # 第一层节点的失败指针都指向根节点
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """扫描文本，逐个返回 (起始位置, 模式ID)"""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for pattern_id in self._out[state]:
+                yield i - len(self.patterns[pattern_id][0]) + 1, pattern_id
+
+    def classify(self, text: str, assume_pet: bool = False) -> Dict:
+        """
+        判断话题是否与宠物相关及对应的问题类别
+        返回 {"is_pet", "pet_category"（没有具体类别时为None）, "keywords"}
+        类别按命中关键词的总长度选择，越具体的词权重越大
+        assume_pet=True 用于本身就是宠物内容的主题（如"日常护理知识"），不要求命中宠物词
+        """
+        matches = list(self.find(text))
+        # 排除词覆盖的范围（如 "熊猫"、"狗仔"），其中的宠物词不计入
+        excluded = [
+            (start, start + len(self.patterns[pattern_id][0]))
+            for start, pattern_id in matches if self.patterns[pattern_id][1] == EXCLUDED
+        ]
+
+        is_pet = assume_pet
+        keywords: List[str] = []
+        weights: Dict[str, int] = {}
+        for start, pattern_id in matches:
+            word, category, implies_pet = self.patterns[pattern_id]
+            end = start + len(word)
+            if category == EXCLUDED or any(lo <= start and end <= hi for lo, hi in excluded):
+                continue
+            is_pet = is_pet or implies_pet
+            if word not in keywords:
+                keywords.append(word)
+            if category != GENERAL:
+                weights[category] = weights.get(category, 0) + len(word)
+
+        pet_category: Optional[str] = None
+        if is_pet and weights:
+            pet_category = max(weights, key=weights.get)
+        return {"is_pet": is_pet, "pet_category": pet_category, "keywords": keywords}
+
+    def tag(self, topics: List[Dict]) -> List[Dict]:
+        """
+        给话题补充 pet_category 和 pet_keywords，命中宠物词的话题归为"宠物相关"
+        已经带有 pet_category 字段的话题保持不变
+        """
+        tagged = []
+        for topic in topics:
+            if "pet_category" in topic:
+                tagged.append(topic)
+                continue
+            result = self.classify(topic["topic"])
+            category = PET_CATEGORY if result["is_pet"] else topic.get("category")
+            tagged.append({
+                **topic,
+                "category": category,
+                "pet_category": result["pet_category"],
+                "pet_keywords": result["keywords"]
+            })
+        return tagged
+
+
+@lru_cache(maxsize=None)
+def get_matcher() -> PetMatcher:
+    """进程内共享的匹配器（只构建一次）"""
+    return PetMatcher()
@@ -19,6 +19,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import (
     XIAOHONGSHU_COOKIE, WECHAT_APPID, WECHAT_APPSECRET, get_today_date
 )
+from http_client import get_client, timeout_for
+from resilience import retry_sync, classify_error, WechatAPIError, AUTH
 
 
 class XiaohongshuPublisher:
@@ -137,14 +139,40 @@ class WechatPublisher:
         self.appsecret = WECHAT_APPSECRET
         self.access_token = None
 
+    def _request(self, method: str, url: str, endpoint: str = "wechat", with_token: bool = True, **kwargs) -> dict:
+        """
+        带重试和熔断调用公众号接口，errcode非0时抛出WechatAPIError
+        access_token失效时重新获取一次后重试
+        """
+        base_params = kwargs.pop("params", None) or {}
+
+        def send() -> dict:
+            # 每次尝试都使用最新的access_token
+            params = dict(base_params, access_token=self.access_token) if with_token else base_params
+            response = get_client(url).request(method, url, params=params, timeout=timeout_for(endpoint), **kwargs)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("errcode"):
+                raise WechatAPIError(data)
+            return data
+
+        try:
+            return retry_sync(send, "wechat")
+        except WechatAPIError as e:
+            if not with_token or classify_error(e) != AUTH:
+                raise
+            print("🔑 access_token已失效，重新获取...")
+            self.access_token = None
+            if not self.get_access_token():
+                raise
+            return retry_sync(send, "wechat")
+
     def get_access_token(self) -> Optional[str]:
         """获取access_token"""
         if not self.appid or not self.appsecret:
             print("❌ 未配置公众号APPID或APPSECRET")
             return None
 
-        import requests
-        
         url = "https://api.weixin.qq.com/cgi-bin/token"
         params = {
             "grant_type": "client_credential",
@@ -154,8 +182,7 @@ class WechatPublisher:
 
         try:
             print("🔑 获取access_token...")
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            data = self._request("GET", url, endpoint="wechat_token", with_token=False, params=params)
 
             if "access_token" in data:
                 self.access_token = data["access_token"]
@@ -165,6 +192,9 @@ class WechatPublisher:
                 print(f"❌ 获取失败: {data.get('errmsg', '未知错误')}")
                 return None
 
+        except WechatAPIError as e:
+            print(f"❌ 获取失败: {e.data.get('errmsg', '未知错误')}")
+            return None
         except Exception as e:
             print(f"❌ 请求失败: {e}")
             return None
@@ -175,17 +205,14 @@ class WechatPublisher:
             if not self.get_access_token():
                 return None
 
-        import requests
-        
         url = f"https://api.weixin.qq.com/cgi-bin/media/uploadimg"
-        params = {"access_token": self.access_token}
 
         try:
             print(f"📤 上传图片: {image_path}")
+            # 读入内存，重试时可以重复发送
             with open(image_path, 'rb') as f:
-                files = {'media': f}
-                response = requests.post(url, params=params, files=files, timeout=30)
-                data = response.json()
+                files = {'media': (Path(image_path).name, f.read())}
+            data = self._request("POST", url, files=files)
 
             if "media_id" in data:
                 print("✅ 图片上传成功")
@@ -194,6 +221,9 @@ class WechatPublisher:
                 print(f"❌ 图片上传失败: {data}")
                 return None
 
+        except WechatAPIError as e:
+            print(f"❌ 图片上传失败: {e.data}")
+            return None
         except Exception as e:
             print(f"❌ 上传失败: {e}")
             return None
@@ -204,10 +234,7 @@ class WechatPublisher:
             if not self.get_access_token():
                 return None
 
-        import requests
-
         url = f"https://api.weixin.qq.com/cgi-bin/draft/add"
-        params = {"access_token": self.access_token}
 
         article = {
             "title": title,
@@ -222,17 +249,15 @@ class WechatPublisher:
 
         try:
             print("📝 创建草稿...")
-            response = requests.post(url, params=params, json=payload, timeout=30)
-            data = response.json()
+            data = self._request("POST", url, json=payload)
 
-            if data.get("errcode") == 0:
-                media_id = data["media_id"]
-                print("✅ 草稿创建成功")
-                return media_id
-            else:
-                print(f"❌ 创建失败: {data}")
-                return None
+            media_id = data["media_id"]
+            print("✅ 草稿创建成功")
+            return media_id
 
+        except WechatAPIError as e:
+            print(f"❌ 创建失败: {e.data}")
+            return None
         except Exception as e:
             print(f"❌ 创建草稿失败: {e}")
             return None
@@ -243,24 +268,18 @@ class WechatPublisher:
             if not self.get_access_token():
                 return False
 
-        import requests
-
         url = f"https://api.weixin.qq.com/cgi-bin/draft/publish"
-        params = {"access_token": self.access_token}
         payload = {"media_id": media_id}
 
         try:
             print("📤 发布草稿...")
-            response = requests.post(url, params=params, json=payload, timeout=30)
-            data = response.json()
-
-            if data.get("errcode") == 0:
-                print("✅ 草稿发布成功")
-                return True
-            else:
-                print(f"❌ 发布失败: {data}")
-                return False
+            self._request("POST", url, json=payload)
+            print("✅ 草稿发布成功")
+            return True
 
+        except WechatAPIError as e:
+            print(f"❌ 发布失败: {e.data}")
+            return False
         except Exception as e:
             print(f"❌ 发布失败: {e}")
             return False
@@ -323,6 +342,29 @@ def load_content(file_path: str) -> Optional[dict]:
     return None
 
 
+def find_content_images(content: dict) -> List[str]:
+    """
+    获取帖子对应的图片路径
+    优先使用生成器记录在帖子JSON中的图片列表，旧内容则回退到按日期目录查找
+    """
+    project_root = Path(__file__).parent.parent
+
+    if content.get("images"):
+        return [
+            str(project_root / img)
+            for img in content["images"]
+            if (project_root / img).exists()
+        ]
+
+    meta = content.get("meta", {})
+    date_str = meta.get("date", get_today_date())
+    images_dir = project_root / "content" / "xiaohongshu" / date_str
+
+    if not images_dir.exists():
+        return []
+    return [str(img) for img in sorted(images_dir.glob("*.png"))]
+
+
 def find_latest_content() -> Optional[dict]:
     """查找最新的内容文件"""
     records_dir = Path(__file__).parent.parent / "data" / "records"
@@ -407,15 +449,8 @@ def main():
     full_content = f"{intro}\n\n{main_body}\n\n{cta}"
 
     # 获取图片路径
-    image_paths = []
-    meta = content.get("meta", {})
-    date_str = meta.get("date", get_today_date())
-    images_dir = Path(__file__).parent.parent / "content" / "xiaohongshu" / date_str
-    
-    if images_dir.exists():
-        for img in sorted(images_dir.glob("*.png")):
-            image_paths.append(str(img))
-        print(f"📷 找到 {len(image_paths)} 张图片")
+    image_paths = find_content_images(content)
+    print(f"📷 找到 {len(image_paths)} 张图片")
 
     results = {}
 
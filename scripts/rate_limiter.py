@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🚦 服务商限流器
+令牌桶状态保存在SQLite中，同一台机器上的多个生成进程共享同一份配额
+每个服务商/模型分别限制每分钟请求数(rpm)和每分钟token数(tpm)，
+桶容量只允许很短的突发，请求被均匀地摊开，避免触发服务商的限流惩罚
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+from typing import Dict, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import RATE_LIMIT_CONFIG
+from storage import sqlite_transaction
+
+
+class RateLimiter:
+    """跨进程令牌桶限流器"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or RATE_LIMIT_CONFIG["path"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def limits_for(name: str, model: str) -> Optional[Dict]:
+        """获取服务商/模型的限额（先找 名称:模型，再找名称），未配置时返回None"""
+        limits = RATE_LIMIT_CONFIG["limits"]
+        return limits.get(f"{name}:{model}") or limits.get(name)
+
+    @staticmethod
+    def _buckets(name: str, model: str, limits: Dict, requests: int, tokens: int) -> Dict[str, tuple]:
+        """本次请求涉及的令牌桶：桶名 → (每秒补充量, 容量, 本次消耗)"""
+        burst = RATE_LIMIT_CONFIG["burst_seconds"]
+        buckets = {}
+        for unit, amount in (("rpm", requests), ("tpm", tokens)):
+            per_minute = limits.get(unit)
+            if not per_minute or amount <= 0:
+                continue
+            rate = per_minute / 60
+            capacity = max(rate * burst, 1)
+            # 单次消耗超过桶容量时按容量计，避免永远等不到
+            buckets[f"{name}:{model}:{unit}"] = (rate, capacity, min(amount, capacity))
+        return buckets
+
+    def _try_acquire(self, buckets: Dict[str, tuple]) -> float:
+        """所有桶都有足够令牌时一起扣减并返回0，否则不扣减，返回需要等待的秒数"""
+        now = time.time()
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            levels, wait = {}, 0.0
+            for bucket, (rate, capacity, amount) in buckets.items():
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (bucket,)).fetchone()
+                level = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                levels[bucket] = level
+                if level < amount:
+                    wait = max(wait, (amount - level) / rate)
+
+            for bucket, (rate, capacity, amount) in buckets.items():
+                level = levels[bucket] - (amount if wait == 0 else 0)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (bucket, level, now)
+                )
+        return wait
+
+    async def acquire(self, name: str, model: str, requests: int = 1, tokens: int = 0) -> None:
+        """等待直到配额足够，然后扣减请求数和预估token数"""
+        limits = self.limits_for(name, model)
+        if not limits:
+            return
+
+        buckets = self._buckets(name, model, limits, requests, tokens)
+        waited = 0.0
+        while buckets:
+            wait = await asyncio.to_thread(self._try_acquire, buckets)
+            if wait == 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+
+        if waited >= 1:
+            print(f"🚦 {name} ({model}) 限流等待 {waited:.1f}s")
+
+    def settle(self, name: str, model: str, estimated: int, actual: int) -> None:
+        """请求结束后按实际token用量修正tpm桶（多退少补）"""
+        limits = self.limits_for(name, model)
+        if not limits or not limits.get("tpm") or actual == estimated:
+            return
+
+        bucket = f"{name}:{model}:tpm"
+        rate = limits["tpm"] / 60
+        capacity = max(rate * RATE_LIMIT_CONFIG["burst_seconds"], 1)
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (bucket,)).fetchone()
+            if row is None:
+                return
+            # 允许透支为负数，之后的请求会相应地多等一会
+            level = min(capacity, row[0] + estimated - actual)
+            conn.execute("UPDATE buckets SET tokens = ? WHERE name = ?", (level, bucket))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🛡️ 请求重试与熔断
+- 错误分类：限流(429)、服务端错误(5xx)、超时、网络、认证、其他客户端错误
+- 可重试的错误按 decorrelated jitter 退避重试，优先遵循 Retry-After
+- 每个服务商一个熔断器，连续失败后短路，直接交给回退/对冲，不再空等超时
+"""
+
+import sys
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import RETRY_CONFIG
+
+
+# 错误类型
+RATE_LIMIT = "rate_limit"
+SERVER = "server"
+TIMEOUT = "timeout"
+NETWORK = "network"
+AUTH = "auth"
+CLIENT = "client"
+
+# 计入熔断的错误类型（说明服务本身不可用，而不是请求有问题）
+BREAKER_KINDS = {SERVER, TIMEOUT, NETWORK}
+
+# 公众号接口通过errcode返回错误
+WECHAT_ERRCODE_KINDS = {
+    -1: SERVER,  # 系统繁忙
+    40001: AUTH,  # access_token无效
+    40014: AUTH,  # 不合法的access_token
+    42001: AUTH,  # access_token超时
+    45009: RATE_LIMIT,  # 接口调用超过限制
+    45011: RATE_LIMIT  # API调用太频繁
+}
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求被直接拒绝"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} 已熔断，{retry_in:.0f}s 后重试")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class WechatAPIError(Exception):
+    """公众号接口返回了非0的errcode"""
+
+    def __init__(self, data: Dict):
+        super().__init__(f"errcode={data.get('errcode')} errmsg={data.get('errmsg')}")
+        self.errcode = data.get("errcode")
+        self.data = data
+
+
+def classify_error(error: Exception) -> str:
+    """判断错误类型"""
+    if isinstance(error, WechatAPIError):
+        return WECHAT_ERRCODE_KINDS.get(error.errcode, CLIENT)
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429:
+            return RATE_LIMIT
+        if status in (401, 403):
+            return AUTH
+        if status >= 500:
+            return SERVER
+        return CLIENT
+    if isinstance(error, httpx.TimeoutException):
+        return TIMEOUT
+    if isinstance(error, httpx.TransportError):
+        return NETWORK
+    return CLIENT
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """解析响应中的Retry-After（秒数或HTTP日期），没有时返回None"""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却后放行一次试探请求"""
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """请求前检查，熔断中则抛出CircuitOpenError"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.recovery_timeout or self._probing:
+                raise CircuitOpenError(self.name, max(0.0, self.recovery_timeout - elapsed))
+            # 冷却结束，放行一次试探请求（半开）
+            self._probing = True
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"✅ {self.name} 已恢复，关闭熔断")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def abandon(self) -> None:
+        """请求被取消或因其他原因中断，释放半开状态的试探名额"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"🚫 {self.name} 连续失败 {self.failures} 次，熔断 {self.recovery_timeout}s")
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """获取服务商的熔断器（进程内共享）"""
+    with _breakers_lock:
+        if name not in _breakers:
+            config = RETRY_CONFIG["breaker"]
+            _breakers[name] = CircuitBreaker(name, config["failure_threshold"], config["recovery_timeout"])
+        return _breakers[name]
+
+
+def _next_delay(error: Exception, previous: float) -> Optional[float]:
+    """
+    下一次重试前的等待时间（decorrelated jitter），
+    Retry-After超过上限时返回None，表示不再等待
+    """
+    base, cap = RETRY_CONFIG["base_delay"], RETRY_CONFIG["max_delay"]
+    delay = min(cap, random.uniform(base, max(base, previous * 3)))
+    server_delay = retry_after(error)
+    if server_delay is not None:
+        if server_delay > RETRY_CONFIG["max_retry_after"]:
+            return None
+        delay = max(delay, server_delay)
+    return delay
+
+
+def _should_retry(kind: str, attempt: int) -> bool:
+    """该类型的错误在第attempt次失败后是否还能重试"""
+    return attempt < RETRY_CONFIG["max_attempts"].get(kind, 1)
+
+
+def _on_failure(breaker: CircuitBreaker, error: Exception, attempt: int, previous: float) -> Optional[float]:
+    """记录一次失败，返回重试前的等待时间，不再重试时返回None"""
+    kind = classify_error(error)
+    if kind in BREAKER_KINDS:
+        breaker.record_failure()
+    else:
+        # 限流、认证等错误说明服务可达
+        breaker.record_success()
+
+    # 熔断后不再原地重试，交给备用服务商
+    if breaker.is_open or not _should_retry(kind, attempt):
+        return None
+    delay = _next_delay(error, previous)
+    if delay is not None:
+        print(f"🔁 {breaker.name} {kind} 错误，{delay:.1f}s 后第{attempt + 1}次尝试: {error}")
+    return delay
+
+
+async def retry_async(func: Callable[[], Awaitable[Any]], name: str) -> Any:
+    """带重试和熔断执行异步请求，func每次调用发起一次新请求"""
+    breaker = get_breaker(name)
+    attempt, delay = 0, RETRY_CONFIG["base_delay"]
+    while True:
+        breaker.before_call()
+        attempt += 1
+        try:
+            result = await func()
+        except (httpx.HTTPError, WechatAPIError) as e:
+            delay = _on_failure(breaker, e, attempt, delay)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record_success()
+        return result
+
+
+def retry_sync(func: Callable[[], Any], name: str) -> Any:
+    """带重试和熔断执行同步请求，func每次调用发起一次新请求"""
+    breaker = get_breaker(name)
+    attempt, delay = 0, RETRY_CONFIG["base_delay"]
+    while True:
+        breaker.before_call()
+        attempt += 1
+        try:
+            result = func()
+        except (httpx.HTTPError, WechatAPIError) as e:
+            delay = _on_failure(breaker, e, attempt, delay)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📐 结构化输出Schema
+用pydantic定义大模型需要返回的JSON结构：
+- 生成请求时转换为服务商的 response_format（JSON Schema / JSON模式）
+- 收到结果后统一校验，只把缺失或不合格的字段交给修复流程
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model, field_validator
+
+
+class BodyContent(BaseModel):
+    """笔记正文"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    intro: str = Field(description="开头引入段落（2-3句话）")
+    body: str = Field(description="正文主体，包含互动引导和分级说明")
+    cta: str = Field(description="行动号召和福利说明")
+    hashtags: List[str] = Field(description="5个话题标签，不带#号")
+
+    @field_validator("intro", "body", "cta")
+    @classmethod
+    def not_blank(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("不能为空")
+        return value
+
+    @field_validator("hashtags")
+    @classmethod
+    def clean_hashtags(cls, value: List[str]) -> List[str]:
+        tags = [tag.strip().lstrip("#").strip() for tag in value]
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            raise ValueError("至少需要1个标签")
+        return tags
+
+
+class PostContent(BodyContent):
+    """正文和配图提示词（合并生成）"""
+
+    main_poster_prompt: str = Field(description="主图的英文图像生成提示词")
+    question_card_prompts: List[str] = Field(description="按顺序排列的每张问题卡片的英文图像生成提示词")
+
+    @field_validator("main_poster_prompt")
+    @classmethod
+    def prompt_not_blank(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("不能为空")
+        return value
+
+
+def validate_partial(model: Type[BaseModel], data: Optional[Dict]) -> Tuple[Optional[BaseModel], Dict, List[str]]:
+    """
+    校验模型输出，返回 (通过校验的对象或None, 合格的字段, 缺失或不合格的字段名)
+    """
+    data = data if isinstance(data, dict) else {}
+    try:
+        return model.model_validate(data), data, []
+    except ValidationError as e:
+        invalid = []
+        for error in e.errors():
+            field = error["loc"][0] if error["loc"] else None
+            if field in model.model_fields and field not in invalid:
+                invalid.append(field)
+        valid = {k: v for k, v in data.items() if k in model.model_fields and k not in invalid}
+        return None, valid, invalid
+
+
+def partial_model(model: Type[BaseModel], fields: List[str]) -> Type[BaseModel]:
+    """只包含部分字段的Schema（用于修复请求的response_format）"""
+    return create_model(
+        f"{model.__name__}Repair",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+
+def field_descriptions(model: Type[BaseModel], fields: List[str]) -> str:
+    """字段说明（用于修复提示词）"""
+    return "\n".join(f'- "{name}": {model.model_fields[name].description}' for name in fields)
+
+
+def _schema_name(model: Type[BaseModel]) -> str:
+    """类名转为 snake_case 作为schema名称"""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", model.__name__).lower()
+
+
+def response_format_for(model: Type[BaseModel], mode: Optional[str]) -> Optional[Dict]:
+    """
+    生成请求参数 response_format
+    mode: json_schema（按Schema严格约束）、json_object（只保证输出JSON）、none/None（不约束）
+    """
+    if mode == "json_schema":
+        schema = model.model_json_schema()
+        schema["additionalProperties"] = False
+        schema["required"] = list(model.model_fields)
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": _schema_name(model), "schema": schema, "strict": True}
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
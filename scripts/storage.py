@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💾 本地状态存储
+缓存、统计、检查点等模块共用的两种写法：
+- SQLite事务：打开连接，退出时提交（异常时回滚）并关闭，多个进程写入时等待锁
+- JSON状态文件：写入临时文件后原子替换，崩溃时不会留下写了一半的文件
+"""
+
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+
+@contextmanager
+def sqlite_transaction(path: Path, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    在一个事务中访问SQLite数据库
+    immediate=True 时开始就加写锁，先读后写（抢租约、扣减配额、合并统计）在多个进程之间是原子的
+    """
+    if not immediate:
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+        return
+
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def write_json_atomic(path: Path, data: Any, **dump_options) -> None:
+    """写入临时文件后原子替换（临时文件名带进程号，多个进程同时写入时互不覆盖）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_options)
+    os.replace(tmp_path, path)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧩 流式JSON解析
+大模型流式输出时逐段喂入，顶层对象的每个字段一完整就解析出来
+- 开头的说明文字或```json代码块标记在限定长度内允许出现
+- 字段无法解析、开头迟迟不出现JSON时立即判定格式异常，调用方可以提前取消请求
+- 顶层对象闭合后即视为完成，不必等待流结束；流结束时仍没有可解析的内容同样判定格式异常
+"""
+
+import sys
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import STREAM_CONFIG
+
+
+class MalformedOutputError(ValueError):
+    """模型输出不是预期的JSON对象"""
+
+
+class IncrementalJSONParser:
+    """顶层JSON对象的增量解析器"""
+
+    def __init__(self, expected_fields: Iterable[str] = None, max_prefix_chars: int = None):
+        self.expected_fields = set(expected_fields or ())
+        self.max_prefix_chars = max_prefix_chars or STREAM_CONFIG["max_prefix_chars"]
+
+        self.text = ""  # 已收到的全部文本
+        self.fields: Dict = {}  # 已完整解析的顶层字段
+        self.complete = False
+
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._segment_start = 0
+
+    @property
+    def missing_fields(self) -> set:
+        """尚未收到的预期字段"""
+        return self.expected_fields - self.fields.keys()
+
+    @property
+    def json_text(self) -> str:
+        """去掉前后说明文字的JSON对象文本（未完成时返回已收到的全部文本）"""
+        if not self.complete:
+            return self.text
+        return self.text[self._start:self._pos]
+
+    def result(self) -> Optional[Dict]:
+        """完整解析出的对象，未完成时返回None"""
+        return dict(self.fields) if self.complete else None
+
+    def feed(self, chunk: str) -> None:
+        """喂入一段新文本，格式异常时抛出MalformedOutputError"""
+        self.text += chunk
+        if self.complete:
+            return
+
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = self._pos
+                    self._depth = 1
+                    self._segment_start = self._pos + 1
+                elif self._pos >= self.max_prefix_chars:
+                    raise MalformedOutputError(f"前{self.max_prefix_chars}个字符内没有出现JSON对象")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if ch != "}":
+                        raise MalformedOutputError("括号不匹配")
+                    self._close_field(self._pos)
+                    self.complete = True
+                    self._pos += 1
+                    return
+            elif ch == "," and self._depth == 1:
+                self._close_field(self._pos)
+                self._segment_start = self._pos + 1
+
+            self._pos += 1
+
+    def finish(self) -> str:
+        """
+        输出结束时调用，返回JSON对象文本
+        被截断的输出只要有完整的字段就交给调用方补全；一个字段都没有时抛出MalformedOutputError
+        """
+        if not self.complete and not self.fields:
+            if self._start is None:
+                raise MalformedOutputError("输出结束时没有出现JSON对象")
+            raise MalformedOutputError("输出结束时JSON对象不完整，没有可解析的字段")
+        return self.json_text
+
+    def _close_field(self, end: int) -> None:
+        """解析一个顶层 "键": 值 片段"""
+        segment = self.text[self._segment_start:end].strip()
+        if not segment:
+            return
+        try:
+            self.fields.update(json.loads("{" + segment + "}"))
+        except json.JSONDecodeError:
+            raise MalformedOutputError(f"字段无法解析: {segment[:50]}")
+
+
+def parse_partial(text: str) -> Dict:
+    """从可能被截断或格式有误的输出中取出已完整的顶层字段"""
+    parser = IncrementalJSONParser(max_prefix_chars=len(text) + 1)
+    try:
+        parser.feed(text)
+    except MalformedOutputError:
+        pass
+    return parser.fields
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧮 Token预算
+- 按服务商估算提示词的token数（OpenAI安装tiktoken时精确计数，豆包按字符估算）
+- 按预期输出长度（字数、JSON字段、配图提示词数量）计算max_tokens
+- 提示词超出预算时从末尾裁掉可选的上下文（如热点话题）
+"""
+
+import re
+import sys
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import TOKEN_BUDGET_CONFIG
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# 中日韩文字、全角标点
+_CJK = re.compile(r"[　-〿㐀-䶿一-鿿豈-﫿＀-￯]")
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """
+    OpenAI模型对应的分词器，未知模型使用通用分词器
+    首次使用时tiktoken可能需要下载词表，加载失败时返回None（本进程内改为按字符估算）
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️ 加载tiktoken分词器失败，改为按字符估算token数: {type(e).__name__} {e}")
+        return None
+
+
+def count_tokens(text: str, provider: str = "volcano", model: str = None) -> int:
+    """估算一段文本的token数"""
+    if not text:
+        return 0
+    encoding = _encoding(model) if provider == "openai" and model and TIKTOKEN_AVAILABLE else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    cjk = len(_CJK.findall(text))
+    other = len(text) - cjk
+    return math.ceil(cjk * TOKEN_BUDGET_CONFIG["cjk_tokens_per_char"]
+                     + other / TOKEN_BUDGET_CONFIG["other_chars_per_token"])
+
+
+def count_messages(messages: List[Dict], provider: str = "volcano", model: str = None) -> int:
+    """估算对话消息的token数（包括每条消息的格式开销）"""
+    overhead = TOKEN_BUDGET_CONFIG["message_overhead"]
+    return sum(count_tokens(m["content"], provider, model) + overhead for m in messages)
+
+
+def completion_tokens(words: int = 0, fields: int = 0, hashtags: bool = False, image_prompts: int = 0) -> int:
+    """
+    按预期输出计算max_tokens
+    words: 中文正文字数上限；fields: JSON字段数；hashtags: 是否输出话题标签；image_prompts: 英文配图提示词段数
+    """
+    config = TOKEN_BUDGET_CONFIG
+    expected = (words * config["cjk_tokens_per_char"]
+                + fields * config["field_overhead"]
+                + (config["hashtag_tokens"] if hashtags else 0)
+                + image_prompts * config["image_prompt_tokens"])
+    return math.ceil(expected * config["output_margin"])
+
+
+def fit_context(render: Callable[[Sequence], str], context: Sequence, budget: int,
+                count: Callable[[str], int]) -> Tuple[str, int]:
+    """
+    渲染提示词，token数超出预算时从末尾逐条去掉可选上下文
+    返回 (提示词, 保留的上下文条数)；全部去掉后仍超出预算时返回不含上下文的提示词
+    """
+    kept = len(context)
+    text = render(context)
+    while kept and count(text) > budget:
+        kept -= 1
+        text = render(context[:kept])
+    if kept < len(context):
+        print(f"✂️ 提示词超出预算（{budget} tokens），去掉 {len(context) - kept} 条可选上下文")
+    return text, kept
+
+
+def cap_max_tokens(limit: int, expected: Optional[int]) -> int:
+    """按预期输出收紧max_tokens，不超过路由配置的上限"""
+    if not expected or not TOKEN_BUDGET_CONFIG["enabled"]:
+        return limit
+    return min(limit, expected)
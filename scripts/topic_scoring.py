@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 热点话题打分
+整批话题用NumPy向量化计算得分，一次取出得分最高的k个：
+得分 = 热度 × 来源权重 × 宠物相关权重 × 时效衰减
+权重来自 HOT_TOPIC_CONFIG（source_weights、pet_related_weight、general_hot_weight、recency_half_life）
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HOT_TOPIC_CONFIG
+from pet_matcher import PET_CATEGORY
+
+
+def score_topics(topics: List[Dict], now: float = None) -> np.ndarray:
+    """计算每个话题的得分（与topics顺序一致）"""
+    config = HOT_TOPIC_CONFIG
+    now = now or time.time()
+    count = len(topics)
+
+    heat = np.fromiter((t.get("heat", 0) for t in topics), dtype=np.float64, count=count)
+    source_weights = config["source_weights"]
+    source_weight = np.fromiter((source_weights.get(t.get("source"), 1.0) for t in topics),
+                                dtype=np.float64, count=count)
+    is_pet = np.fromiter((t.get("category") == PET_CATEGORY for t in topics), dtype=bool, count=count)
+    # 没有抓取时间的话题（如模拟热点）视为刚抓取
+    age = now - np.fromiter((t.get("fetched_at", now) for t in topics), dtype=np.float64, count=count)
+
+    relevance = np.where(is_pet, config["pet_related_weight"], config["general_hot_weight"])
+    decay = np.exp2(-np.clip(age, 0, None) / config["recency_half_life"])
+    return heat * source_weight * relevance * decay
+
+
+def rank_topics(topics: List[Dict], k: int = None, now: float = None) -> List[Dict]:
+    """
+    返回得分最高的k个话题（按得分从高到低，附带score字段），k为空时返回全部
+    """
+    if not topics:
+        return []
+    scores = score_topics(topics, now)
+
+    k = len(topics) if k is None else min(k, len(topics))
+    if k <= 0:
+        return []
+    if k < len(topics):
+        # 先用argpartition取出前k个（O(n)），只对这k个排序
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(topics))
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    return [{**topics[i], "score": round(float(scores[i]), 2)} for i in top]
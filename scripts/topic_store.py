@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ 热榜缓存
+按 来源+时间段（refresh_interval）保存抓取到的热点，保存在SQLite中，
+早晚生成、批量生成和常驻进程等多个进程共享：
+- 未过期：直接返回
+- 已过期：先返回旧数据，同时由抢到刷新租约的一个进程在后台刷新（stale-while-revalidate）
+- 没有可用数据：等待抓取
+历史数据保留 CONTENT_CONFIG["hot_topic_days"] 天
+"""
+
+import sys
+import json
+import time
+import asyncio
+import weakref
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HOT_TOPIC_CONFIG, CONTENT_CONFIG
+from hot_topic_fetchers import FETCH_ERRORS
+from storage import sqlite_transaction
+
+
+class TopicStore:
+    """跨进程热榜缓存"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or HOT_TOPIC_CONFIG["store_path"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval = HOT_TOPIC_CONFIG["refresh_interval"]
+        # 后台刷新任务（保留引用，避免被垃圾回收）
+        self._background: Set[asyncio.Task] = set()
+        # 冷启动时正在进行的抓取：事件循环 -> {来源: Task}，同一进程内并发的调用方共用
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS topics (
+                    source TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    topics TEXT NOT NULL,
+                    PRIMARY KEY (source, bucket)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS refresh_leases (
+                    source TEXT PRIMARY KEY,
+                    until REAL NOT NULL
+                )
+                """
+            )
+
+    def latest(self, source: str) -> Optional[Dict]:
+        """最近一次抓取的结果 {"topics", "fetched_at"}，超过max_stale时返回None"""
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            row = conn.execute(
+                "SELECT fetched_at, topics FROM topics WHERE source = ? ORDER BY fetched_at DESC LIMIT 1",
+                (source,)
+            ).fetchone()
+        if not row or time.time() - row[0] > HOT_TOPIC_CONFIG["max_stale"]:
+            return None
+        return {"fetched_at": row[0], "topics": json.loads(row[1])}
+
+    def put(self, source: str, topics: List[Dict], fetched_at: float = None) -> None:
+        """保存一次抓取结果（同一时间段内覆盖），清理超过保留天数的历史"""
+        fetched_at = fetched_at or time.time()
+        keep_after = fetched_at - CONTENT_CONFIG["hot_topic_days"] * 86400
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO topics (source, bucket, fetched_at, topics) VALUES (?, ?, ?, ?)",
+                (source, int(fetched_at // self.refresh_interval), fetched_at,
+                 json.dumps(topics, ensure_ascii=False))
+            )
+            conn.execute("DELETE FROM topics WHERE fetched_at < ?", (keep_after,))
+
+    def history(self, since: float, sources: List[str] = None) -> List[Dict]:
+        """指定时间之后的所有抓取记录 [{"source", "fetched_at", "topics"}]，按时间排序"""
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            rows = conn.execute(
+                "SELECT source, fetched_at, topics FROM topics WHERE fetched_at >= ? ORDER BY fetched_at",
+                (since,)
+            ).fetchall()
+        return [
+            {"source": source, "fetched_at": fetched_at, "topics": json.loads(topics)}
+            for source, fetched_at, topics in rows
+            if sources is None or source in sources
+        ]
+
+    def claim(self, source: str) -> bool:
+        """抢刷新租约，其他进程正在刷新或刚刷新失败时返回False"""
+        now = time.time()
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            row = conn.execute("SELECT until FROM refresh_leases WHERE source = ?", (source,)).fetchone()
+            if row and row[0] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO refresh_leases (source, until) VALUES (?, ?)",
+                (source, now + HOT_TOPIC_CONFIG["refresh_lease"])
+            )
+            return True
+
+    def release(self, source: str, retry_in: float = 0) -> None:
+        """释放刷新租约，retry_in 秒内不再刷新"""
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO refresh_leases (source, until) VALUES (?, ?)",
+                (source, time.time() + retry_in)
+            )
+
+    async def _refresh(self, source: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        """抓取并保存，失败时保留旧数据并在一段时间内不再重试（调用方需先抢到租约）"""
+        retry_in = HOT_TOPIC_CONFIG["retry_after_failure"]
+        try:
+            # 每个话题记录抓取时间，供打分时计算时效衰减
+            fetched_at = time.time()
+            topics = [{**topic, "fetched_at": fetched_at} for topic in await fetch()]
+            self.put(source, topics, fetched_at)
+            retry_in = 0
+            print(f"📡 热榜已刷新: {source} ({len(topics)}条)")
+            return topics
+        except asyncio.CancelledError:
+            # 事件循环关闭时被取消，不算失败，其他进程可以立即接手
+            retry_in = 0
+            raise
+        finally:
+            self.release(source, retry_in)
+
+    async def _refresh_in_background(self, source: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> None:
+        try:
+            await self._refresh(source, fetch)
+        except FETCH_ERRORS as e:
+            print(f"⚠️ 后台刷新热榜失败，继续使用旧数据: {source}: {type(e).__name__} {e}")
+
+    async def _fetch_cold(self, source: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        try:
+            return await self._refresh(source, fetch)
+        except FETCH_ERRORS as e:
+            print(f"⚠️ 热榜获取失败: {source}: {type(e).__name__} {e}")
+            return []
+
+    async def get(self, source: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        """
+        获取某个来源的热点
+        已过期时立即返回旧数据并在后台刷新；没有可用数据时等待抓取，失败时返回空列表
+        """
+        entry = self.latest(source)
+        if entry and time.time() - entry["fetched_at"] < self.refresh_interval:
+            return entry["topics"]
+
+        if entry:
+            if self.claim(source):
+                task = asyncio.create_task(self._refresh_in_background(source, fetch))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return entry["topics"]
+
+        # 冷启动：没有旧数据可用，只能等待；其他进程正在抓取或刚失败时直接返回空列表
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        task = inflight.get(source)
+        if task is None:
+            if not self.claim(source):
+                return []
+            task = asyncio.create_task(self._fetch_cold(source, fetch))
+            inflight[source] = task
+            task.add_done_callback(lambda _: inflight.pop(source, None))
+        return await asyncio.shield(task)
+
+    async def drain(self) -> None:
+        """等待后台刷新完成（短生命周期的同步调用在关闭事件循环前使用）"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
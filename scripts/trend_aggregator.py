@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 热点趋势统计
+每保存一次热点快照就增量更新最近 CONTENT_CONFIG["hot_topic_days"] 天的话题统计，不重新扫描历史记录：
+- 每个话题：按天的最高热度、累计热度、上升速度、首次/最近出现时间、出现次数
+- 更新时顺便算好"上升最快的话题"榜单，生成内容时直接读取（本周上升的宠物话题）
+统计和榜单保存在热榜缓存的SQLite数据库中，多个进程共享
+"""
+
+import sys
+import json
+import time
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HOT_TOPIC_CONFIG, CONTENT_CONFIG
+from pet_matcher import PET_CATEGORY
+from storage import sqlite_transaction
+
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def _day(timestamp: float) -> str:
+    """时间戳对应的日期（本地时间，与热点记录文件一致）"""
+    return datetime.fromtimestamp(timestamp).strftime(DAY_FORMAT)
+
+
+def _day_start(timestamp: float) -> float:
+    """时间戳当天0点的时间戳"""
+    return datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class TrendAggregator:
+    """滚动窗口热点趋势统计"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or HOT_TOPIC_CONFIG["store_path"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.window_days = CONTENT_CONFIG["hot_topic_days"]
+        self.ranking_size = HOT_TOPIC_CONFIG["trend_ranking_size"]
+
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS topic_trends (
+                    topic TEXT PRIMARY KEY,
+                    category TEXT,
+                    pet_category TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    sightings INTEGER NOT NULL,
+                    days TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_trends_last_seen ON topic_trends (last_seen)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trend_rankings (
+                    name TEXT PRIMARY KEY,
+                    day TEXT NOT NULL,
+                    topics TEXT NOT NULL
+                )
+                """
+            )
+
+    def _stats(self, row: tuple, today: str) -> Dict:
+        """
+        由一行记录计算统计值
+        heat: 窗口内每天最高热度之和；velocity: 今天相比上一次出现那天每天的热度变化（今天新出现时为今天的热度）
+        """
+        topic, category, pet_category, first_seen, last_seen, sightings, days = row
+        days = json.loads(days)
+        latest = days.get(today, 0)
+        previous = [day for day in days if day < today]
+        if previous:
+            prev_day = max(previous)
+            gap = (datetime.strptime(today, DAY_FORMAT) - datetime.strptime(prev_day, DAY_FORMAT)).days
+            velocity = (latest - days[prev_day]) / gap
+        else:
+            velocity = latest
+        return {
+            "topic": topic,
+            "category": category,
+            "pet_category": pet_category,
+            "heat": sum(days.values()),
+            "peak": max(days.values()),
+            "velocity": round(velocity, 2),
+            "days_seen": len(days),
+            "sightings": sightings,
+            "first_seen": first_seen,
+            "last_seen": last_seen
+        }
+
+    def ingest(self, topics: List[Dict], at: float = None) -> None:
+        """
+        合并一次热点快照，只更新快照中的话题，并清理窗口外的话题、重新计算今天的榜单
+        同一天重复保存的快照只取每个话题的最高热度，不会重复累计
+        """
+        at = at or time.time()
+        today = _day(at)
+        window_start = _day_start(at) - (self.window_days - 1) * 86400
+        first_day = _day(window_start)
+
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            for topic in {t["topic"]: t for t in topics}.values():
+                row = conn.execute(
+                    "SELECT first_seen, last_seen, sightings, days FROM topic_trends WHERE topic = ?",
+                    (topic["topic"],)
+                ).fetchone()
+                first_seen, last_seen, sightings, days = row or (at, at, 0, "{}")
+                days = {day: heat for day, heat in json.loads(days).items() if day >= first_day}
+                days[today] = max(days.get(today, 0), topic.get("heat", 0))
+                conn.execute(
+                    "INSERT OR REPLACE INTO topic_trends "
+                    "(topic, category, pet_category, first_seen, last_seen, sightings, days) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (topic["topic"], topic.get("category"), topic.get("pet_category"),
+                     min(first_seen, at), max(last_seen, at), sightings + 1,
+                     json.dumps(days, ensure_ascii=False))
+                )
+
+            conn.execute("DELETE FROM topic_trends WHERE last_seen < ?", (window_start,))
+            self._rank(conn, at)
+
+    def _rank(self, conn: sqlite3.Connection, at: float) -> None:
+        """计算今天出现过的话题中上升最快的榜单（全部/宠物相关）"""
+        today = _day(at)
+        rows = conn.execute(
+            "SELECT topic, category, pet_category, first_seen, last_seen, sightings, days "
+            "FROM topic_trends WHERE last_seen >= ?",
+            (_day_start(at),)
+        ).fetchall()
+
+        rising = [stats for stats in (self._stats(row, today) for row in rows) if stats["velocity"] > 0]
+        rising.sort(key=lambda s: (s["velocity"], s["heat"]), reverse=True)
+        rankings = {
+            "all": rising[:self.ranking_size],
+            "pet": [s for s in rising if s["category"] == PET_CATEGORY][:self.ranking_size]
+        }
+        for name, ranked in rankings.items():
+            conn.execute(
+                "INSERT OR REPLACE INTO trend_rankings (name, day, topics) VALUES (?, ?, ?)",
+                (name, today, json.dumps(ranked, ensure_ascii=False))
+            )
+
+    def rising(self, pet_only: bool = True, k: int = None, at: float = None) -> List[Dict]:
+        """
+        今天上升最快的话题（直接读取保存快照时算好的榜单）
+        今天还没有保存过快照时返回空列表，不把之前某天的榜单当作当前榜单
+        """
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            row = conn.execute(
+                "SELECT topics FROM trend_rankings WHERE name = ? AND day = ?",
+                ("pet" if pet_only else "all", _day(at or time.time()))
+            ).fetchone()
+        ranked = json.loads(row[0]) if row else []
+        return ranked if k is None else ranked[:k]
+
+    def stats(self, topic: str, at: float = None) -> Optional[Dict]:
+        """单个话题在窗口内的统计，没有记录时返回None"""
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            row = conn.execute(
+                "SELECT topic, category, pet_category, first_seen, last_seen, sightings, days "
+                "FROM topic_trends WHERE topic = ?",
+                (topic,)
+            ).fetchone()
+        return self._stats(row, _day(at or time.time())) if row else None
+
+    def rebuild(self, topics_dir: Path) -> int:
+        """从热点记录文件重建统计（仅在首次启用或统计丢失时使用），返回导入的快照数"""
+        with sqlite_transaction(self.path, immediate=True) as conn:
+            conn.execute("DELETE FROM topic_trends")
+            conn.execute("DELETE FROM trend_rankings")
+
+        snapshots = []
+        for filepath in Path(topics_dir).glob("*_hot_topics.json"):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            snapshots.append((datetime.fromisoformat(record["fetched_at"]).timestamp(), record.get("topics", [])))
+
+        cutoff = _day_start(time.time()) - (self.window_days - 1) * 86400
+        snapshots = sorted(s for s in snapshots if s[0] >= cutoff)
+        for fetched_at, topics in snapshots:
+            self.ingest(topics, fetched_at)
+        return len(snapshots)
+
+
+def main():
+    """主函数 - 查看本周上升最快的话题"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查看热点趋势")
+    parser.add_argument("--all", action="store_true", help="包含非宠物话题")
+    parser.add_argument("--top", type=int, default=10, help="显示的话题数")
+    parser.add_argument("--rebuild", action="store_true", help="从 data/hot_topics 的记录重建统计")
+    args = parser.parse_args()
+
+    trends = TrendAggregator()
+    if args.rebuild:
+        count = trends.rebuild(Path(__file__).parent.parent / "data" / "hot_topics")
+        print(f"🔄 已从 {count} 个热点快照重建趋势统计")
+
+    rising = trends.rising(pet_only=not args.all, k=args.top)
+    print(f"📈 最近{trends.window_days}天上升最快的{'' if args.all else '宠物'}话题：")
+    for i, stats in enumerate(rising, 1):
+        print(f"  {i}. {stats['topic']} ({stats['category']}) - "
+              f"上升 {stats['velocity']:+g}/天, 累计热度 {stats['heat']}, 出现 {stats['days_seen']} 天")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+问题卡片本地渲染测试
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import card_renderer
+from card_renderer import QuestionCardRenderer
+from config import CARD_RENDER_CONFIG
+
+TEST_FONT = Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+QUESTION = {"type": "行为解读", "question": "猫咪露出肚皮说明什么？", "options": {"A": "想让你摸", "B": "信任你"}}
+
+
+@pytest.fixture
+def backgrounds(tmp_path, monkeypatch):
+    monkeypatch.setitem(CARD_RENDER_CONFIG, "backgrounds_dir", tmp_path / "backgrounds")
+    return tmp_path
+
+
+def test_missing_cjk_font_refuses_to_render(backgrounds, monkeypatch):
+    monkeypatch.setitem(CARD_RENDER_CONFIG, "font_path", "")
+    monkeypatch.setattr(card_renderer, "CJK_FONT_CANDIDATES", [str(backgrounds / "missing.ttc")])
+    with pytest.raises(FileNotFoundError):
+        QuestionCardRenderer()
+
+
+@pytest.mark.skipif(not TEST_FONT.exists(), reason="需要一个TrueType字体")
+def test_render_writes_card(backgrounds, monkeypatch):
+    monkeypatch.setitem(CARD_RENDER_CONFIG, "font_path", str(TEST_FONT))
+    renderer = QuestionCardRenderer()
+    output = renderer.render(QUESTION, 1, backgrounds / "cards" / "card.png")
+
+    with Image.open(output) as image:
+        assert image.size == CARD_RENDER_CONFIG["size"]
+    assert list(output.parent.iterdir()) == [output]
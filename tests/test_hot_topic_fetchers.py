@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+平台热榜抓取测试（使用 tests/fixtures/hot_topics 下录制的热榜文件）
+"""
+
+import sys
+import json
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from hot_topic_fetchers import fetch_all, fetch_source, fixture_client
+from pet_matcher import PET_CATEGORY
+from topic_store import TopicStore
+
+FIXTURES = Path(__file__).parent / "fixtures" / "hot_topics"
+
+
+def fetch_fixtures(directory: Path, platforms=None):
+    async def run():
+        async with fixture_client(directory) as client:
+            return await fetch_all(platforms, client)
+    return asyncio.run(run())
+
+
+def test_fetch_all_recorded_platforms():
+    topics = fetch_fixtures(FIXTURES)
+    by_title = {t["topic"]: t for t in topics}
+
+    assert set(by_title) == {"猫咪也怕冷", "双十一预售", "狗狗拆家怎么办", "秋冬换季", "猫咪踩奶是什么意思", "秋冬穿搭"}
+    # 同名话题只保留热度最高的一条
+    assert by_title["双十一预售"]["source"] == "douyin"
+    assert by_title["猫咪踩奶是什么意思"]["category"] == PET_CATEGORY
+    assert by_title["猫咪踩奶是什么意思"]["pet_category"] == "行为解读"
+    assert by_title["秋冬穿搭"]["category"] == "社会生活"
+    assert [t["heat"] for t in topics] == sorted((t["heat"] for t in topics), reverse=True)
+
+
+@pytest.mark.parametrize("name, body", [
+    ("douyin", '{"word_list": null}'),
+    ("douyin", '[{"word": "a"}]'),
+    ("douyin", '{"word_list": {"word": "a"}}'),
+    ("douyin", "<html>需要登录</html>"),
+    ("xiaohongshu", '[{"title": "a", "score": 1}]'),
+    ("xiaohongshu", '{"data": null}'),
+    ("xiaohongshu", '{"data": {"items": [1, "x", null]}}'),
+    ("xiaohongshu", '{"data": {"items": [{"title": 123, "score": 5}]}}'),
+])
+def test_malformed_platform_fails_alone(tmp_path, name, body):
+    shutil.copy(FIXTURES / "weibo.html", tmp_path / "weibo.html")
+    (tmp_path / f"{name}.json").write_text(body, encoding="utf-8")
+
+    async def fetch_one():
+        async with fixture_client(tmp_path) as client:
+            return await fetch_source(name, client)
+
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_one())
+
+    topics = fetch_fixtures(tmp_path, ["weibo", name])
+    assert {t["source"] for t in topics} == {"weibo"}
+
+
+def test_missing_recording_is_a_fetch_error(tmp_path):
+    shutil.copy(FIXTURES / "douyin.json", tmp_path / "douyin.json")
+    topics = fetch_fixtures(tmp_path, ["weibo", "douyin"])
+    assert {t["source"] for t in topics} == {"douyin"}
+
+
+def test_topic_store_survives_malformed_platform(tmp_path):
+    (tmp_path / "douyin.json").write_text(json.dumps({"word_list": None}), encoding="utf-8")
+    store = TopicStore(tmp_path / "hot_topics.db")
+
+    async def run():
+        async with fixture_client(tmp_path) as client:
+            return await store.get("douyin", lambda: fetch_source("douyin", client))
+
+    assert asyncio.run(run()) == []
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享HTTP客户端测试
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import http_client
+from http_client import aclose_clients, close_clients, get_async_client, get_client, timeout_for
+
+VOLCANO = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
+WECHAT = "https://api.weixin.qq.com/cgi-bin/draft/add"
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(http_client, "_clients", {})
+    yield
+    close_clients()
+
+
+@pytest.mark.parametrize("url, key", [
+    (VOLCANO, "https://ark.cn-beijing.volces.com"),
+    ("https://ARK.cn-beijing.volces.com/other", "https://ark.cn-beijing.volces.com"),
+    ("http://localhost:8080/v1", "http://localhost:8080"),
+])
+def test_pool_key(url, key):
+    assert http_client._pool_key(url) == key
+
+
+def test_sync_clients_shared_per_host():
+    client = get_client(VOLCANO)
+    assert get_client(VOLCANO + "?stream=true") is client
+    assert get_client(WECHAT) is not client
+
+    close_clients()
+    assert client.is_closed
+    assert get_client(VOLCANO) is not client
+
+
+def test_async_clients_shared_within_loop():
+    async def run():
+        client = get_async_client(VOLCANO)
+        assert get_async_client(VOLCANO) is client
+        assert get_async_client(WECHAT) is not client
+        await aclose_clients()
+        assert client.is_closed
+        fresh = get_async_client(VOLCANO)
+        assert fresh is not client
+        await aclose_clients()
+        return fresh
+
+    # 异步客户端绑定事件循环，新的事件循环会创建新的客户端
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert first is not second
+
+
+@pytest.mark.parametrize("host, limit", [
+    ("ark.cn-beijing.volces.com", 8),
+    ("api.weixin.qq.com", 4),
+    ("example.com", 10),
+])
+def test_per_host_connection_limits(host, limit):
+    limits = http_client._limits_for(host)
+    assert limits.max_connections == limits.max_keepalive_connections == limit
+
+
+def test_timeout_for_falls_back_to_default():
+    assert timeout_for("volcano_image").read == 180
+    assert timeout_for("wechat_token").connect == 5
+    assert timeout_for("unknown").read == timeout_for("default").read == 60
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+b64_json 图片响应流式解析测试
+"""
+
+import sys
+import json
+import base64
+import asyncio
+import hashlib
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import image_io
+from image_io import stream_b64_images
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/images/generations")
+# 长度不是3的倍数，base64里包含 "/" 和 "+"
+IMAGES = [bytes(range(256)) * 40 + b"\xff\xfe", b"\xfb\xff\xbf" * 500 + b"x"]
+
+
+def b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def response_body(items, usage=None, escape_slashes=True) -> bytes:
+    body = json.dumps({"data": items, "usage": usage or {"generated_images": len(items)}})
+    # 部分接口把 "/" 转义为 "\/"
+    return (body.replace("/", "\\/") if escape_slashes else body).encode()
+
+
+def stream(body: bytes, paths):
+    response = httpx.Response(200, content=body, request=REQUEST)
+    return asyncio.run(stream_b64_images(response, paths))
+
+
+@pytest.fixture(params=[1, 3, 7, 64, 64 * 1024])
+def chunk_size(request, monkeypatch):
+    # 不同块大小下，字段名、转义符和base64分组都可能被拆在两块之间
+    monkeypatch.setattr(image_io, "CHUNK_SIZE", request.param)
+    return request.param
+
+
+def test_images_written_and_checksummed(tmp_path, chunk_size):
+    paths = [tmp_path / "a.png", tmp_path / "b.png"]
+    result = stream(response_body([{"b64_json": b64(data), "size": "2K"} for data in IMAGES]), paths)
+
+    assert [p.read_bytes() for p in paths] == IMAGES
+    assert [item["sha256"] for item in result["data"]] == [hashlib.sha256(data).hexdigest() for data in IMAGES]
+    assert all("b64_json" not in item and item["size"] == "2K" for item in result["data"])
+    assert result["usage"] == {"generated_images": 2}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.png", "b.png"]
+
+
+def test_error_item_keeps_index_mapping(tmp_path, chunk_size):
+    paths = [tmp_path / f"{i}.png" for i in range(3)]
+    items = [{"b64_json": b64(IMAGES[0])}, {"error": {"code": "OutputImageSensitive"}}, {"b64_json": b64(IMAGES[1])}]
+    result = stream(response_body(items), paths)
+
+    assert paths[0].read_bytes() == IMAGES[0]
+    assert not paths[1].exists()
+    assert paths[2].read_bytes() == IMAGES[1]
+    assert result["data"][1] == {"error": {"code": "OutputImageSensitive"}}
+
+
+def test_extra_images_are_discarded(tmp_path):
+    result = stream(response_body([{"b64_json": b64(data)} for data in IMAGES]), [tmp_path / "only.png"])
+
+    assert (tmp_path / "only.png").read_bytes() == IMAGES[0]
+    assert "sha256" not in result["data"][1]
+    assert [p.name for p in tmp_path.iterdir()] == ["only.png"]
+
+
+def test_line_wrapped_base64(tmp_path, chunk_size):
+    encoded = base64.encodebytes(IMAGES[0]).decode()
+    stream(response_body([{"b64_json": encoded}], escape_slashes=False), [tmp_path / "a.png"])
+    assert (tmp_path / "a.png").read_bytes() == IMAGES[0]
+
+
+def test_truncated_response_cleans_up(tmp_path, chunk_size):
+    body = response_body([{"b64_json": b64(IMAGES[0])}])
+    with pytest.raises(httpx.RemoteProtocolError):
+        stream(body[:len(body) // 2], [tmp_path / "a.png"])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_url_response_passes_through(tmp_path):
+    items = [{"url": "https://cdn.example.com/a.png", "size": "2K"}]
+    result = stream(response_body(items, escape_slashes=False), [tmp_path / "a.png"])
+    assert result["data"] == items
+    assert list(tmp_path.iterdir()) == []
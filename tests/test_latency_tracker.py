@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调用耗时统计测试
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from config import LATENCY_CONFIG
+from latency_tracker import LatencyTracker
+
+
+def test_record_batches_writes_until_flush(tmp_path, monkeypatch):
+    monkeypatch.setitem(LATENCY_CONFIG, "save_interval", 3600)
+    path = tmp_path / "latency.json"
+    tracker = LatencyTracker(path)
+    for seconds in (1.0, 2.0, 3.0):
+        tracker.record("llm:volcano", seconds)
+    assert not path.exists()
+
+    tracker.flush()
+    assert LatencyTracker(path).count("llm:volcano") == 3
+
+
+def test_record_writes_after_interval(tmp_path, monkeypatch):
+    monkeypatch.setitem(LATENCY_CONFIG, "save_interval", 0)
+    path = tmp_path / "latency.json"
+    LatencyTracker(path).record("image:dalle", 4.2)
+    assert LatencyTracker(path).percentile("image:dalle", 0.5) == 4.2
+
+
+def test_percentile_over_recent_samples(tmp_path):
+    tracker = LatencyTracker(tmp_path / "latency.json", window=5)
+    for seconds in (9, 1, 2, 3, 4, 5):
+        tracker.record("llm:openai", seconds)
+    assert tracker.count("llm:openai") == 5
+    assert tracker.percentile("llm:openai", 1.0) == 5
+    assert tracker.percentile("llm:openai", 0.0, last=2) == 4
+    assert tracker.percentile("llm:missing", 0.9) is None
+
+
+def test_reset_saves_immediately(tmp_path):
+    path = tmp_path / "latency.json"
+    tracker = LatencyTracker(path)
+    tracker.record("llm:volcano", 1.0)
+    tracker.reset("llm:volcano")
+    assert LatencyTracker(path).count("llm:volcano") == 0
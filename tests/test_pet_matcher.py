@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+宠物关键词匹配测试
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from pet_matcher import PET_CATEGORY, PetMatcher, get_matcher
+from topic_scoring import PET_CATEGORY as SCORING_PET_CATEGORY
+
+
+@pytest.mark.parametrize("title", [
+    "汪小菲官宣",
+    "狗仔拍到",
+    "熊猫",
+    "大熊猫花花",
+    "热狗",
+    "猫眼电影",
+    "高考挑战",
+    "某明星春晚名场面",
+    "体检报告解读",
+    "撒狗粮",
+    "狗狗币暴涨",
+    "春节",
+])
+def test_non_pet_topics(title):
+    result = get_matcher().classify(title)
+    assert not result["is_pet"]
+    assert result["pet_category"] is None
+
+
+@pytest.mark.parametrize("title, category", [
+    ("猫咪踩奶是什么意思", "行为解读"),
+    ("狗狗拆家怎么办", "行为解读"),
+    ("柯基挑战跳绳", "趣味挑战"),
+    ("猫粮涨价", "基础知识"),
+    ("宠物版春节", "热点结合"),
+])
+def test_pet_topics(title, category):
+    result = get_matcher().classify(title)
+    assert result["is_pet"]
+    assert result["pet_category"] == category
+
+
+def test_pet_word_outside_excluded_word_still_counts():
+    result = get_matcher().classify("熊猫和猫咪同框")
+    assert result["is_pet"]
+    assert "猫咪" in result["keywords"]
+
+
+def test_category_words_need_pet_context():
+    matcher = get_matcher()
+    assert matcher.classify("体检", assume_pet=True)["pet_category"] == "基础知识"
+    assert matcher.classify("体检")["pet_category"] is None
+
+
+def test_tag_keeps_non_pet_category():
+    topics = [
+        {"topic": "汪小菲官宣", "category": "社会生活", "heat": 90, "source": "weibo"},
+        {"topic": "流浪猫救助", "category": "社会生活", "heat": 80, "source": "weibo"},
+    ]
+    tagged = get_matcher().tag(topics)
+    assert [t["category"] for t in tagged] == ["社会生活", PET_CATEGORY]
+
+
+def test_matches_overlapping_patterns():
+    matcher = PetMatcher(lexicon={"通用": ["猫咪", "小猫咪"], "行为解读": ["咪咪叫"]}, categories={}, exclude=[])
+    found = sorted((start, matcher.patterns[pid][0]) for start, pid in matcher.find("小猫咪咪叫"))
+    assert found == [(0, "小猫咪"), (1, "猫咪"), (2, "咪咪叫")]
+
+
+def test_pet_category_defined_once():
+    assert SCORING_PET_CATEGORY is PET_CATEGORY
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程令牌桶限流测试
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import rate_limiter
+from config import RATE_LIMIT_CONFIG
+from rate_limiter import RateLimiter
+
+NAME, MODEL = "llm:test", "model-a"
+
+
+class Clock:
+    """可手动推进的时钟（替换 rate_limiter.time）"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.time = lambda: self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    # rpm=60 -> 每秒补充1个，容量5个；tpm=600 -> 每秒补充10个，容量50个
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, "burst_seconds", 5)
+    monkeypatch.setitem(RATE_LIMIT_CONFIG["limits"], NAME, {"rpm": 60, "tpm": 600})
+
+
+def buckets(requests: int = 1, tokens: int = 0) -> dict:
+    return RateLimiter._buckets(NAME, MODEL, RateLimiter.limits_for(NAME, MODEL), requests, tokens)
+
+
+def test_limits_prefer_model_specific_entry(monkeypatch, limits):
+    monkeypatch.setitem(RATE_LIMIT_CONFIG["limits"], f"{NAME}:{MODEL}", {"rpm": 1})
+    assert RateLimiter.limits_for(NAME, MODEL) == {"rpm": 1}
+    assert RateLimiter.limits_for(NAME, "model-b") == {"rpm": 60, "tpm": 600}
+    assert RateLimiter.limits_for("llm:unknown", MODEL) is None
+
+
+def test_burst_then_wait_for_refill(tmp_path, clock, limits):
+    limiter = RateLimiter(tmp_path / "rate_limits.db")
+    for _ in range(5):
+        assert limiter._try_acquire(buckets()) == 0
+    assert limiter._try_acquire(buckets()) == pytest.approx(1.0)
+
+    clock.now += 1
+    assert limiter._try_acquire(buckets()) == 0
+
+
+def test_all_buckets_or_nothing(tmp_path, clock, limits):
+    limiter = RateLimiter(tmp_path / "rate_limits.db")
+    assert limiter._try_acquire(buckets(tokens=45)) == 0
+    # tpm 只剩5个，需要等待 (20 - 5) / 10 秒，rpm 桶不扣减
+    assert limiter._try_acquire(buckets(tokens=20)) == pytest.approx(1.5)
+    for _ in range(4):
+        assert limiter._try_acquire(buckets()) == 0
+
+
+def test_oversized_request_is_capped_to_capacity(limits):
+    _, capacity, amount = buckets(tokens=10_000)[f"{NAME}:{MODEL}:tpm"]
+    assert amount == capacity == 50
+
+
+def test_processes_share_buckets(tmp_path, clock, limits):
+    path = tmp_path / "rate_limits.db"
+    first, second = RateLimiter(path), RateLimiter(path)
+    for _ in range(3):
+        assert first._try_acquire(buckets()) == 0
+    for _ in range(2):
+        assert second._try_acquire(buckets()) == 0
+    assert first._try_acquire(buckets()) > 0
+
+
+def test_settle_refunds_and_overdraws(tmp_path, clock, limits):
+    limiter = RateLimiter(tmp_path / "rate_limits.db")
+    assert limiter._try_acquire(buckets(tokens=40)) == 0
+
+    # 实际只用了10个，退回30个
+    limiter.settle(NAME, MODEL, estimated=40, actual=10)
+    assert limiter._try_acquire(buckets(tokens=40)) == 0
+
+    # 实际用了100个，透支后需要等待更久
+    limiter.settle(NAME, MODEL, estimated=40, actual=100)
+    assert limiter._try_acquire(buckets(tokens=10)) == pytest.approx((60 + 10) / 10)
+
+
+def test_acquire_waits_until_tokens_refill(tmp_path, monkeypatch, clock, limits):
+    limiter = RateLimiter(tmp_path / "rate_limits.db")
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+
+    async def run():
+        for _ in range(6):
+            await limiter.acquire(NAME, MODEL)
+
+    asyncio.run(run())
+    assert waits == [pytest.approx(1.0)]
+
+
+def test_unlimited_service_never_waits(tmp_path):
+    limiter = RateLimiter(tmp_path / "rate_limits.db")
+    asyncio.run(limiter.acquire("llm:unknown", MODEL, tokens=10 ** 9))
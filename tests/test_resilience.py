@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求重试与熔断测试
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import resilience
+from config import RETRY_CONFIG
+from resilience import (
+    AUTH, CLIENT, NETWORK, RATE_LIMIT, SERVER, TIMEOUT,
+    CircuitBreaker, CircuitOpenError, WechatAPIError, classify_error, retry_after, retry_async, retry_sync
+)
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat")
+
+
+def status_error(status: int, headers: dict = None) -> httpx.HTTPStatusError:
+    response = httpx.Response(status, headers=headers, request=REQUEST)
+    return httpx.HTTPStatusError(f"{status}", request=REQUEST, response=response)
+
+
+class Clock:
+    """可手动推进的时钟（替换 resilience.time）"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.time = lambda: self.now
+        self.monotonic = lambda: self.now
+        self.sleep = lambda seconds: None
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    # 每个测试使用独立的熔断器，退避等待为0
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setitem(RETRY_CONFIG, "base_delay", 0)
+    monkeypatch.setitem(RETRY_CONFIG, "max_delay", 0)
+
+
+class Calls:
+    """按顺序返回结果或抛出异常的请求函数"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.count = 0
+
+    async def __call__(self):
+        self.count += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.mark.parametrize("error, kind", [
+    (status_error(429), RATE_LIMIT),
+    (status_error(401), AUTH),
+    (status_error(403), AUTH),
+    (status_error(404), CLIENT),
+    (status_error(503), SERVER),
+    (httpx.ReadTimeout("slow", request=REQUEST), TIMEOUT),
+    (httpx.ConnectError("refused", request=REQUEST), NETWORK),
+    (WechatAPIError({"errcode": 45009}), RATE_LIMIT),
+    (WechatAPIError({"errcode": 40001}), AUTH),
+    (WechatAPIError({"errcode": 12345}), CLIENT),
+    (ValueError("other"), CLIENT),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_retry_after_seconds_and_date(clock):
+    assert retry_after(status_error(429, {"Retry-After": "7"})) == 7
+    clock.now = 0.0
+    assert retry_after(status_error(429, {"Retry-After": "Thu, 01 Jan 1970 00:00:30 GMT"})) == 30
+    assert retry_after(status_error(429, {"Retry-After": "soon"})) is None
+    assert retry_after(status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_breaker_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker("llm:test", failure_threshold=2, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # 冷却结束后只放行一次试探请求
+    clock.now += 60
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_immediately(clock):
+    breaker = CircuitBreaker("llm:test", failure_threshold=3, recovery_timeout=60)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 60
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_abandoned_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker("llm:test", failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    breaker.before_call()
+    breaker.abandon()
+    breaker.before_call()
+
+
+def test_retry_server_errors_until_success():
+    calls = Calls(status_error(502), status_error(503), "ok")
+    assert asyncio.run(retry_async(calls, "llm:test")) == "ok"
+    assert calls.count == 3
+    assert not resilience.get_breaker("llm:test").is_open
+
+
+def test_server_errors_open_breaker_and_stop_retrying():
+    calls = Calls(status_error(500))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_async(calls, "llm:test"))
+    # 达到熔断阈值后不再原地重试，之后的请求直接被拒绝
+    assert calls.count == min(RETRY_CONFIG["max_attempts"]["server"], RETRY_CONFIG["breaker"]["failure_threshold"])
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(retry_async(Calls("ok"), "llm:test"))
+
+
+def test_client_error_is_not_retried_or_counted():
+    calls = Calls(status_error(400))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_async(calls, "llm:test"))
+    assert calls.count == 1
+    assert resilience.get_breaker("llm:test").failures == 0
+
+
+def test_rate_limit_with_long_retry_after_fails_fast():
+    calls = Calls(status_error(429, {"Retry-After": str(RETRY_CONFIG["max_retry_after"] + 1)}))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_async(calls, "llm:test"))
+    assert calls.count == 1
+
+
+def test_cancelled_request_releases_probe(clock):
+    breaker = resilience.get_breaker("llm:test")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.now += breaker.recovery_timeout
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(retry_async(Calls(asyncio.CancelledError()), "llm:test"))
+    # 试探名额已释放，下一次请求可以继续试探
+    assert asyncio.run(retry_async(Calls("ok"), "llm:test")) == "ok"
+    assert not breaker.is_open
+
+
+def test_retry_sync(clock):
+    outcomes = [httpx.ConnectError("refused", request=REQUEST), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    assert retry_sync(call, "publish:test") == "ok"
+    assert not outcomes
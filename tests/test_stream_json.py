@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式JSON解析测试
+"""
+
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from stream_json import IncrementalJSONParser, MalformedOutputError, parse_partial
+
+OBJECT = {"intro": "开头，带逗号", "body": "包含 \"引号\" 和 {括号}", "hashtags": ["猫咪", "狗狗"], "meta": {"a": [1, 2]}}
+
+
+def feed_in_chunks(parser: IncrementalJSONParser, text: str, size: int) -> None:
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_any_chunking_gives_same_fields(size):
+    text = json.dumps(OBJECT, ensure_ascii=False)
+    parser = IncrementalJSONParser(OBJECT)
+    feed_in_chunks(parser, text, size)
+    assert parser.complete
+    assert parser.result() == OBJECT
+    assert not parser.missing_fields
+
+
+def test_fields_available_before_object_closes():
+    parser = IncrementalJSONParser(["intro", "body"])
+    parser.feed('{"intro": "你好", "bo')
+    assert parser.fields == {"intro": "你好"}
+    assert parser.missing_fields == {"body"}
+    assert parser.result() is None
+
+
+def test_prefix_and_trailing_text_are_dropped():
+    parser = IncrementalJSONParser()
+    parser.feed('好的，结果如下：\n```json\n{"intro": "i"}\n```\n希望有帮助')
+    assert parser.complete
+    assert parser.json_text == '{"intro": "i"}'
+    assert parser.finish() == '{"intro": "i"}'
+
+
+def test_no_object_within_prefix_limit():
+    parser = IncrementalJSONParser(max_prefix_chars=10)
+    with pytest.raises(MalformedOutputError):
+        parser.feed("这是一段很长的说明文字，没有任何JSON对象出现")
+
+
+def test_unparsable_field():
+    parser = IncrementalJSONParser()
+    with pytest.raises(MalformedOutputError):
+        parser.feed('{"intro": 你好, "body": "b"}')
+
+
+def test_mismatched_brackets():
+    parser = IncrementalJSONParser()
+    with pytest.raises(MalformedOutputError):
+        parser.feed('{"a": [1, 2}]')
+
+
+def test_finish_without_object_is_malformed():
+    parser = IncrementalJSONParser()
+    parser.feed("抱歉，我无法完成")
+    with pytest.raises(MalformedOutputError):
+        parser.finish()
+
+
+def test_finish_truncated_without_fields_is_malformed():
+    parser = IncrementalJSONParser()
+    parser.feed('{"intro": "只写了一半')
+    with pytest.raises(MalformedOutputError):
+        parser.finish()
+
+
+def test_finish_truncated_keeps_complete_fields():
+    parser = IncrementalJSONParser()
+    parser.feed('{"intro": "i", "body": "被截')
+    assert parser.finish() == '{"intro": "i", "body": "被截'
+    assert parse_partial(parser.finish()) == {"intro": "i"}
+
+
+def test_parse_partial_never_raises():
+    assert parse_partial('{"intro": "i", "body": 坏掉的, "cta": "c"}') == {"intro": "i"}
+    assert parse_partial("没有JSON") == {}
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点话题打分测试
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from config import HOT_TOPIC_CONFIG
+from pet_matcher import PET_CATEGORY
+from topic_scoring import rank_topics, score_topics
+
+NOW = 1_800_000_000.0
+
+
+@pytest.mark.parametrize("source", ["general", "pet", "calendar"])
+def test_mock_topic_sources_are_weighted(source):
+    # get_mock_hot_topics 生成的话题来源
+    weight = HOT_TOPIC_CONFIG["source_weights"][source]
+    topic = {"topic": "周末计划", "category": "社会生活", "heat": 100, "source": source}
+    assert score_topics([topic], NOW)[0] == pytest.approx(100 * weight * HOT_TOPIC_CONFIG["general_hot_weight"])
+
+
+def test_pet_weight_and_recency_decay():
+    half_life = HOT_TOPIC_CONFIG["recency_half_life"]
+    fresh = {"topic": "猫咪", "category": PET_CATEGORY, "heat": 50, "source": "weibo", "fetched_at": NOW}
+    stale = dict(fresh, fetched_at=NOW - half_life)
+    scores = score_topics([fresh, stale], NOW)
+    assert scores[0] == pytest.approx(50 * HOT_TOPIC_CONFIG["pet_related_weight"])
+    assert scores[1] == pytest.approx(scores[0] / 2)
+
+
+def test_rank_topics_top_k_in_order():
+    topics = [{"topic": str(i), "category": "社会生活", "heat": heat, "source": "weibo"}
+              for i, heat in enumerate([10, 80, 30, 80, 50])]
+    ranked = rank_topics(topics, k=3, now=NOW)
+    assert [t["topic"] for t in ranked] == ["1", "3", "4"]
+    assert rank_topics(topics, k=0, now=NOW) == []
+    assert len(rank_topics(topics, now=NOW)) == 5
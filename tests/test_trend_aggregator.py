@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点趋势统计测试
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from pet_matcher import PET_CATEGORY
+from trend_aggregator import TrendAggregator
+
+DAY1 = datetime(2026, 11, 2, 9).timestamp()
+DAY2 = datetime(2026, 11, 3, 9).timestamp()
+DAY3 = datetime(2026, 11, 4, 9).timestamp()
+
+
+def topic(name: str, heat: int, category: str = PET_CATEGORY) -> dict:
+    return {"topic": name, "category": category, "pet_category": None, "heat": heat}
+
+
+def test_velocity_against_previous_day(tmp_path):
+    trends = TrendAggregator(tmp_path / "hot_topics.db")
+    trends.ingest([topic("猫咪踩奶", 20), topic("双十一", 90, "社会生活")], DAY1)
+    trends.ingest([topic("猫咪踩奶", 50), topic("双十一", 60, "社会生活")], DAY2)
+
+    assert trends.stats("猫咪踩奶", DAY2)["velocity"] == 30
+    assert [s["topic"] for s in trends.rising(pet_only=True, at=DAY2)] == ["猫咪踩奶"]
+    # 下降的话题不进入榜单
+    assert [s["topic"] for s in trends.rising(pet_only=False, at=DAY2)] == ["猫咪踩奶"]
+
+
+def test_same_day_snapshots_keep_peak(tmp_path):
+    trends = TrendAggregator(tmp_path / "hot_topics.db")
+    trends.ingest([topic("猫咪踩奶", 40)], DAY1)
+    trends.ingest([topic("猫咪踩奶", 30)], DAY1 + 3600)
+
+    stats = trends.stats("猫咪踩奶", DAY1)
+    assert stats["heat"] == 40
+    assert stats["sightings"] == 2
+
+
+def test_ranking_from_an_earlier_day_is_not_current(tmp_path):
+    trends = TrendAggregator(tmp_path / "hot_topics.db")
+    trends.ingest([topic("猫咪踩奶", 20)], DAY1)
+    trends.ingest([topic("猫咪踩奶", 50)], DAY2)
+
+    assert trends.rising(at=DAY2)
+    assert trends.rising(at=DAY3) == []